@@ -3,6 +3,8 @@ import os
 from collections.abc import Generator
 from pathlib import Path
 
+from .services import labs
+
 DATABASE_PATH = os.getenv("DATABASE_PATH", "/data/driver.db")
 
 
@@ -32,7 +34,10 @@ def init_db():
     schema_path = Path(__file__).parent.parent / "schema.sql"
     conn = get_db()
     with open(schema_path, "r") as f:
-        conn.executescript(f.read())
+        schema_sql = f.read()
+    # Older databases need the derived lab columns before schema.sql indexes them.
+    missing_lab_columns = _add_lab_history_columns(conn)
+    conn.executescript(schema_sql)
 
     # Backfill schema for older databases created before idempotency keys existed.
     columns = conn.execute("PRAGMA table_info(exercise_sessions)").fetchall()
@@ -50,21 +55,113 @@ def init_db():
            ON body_metrics(recorded_date, metric, source)
            WHERE source = 'apple_health'"""
     )
-    _migrate_food_meal_type_check(conn)
+    if missing_lab_columns:
+        _backfill_lab_history(conn)
+    # Superseded by idx_labs_marker_trend.
+    conn.execute("DROP INDEX IF EXISTS idx_labs_marker")
+    # Panel imports upsert on (drawn_date, panel, marker). Re-run backfills
+    # could leave duplicates in older databases; keep the newest of each.
+    has_lab_key = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='uq_lab_results_draw'"
+    ).fetchone()
+    if not has_lab_key:
+        duplicates = conn.execute(
+            """DELETE FROM lab_results
+               WHERE id NOT IN (
+                 SELECT MAX(id) FROM lab_results GROUP BY drawn_date, panel, marker
+               )"""
+        )
+        conn.execute(
+            """CREATE UNIQUE INDEX uq_lab_results_draw
+               ON lab_results(drawn_date, panel, marker)"""
+        )
+        if duplicates.rowcount:
+            _backfill_lab_history(conn)
+    # Adherence logs upsert on (supplement_id, recorded_date); keep the newest
+    # of any older duplicates. The rollup triggers account for the deletes.
+    has_log_key = conn.execute(
+        """SELECT 1 FROM sqlite_master
+           WHERE type='index' AND name='uq_supplement_logs_day'"""
+    ).fetchone()
+    if not has_log_key:
+        conn.execute(
+            """DELETE FROM supplement_logs
+               WHERE id NOT IN (
+                 SELECT MAX(id) FROM supplement_logs
+                 GROUP BY supplement_id, recorded_date
+               )"""
+        )
+        conn.execute(
+            """CREATE UNIQUE INDEX uq_supplement_logs_day
+               ON supplement_logs(supplement_id, recorded_date)"""
+        )
+    if _migrate_food_meal_type_check(conn):
+        # Rebuilding the table drops its triggers; re-run the idempotent schema.
+        conn.executescript(schema_sql)
+
+    # Seed the food catalog for databases that predate it.
+    conn.execute(
+        """INSERT OR IGNORE INTO food_catalog_pending (normalized_name)
+           SELECT DISTINCT lower(trim(name))
+           FROM food_entries
+           WHERE deleted_at IS NULL
+             AND NOT EXISTS (SELECT 1 FROM food_catalog)"""
+    )
+    # Baselines are recomputed from metric_daily_values; drop the running-sum
+    # columns earlier versions kept.
+    for column in conn.execute("PRAGMA table_info(metric_baselines)").fetchall():
+        if column["name"].startswith(("sum_", "sumsq_")):
+            conn.execute(f"ALTER TABLE metric_baselines DROP COLUMN {column['name']}")
+    # Seed rolling baselines for databases that predate them.
+    if conn.execute("SELECT 1 FROM metric_daily_values LIMIT 1").fetchone() is None:
+        conn.execute(
+            """INSERT OR IGNORE INTO metric_baselines_pending (source_table, value_date)
+               SELECT 'sleep_records', recorded_date FROM sleep_records
+               UNION
+               SELECT 'body_metrics', recorded_date FROM body_metrics
+               WHERE metric = 'weight_lbs'
+               UNION
+               SELECT 'food_entries', recorded_date FROM food_entries
+               WHERE deleted_at IS NULL"""
+        )
     conn.commit()
     conn.close()
 
 
-def _migrate_food_meal_type_check(conn: sqlite3.Connection):
+def _add_lab_history_columns(conn: sqlite3.Connection) -> list[str]:
+    lab_columns = {
+        column["name"] for column in conn.execute("PRAGMA table_info(lab_results)")
+    }
+    if not lab_columns:
+        # New database: schema.sql creates the table with every column.
+        return []
+    missing_lab_columns = [
+        column
+        for column in ("previous_value", "delta", "range_flag")
+        if column not in lab_columns
+    ]
+    for column in missing_lab_columns:
+        column_type = "TEXT" if column == "range_flag" else "REAL"
+        conn.execute(f"ALTER TABLE lab_results ADD COLUMN {column} {column_type}")
+    return missing_lab_columns
+
+
+def _backfill_lab_history(conn: sqlite3.Connection) -> None:
+    # Every marker's previous_value, delta and range_flag, with the statement
+    # the labs service runs on each write.
+    conn.execute(labs._REFRESH_SQL.format(marker_filter="1"))
+
+
+def _migrate_food_meal_type_check(conn: sqlite3.Connection) -> bool:
     row = conn.execute(
         "SELECT sql FROM sqlite_master WHERE type='table' AND name='food_entries'"
     ).fetchone()
     if not row:
-        return
+        return False
 
     create_sql = row["sql"] or ""
     if "'meal'" in create_sql:
-        return
+        return False
 
     conn.executescript(
         """
@@ -141,3 +238,4 @@ def _migrate_food_meal_type_check(conn: sqlite3.Connection):
         CREATE INDEX IF NOT EXISTS idx_food_date ON food_entries(recorded_date) WHERE deleted_at IS NULL;
         """
     )
+    return True
@@ -0,0 +1,107 @@
+"""Background work: scheduled jobs and the derived-data pipeline.
+
+Schedules are cron expressions in server-local time and can be overridden
+per job with ``SCHEDULE_<NAME>`` (e.g. ``SCHEDULE_OURA_SYNC="15 7 * * *"``).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from datetime import date
+from typing import Any
+
+import httpx
+
+from .db import get_db
+from .routers.ingest import ingest_oura
+from .services.coaching import generate_daily_digest, generate_weekly_digest
+from .services.events import publish_change
+from .services.oura_client import fetch_ingest_payload, sync_window
+from .services.pipeline import DERIVED_ARTIFACTS, Artifact, DerivedDataPipeline
+from .services.reports import REPORT_TABLES, report_workers
+from .services.scheduler import Job, Scheduler
+from .services.suggestions import generate_daily_suggestion
+
+
+def _schedule(name: str, default: str) -> str:
+    return os.getenv(f"SCHEDULE_{name.upper()}", default)
+
+
+def _oura_token() -> str:
+    return os.getenv("OURA_API_TOKEN", "").strip()
+
+
+def sync_oura(conn: sqlite3.Connection) -> dict[str, Any]:
+    start, end = sync_window(int(os.getenv("OURA_SYNC_DAYS", 2)), date.today())
+    with httpx.Client(timeout=30.0) as client:
+        payload = fetch_ingest_payload(
+            client, token=_oura_token(), start=start, end=end
+        )
+    return ingest_oura(payload, conn)
+
+
+def daily_suggestion(conn: sqlite3.Connection) -> dict[str, Any]:
+    return generate_daily_suggestion(conn, target=date.today())
+
+
+def daily_digest(conn: sqlite3.Connection) -> dict[str, Any]:
+    target = date.today()
+    digest = generate_daily_digest(conn, target=target)
+    publish_change(
+        "scheduler.daily_digest", tables=["coaching_digests"], dates=[target]
+    )
+    return digest
+
+
+def weekly_digest(conn: sqlite3.Connection) -> dict[str, Any]:
+    end = date.today()
+    digest = generate_weekly_digest(conn, ending=end)
+    publish_change("scheduler.weekly_digest", tables=["coaching_digests"], dates=[end])
+    return digest
+
+
+def db_maintenance(conn: sqlite3.Connection) -> None:
+    # Refresh planner statistics, then fold the WAL back into the main file
+    # so it doesn't keep growing between restarts.
+    conn.execute("PRAGMA optimize")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+JOBS = [
+    Job(
+        "oura_sync",
+        _schedule("oura_sync", "30 6 * * *"),
+        sync_oura,
+        heavy=True,
+        enabled=lambda: bool(_oura_token()),
+    ),
+    Job(
+        "daily_suggestion", _schedule("daily_suggestion", "0 7 * * *"), daily_suggestion
+    ),
+    Job("daily_digest", _schedule("daily_digest", "0 21 * * *"), daily_digest),
+    Job("weekly_digest", _schedule("weekly_digest", "30 20 * * 0"), weekly_digest),
+    Job(
+        "db_maintenance",
+        _schedule("db_maintenance", "15 3 * * *"),
+        db_maintenance,
+        heavy=True,
+        jitter_seconds=900,
+    ),
+]
+
+scheduler = Scheduler(JOBS, connect=get_db)
+
+pipeline = DerivedDataPipeline(
+    [
+        *DERIVED_ARTIFACTS,
+        # Re-render today's long report windows in the background.
+        Artifact(
+            "doctor_report",
+            frozenset(REPORT_TABLES),
+            lambda conn, days: report_workers.precompute(date.today(), get_db),
+            per_day=False,
+        ),
+    ],
+    connect=get_db,
+)
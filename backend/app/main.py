@@ -7,19 +7,31 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from .db import init_db
+from .jobs import pipeline, scheduler
+from .services.events import broker as event_broker
+from .services.pagination import NEXT_CURSOR_HEADER
+from .services.photo_store import photo_workers
+from .services.pipeline import pipeline_enabled
+from .services.reports import report_workers
+from .services.scheduler import LoadTrackingMiddleware, scheduler_enabled
+from .services.vision_client import vision_client
 from .routers import (
     agent,
+    aggregate,
     coaching,
     dashboard,
+    events,
     exercise,
     food,
     goals,
     ingest,
+    insights,
     labs,
     medications,
     medical_history,
     metrics,
     reports,
+    scheduler as scheduler_router,
     sleep,
     supplements,
     training,
@@ -29,7 +41,18 @@ from .routers import (
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    await vision_client.start()
+    if scheduler_enabled():
+        scheduler.start()
+    if pipeline_enabled():
+        pipeline.start(event_broker)
     yield
+    await scheduler.stop()
+    await pipeline.stop()
+    event_broker.close()
+    await vision_client.aclose()
+    photo_workers.shutdown()
+    report_workers.shutdown()
 
 
 app = FastAPI(
@@ -44,7 +67,10 @@ app.add_middleware(
     allow_origins=["*"],  # Tailscale-only network, no external exposure
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+# Lets the scheduler hold heavy jobs back while requests are being served.
+app.add_middleware(LoadTrackingMiddleware, monitor=scheduler.monitor)
 
 app.include_router(food.router, prefix="/api/v1/food", tags=["food"])
 app.include_router(exercise.router, prefix="/api/v1/exercise", tags=["exercise"])
@@ -67,6 +93,12 @@ app.include_router(training.router, prefix="/api/v1/training", tags=["training"]
 app.include_router(coaching.router, prefix="/api/v1/coaching", tags=["coaching"])
 app.include_router(goals.router, prefix="/api/v1/goals", tags=["goals"])
 app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["events"])
+app.include_router(aggregate.router, prefix="/api/v1/aggregate", tags=["aggregate"])
+app.include_router(insights.router, prefix="/api/v1/insights", tags=["insights"])
+app.include_router(
+    scheduler_router.router, prefix="/api/v1/scheduler", tags=["scheduler"]
+)
 
 
 @app.get("/health")
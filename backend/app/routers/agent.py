@@ -7,6 +7,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.anomalies import list_anomalies
+from ..services.baselines import BASELINE_METRICS, baseline_summary
+from ..services.events import publish_change
 from ..services.suggestions import generate_daily_suggestion
 
 router = APIRouter()
@@ -19,6 +22,8 @@ class AgentQueryType(str, Enum):
     food_summary = "food_summary"
     sleep_summary = "sleep_summary"
     metric_trend = "metric_trend"
+    baselines = "baselines"
+    anomalies = "anomalies"
 
 
 class AgentFoodLogCreate(BaseModel):
@@ -114,6 +119,7 @@ def log_food(
         ),
     )
     conn.commit()
+    publish_change("agent.log_food", tables=["food_entries"], dates=[recorded])
     row = conn.execute(
         "SELECT * FROM food_entries WHERE id=?",
         (cur.lastrowid,),
@@ -152,6 +158,7 @@ def log_workout(
         ),
     )
     conn.commit()
+    publish_change("agent.log_workout", tables=["exercise_sessions"], dates=[recorded])
     row = conn.execute(
         "SELECT * FROM exercise_sessions WHERE id=?",
         (cur.lastrowid,),
@@ -358,4 +365,24 @@ def query(
             "values": [row_to_dict(row) for row in rows],
         }
 
+    if query_type == AgentQueryType.baselines:
+        metrics = [metric] if metric else list(BASELINE_METRICS)
+        if metric and metric not in BASELINE_METRICS:
+            raise HTTPException(
+                status_code=422, detail=f"No baseline for metric: {metric}"
+            )
+        return {
+            "date": str(target),
+            "baselines": baseline_summary(conn, target, metrics),
+        }
+
+    if query_type == AgentQueryType.anomalies:
+        return {
+            "ending": str(target),
+            "days": days,
+            "anomalies": list_anomalies(
+                conn, start=target - timedelta(days=days - 1), end=target
+            ),
+        }
+
     raise HTTPException(status_code=400, detail="Unsupported query type")
@@ -0,0 +1,64 @@
+import sqlite3
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..db import get_db_dependency
+from ..services.aggregates import (
+    FIELDS,
+    MAX_COMPARISONS,
+    AggregateGranularity,
+    AggregateRequestError,
+    Period,
+    aggregate,
+    comparison_period,
+    parse_fields,
+)
+from ..services.timeseries import SeriesRangeError
+
+router = APIRouter()
+
+
+@router.get("/")
+def get_aggregate(
+    fields: str = Query(min_length=1, max_length=1000),
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    granularity: AggregateGranularity = "week",
+    compare: list[str] = Query(default=[]),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    end_date = date_to or date.today()
+    start_date = date_from or end_date - timedelta(days=27)
+    if start_date > end_date:
+        raise HTTPException(status_code=422, detail="from must be on or before to")
+    if len(compare) > MAX_COMPARISONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_COMPARISONS} comparison periods",
+        )
+
+    current = Period("current", start_date, end_date)
+    try:
+        requests = parse_fields(
+            [part.strip() for part in fields.split(",") if part.strip()]
+        )
+        comparisons = [comparison_period(spec, current) for spec in compare]
+        return aggregate(
+            conn,
+            fields=requests,
+            current=current,
+            comparisons=comparisons,
+            granularity=granularity,
+        )
+    except (AggregateRequestError, SeriesRangeError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/fields")
+def get_aggregate_fields():
+    return [
+        {"name": field.name, "source": field.source, "reducer": field.reducer}
+        for field in FIELDS.values()
+    ]
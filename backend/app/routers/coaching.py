@@ -2,13 +2,19 @@ import sqlite3
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from ..db import get_db_dependency
+from ..services.events import publish_change
+from ..services.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from ..services.date_ranges import BackfillRangeError, backfill_days
 from ..services.coaching import (
+    DigestType,
+    backfill_digests,
     generate_daily_digest,
     generate_weekly_digest,
     get_latest_digests,
+    list_digests,
 )
 
 router = APIRouter()
@@ -20,7 +26,9 @@ def generate_daily(
     conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
     target = target_date or date.today()
-    return generate_daily_digest(conn, target=target)
+    digest = generate_daily_digest(conn, target=target)
+    publish_change("coaching.daily_digest", tables=["coaching_digests"], dates=[target])
+    return digest
 
 
 @router.post("/digests/generate-weekly")
@@ -29,7 +37,40 @@ def generate_weekly(
     conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
     end = ending or date.today()
-    return generate_weekly_digest(conn, ending=end)
+    digest = generate_weekly_digest(conn, ending=end)
+    publish_change("coaching.weekly_digest", tables=["coaching_digests"], dates=[end])
+    return digest
+
+
+@router.post("/digests/backfill")
+def backfill(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    types: str = "daily,weekly",
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    digest_types: list[DigestType] = []
+    for part in types.split(","):
+        if part.strip() not in ("daily", "weekly"):
+            raise HTTPException(
+                status_code=422, detail=f"Unknown digest type: {part.strip()}"
+            )
+        digest_types.append(part.strip())
+    try:
+        result = backfill_digests(
+            conn,
+            start=date_from,
+            end=date_to,
+            digest_types=tuple(dict.fromkeys(digest_types)),
+        )
+    except BackfillRangeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    publish_change(
+        "coaching.backfill",
+        tables=["coaching_digests"],
+        dates=backfill_days(date_from, date_to),
+    )
+    return result
 
 
 @router.get("/digests/latest")
@@ -37,3 +78,29 @@ def latest(
     conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
     return get_latest_digests(conn)
+
+
+@router.get("/digests")
+def digest_history(
+    response: Response,
+    digest_type: DigestType = Query(default="daily", alias="type"),
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=30, ge=1, le=366),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    try:
+        page = list_digests(
+            conn,
+            digest_type=digest_type,
+            start=date_from,
+            end=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
@@ -0,0 +1,42 @@
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from ..services.events import Subscription, broker, format_sse
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15.0
+
+
+async def _stream(request: Request, subscription: Subscription):
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), timeout=HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield format_sse(event)
+    finally:
+        subscription.close()
+
+
+@router.get("/")
+async def stream_events(request: Request):
+    # Async endpoint with no DB dependency: idle listeners cost one queue each,
+    # not a threadpool worker or SQLite connection.
+    subscription = broker.subscribe()
+    return StreamingResponse(
+        _stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
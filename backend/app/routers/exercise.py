@@ -2,10 +2,18 @@ import sqlite3
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.bulk_writes import (
+    BulkRequest,
+    BulkWriteError,
+    bulk_insert,
+    validate_items,
+)
+from ..services.events import publish_change
+from ..services.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, keyset_page
 
 router = APIRouter()
 
@@ -30,8 +38,7 @@ class ExerciseSetCreate(BaseModel):
     notes: Optional[str] = None
 
 
-EXERCISE_SESSION_SELECT = """SELECT
-                               id,
+EXERCISE_SESSION_COLUMNS = """id,
                                recorded_date,
                                session_type,
                                name,
@@ -42,7 +49,10 @@ EXERCISE_SESSION_SELECT = """SELECT
                                source,
                                notes,
                                created_at,
-                               deleted_at
+                               deleted_at"""
+
+EXERCISE_SESSION_SELECT = f"""SELECT
+                               {EXERCISE_SESSION_COLUMNS}
                              FROM exercise_sessions"""
 
 
@@ -77,6 +87,9 @@ def create_exercise_session(
         ),
     )
     conn.commit()
+    publish_change(
+        "exercise.create", tables=["exercise_sessions"], dates=[entry.recorded_date]
+    )
     row = conn.execute(
         f"{EXERCISE_SESSION_SELECT} WHERE id=?",
         (cur.lastrowid,),
@@ -86,16 +99,15 @@ def create_exercise_session(
 
 @router.get("/sessions")
 def get_exercise_sessions(
-    date: Optional[date] = None, conn: sqlite3.Connection = Depends(get_db_dependency)
+    response: Response,
+    date: Optional[date] = None,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
-    if date is None:
-        rows = conn.execute(
-            f"""{EXERCISE_SESSION_SELECT}
-                WHERE deleted_at IS NULL
-                ORDER BY recorded_date DESC, created_at DESC
-                LIMIT 100"""
-        ).fetchall()
-    else:
+    if date is not None:
         rows = conn.execute(
             f"""{EXERCISE_SESSION_SELECT}
                 WHERE recorded_date = ?
@@ -103,8 +115,25 @@ def get_exercise_sessions(
                 ORDER BY created_at""",
             (str(date),),
         ).fetchall()
-
-    return [row_to_dict(row) for row in rows]
+        return [row_to_dict(row) for row in rows]
+
+    try:
+        page = keyset_page(
+            conn,
+            table="exercise_sessions",
+            columns=EXERCISE_SESSION_COLUMNS,
+            sort_key="recorded_date",
+            where=["deleted_at IS NULL"],
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
 
 
 @router.post("/sessions/{session_id}/sets", status_code=201)
@@ -151,6 +180,57 @@ def create_exercise_set(
     return row_to_dict(row)
 
 
+@router.post("/sessions/{session_id}/sets/bulk", status_code=201)
+def create_exercise_sets_bulk(
+    session_id: int,
+    request: BulkRequest,
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    session = conn.execute(
+        """SELECT id
+           FROM exercise_sessions
+           WHERE id = ?
+             AND deleted_at IS NULL""",
+        (session_id,),
+    ).fetchone()
+    if session is None:
+        raise HTTPException(status_code=404, detail="Exercise session not found")
+
+    entries, validation_errors = validate_items(ExerciseSetCreate, request.items)
+    try:
+        result = bulk_insert(
+            conn,
+            table="exercise_sets",
+            columns=(
+                "session_id",
+                "exercise_name",
+                "set_number",
+                "weight_lbs",
+                "reps",
+                "notes",
+            ),
+            rows=[
+                (
+                    index,
+                    (
+                        session_id,
+                        entry.exercise_name,
+                        entry.set_number,
+                        entry.weight_lbs,
+                        entry.reps,
+                        entry.notes,
+                    ),
+                )
+                for index, entry in entries
+            ],
+            mode=request.mode,
+            validation_errors=validation_errors,
+        )
+    except BulkWriteError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+    return result.payload(request.mode)
+
+
 @router.get("/sessions/{session_id}/sets")
 def get_exercise_sets(
     session_id: int, conn: sqlite3.Connection = Depends(get_db_dependency)
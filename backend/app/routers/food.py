@@ -1,14 +1,60 @@
+import asyncio
 import sqlite3
+import copy
 import json
 import os
+from collections.abc import AsyncIterator
 from datetime import date
-from typing import Any, Optional
-
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated, Any, Optional
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, ConfigDict, Field
-import httpx
 
-from ..db import get_db_dependency, row_to_dict
+from ..db import get_db, get_db_dependency, row_to_dict
+from ..services.asof import targets_on
+from ..services.bulk_writes import (
+    BulkRequest,
+    BulkWriteError,
+    bulk_insert,
+    model_rows,
+    validate_items,
+)
+from ..services.events import publish_change
+from ..services.food_catalog import get_catalog_item, scaled_macros, search_catalog
+from ..services.nutrition import estimate_description
+from ..services.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, keyset_page
+from ..services.photo_store import (
+    DIGEST_PATTERN,
+    InvalidPhotoError,
+    ensure_variant,
+    max_upload_bytes,
+    media_type,
+    model_data_url,
+    original_path,
+    photo_url,
+    photo_workers,
+    store_original,
+)
+from ..services.vision_cache import (
+    cache_max_entries,
+    cache_ttl_seconds,
+    estimate_cache_key,
+    get_cached_estimate,
+    store_estimate,
+    vision_coalescer,
+)
+from ..services.vision_client import vision_client
 
 router = APIRouter()
 
@@ -53,6 +99,49 @@ class FoodEntryCreate(BaseModel):
     notes: Optional[str] = None
 
 
+FOOD_ENTRY_COLUMNS = (
+    "recorded_date",
+    "meal_type",
+    "name",
+    "calories",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "fiber_g",
+    "sodium_mg",
+    "alcohol_g",
+    "alcohol_calories",
+    "alcohol_type",
+    "photo_url",
+    "servings",
+    "is_estimated",
+    "source",
+    "notes",
+)
+
+
+def _food_entry_row(entry: FoodEntryCreate) -> tuple:
+    return (
+        str(entry.recorded_date),
+        entry.meal_type,
+        entry.name,
+        entry.calories,
+        entry.protein_g,
+        entry.carbs_g,
+        entry.fat_g,
+        entry.fiber_g,
+        entry.sodium_mg,
+        entry.alcohol_g,
+        entry.alcohol_calories,
+        entry.alcohol_type,
+        entry.photo_url,
+        entry.servings,
+        int(entry.is_estimated),
+        entry.source,
+        entry.notes,
+    )
+
+
 class FoodEntryUpdate(BaseModel):
     meal_type: Optional[str] = None
     name: Optional[str] = None
@@ -103,76 +192,62 @@ class PhotoFoodEstimateCreate(BaseModel):
     model: Optional[str] = None
 
 
-def _estimate_from_description(description: str, servings: float) -> dict:
-    text = description.lower()
-    base = {
-        "name": description,
-        "calories": 450.0,
-        "protein_g": 28.0,
-        "carbs_g": 35.0,
-        "fat_g": 18.0,
-        "fiber_g": 5.0,
-        "sodium_mg": 700.0,
-        "alcohol_g": 0.0,
-        "alcohol_calories": 0.0,
-        "alcohol_type": None,
-    }
+MAX_PHOTO_BATCH_ITEMS = 25
 
-    if "shake" in text or "protein" in text:
-        base.update(
-            {
-                "calories": 260.0,
-                "protein_g": 35.0,
-                "carbs_g": 12.0,
-                "fat_g": 6.0,
-                "fiber_g": 2.0,
-                "sodium_mg": 220.0,
-            }
-        )
-    elif "salad" in text:
-        base.update(
-            {
-                "calories": 320.0,
-                "protein_g": 18.0,
-                "carbs_g": 20.0,
-                "fat_g": 16.0,
-                "fiber_g": 7.0,
-                "sodium_mg": 460.0,
-            }
-        )
-    elif "beer" in text:
-        base.update(
-            {
-                "calories": 150.0,
-                "protein_g": 1.5,
-                "carbs_g": 13.0,
-                "fat_g": 0.0,
-                "fiber_g": 0.0,
-                "sodium_mg": 15.0,
-                "alcohol_g": 14.0,
-                "alcohol_calories": 98.0,
-                "alcohol_type": "beer",
-            }
-        )
-    elif "wine" in text:
-        base.update(
-            {
-                "calories": 125.0,
-                "protein_g": 0.2,
-                "carbs_g": 4.0,
-                "fat_g": 0.0,
-                "fiber_g": 0.0,
-                "sodium_mg": 10.0,
-                "alcohol_g": 14.0,
-                "alcohol_calories": 98.0,
-                "alcohol_type": "wine",
-            }
-        )
+
+class FoodFromCatalogCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+    recorded_date: date
+    meal_type: Optional[str] = None
+    servings: Optional[float] = Field(default=None, gt=0, le=20)
+    source: str = "manual"
+    notes: Optional[str] = None
+
+
+class FoodCatalogUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+    is_favorite: bool
+
+
+GENERIC_MEAL_ESTIMATE = {
+    "calories": 450.0,
+    "protein_g": 28.0,
+    "carbs_g": 35.0,
+    "fat_g": 18.0,
+    "fiber_g": 5.0,
+    "sodium_mg": 700.0,
+    "alcohol_g": 0.0,
+    "alcohol_calories": 0.0,
+    "alcohol_type": None,
+}
+
+
+def _local_match_min_confidence() -> float:
+    return float(os.getenv("FOOD_LOCAL_MATCH_MIN_CONFIDENCE", 0.75))
+
+
+def _estimate_from_description(description: str, servings: float) -> dict:
+    local = estimate_description(description)
+    if local.items:
+        return {
+            "estimate": {"name": description, **local.totals(servings)},
+            "method": "local",
+            "confidence": local.confidence,
+            "items": local.describe_items(),
+        }
 
     factor = float(servings)
-    return {
+    estimate = {
         key: round(value * factor, 2) if isinstance(value, float) else value
-        for key, value in base.items()
+        for key, value in GENERIC_MEAL_ESTIMATE.items()
+    }
+    return {
+        "estimate": {"name": description, **estimate},
+        "method": "heuristic",
+        "confidence": 0.25,
+        "items": [],
     }
 
 
@@ -190,7 +265,11 @@ def _extract_json_object(text: str) -> Optional[dict[str, Any]]:
     return parsed
 
 
-def _estimate_from_vision(
+def _vision_model_name(model: Optional[str]) -> str:
+    return model or os.getenv("FOOD_VISION_MODEL", "gpt-4.1-mini")
+
+
+async def _estimate_from_vision(
     *, description: str, photo_url: str, servings: float, model: Optional[str]
 ) -> Optional[dict[str, Any]]:
     api_key = os.getenv("OPENAI_API_KEY")
@@ -198,7 +277,9 @@ def _estimate_from_vision(
         return None
 
     base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
-    model_name = model or os.getenv("FOOD_VISION_MODEL", "gpt-4.1-mini")
+    model_name = _vision_model_name(model)
+    # Stored uploads go upstream as the downscaled model variant, not the original.
+    image_url = await model_data_url(photo_url) or photo_url
     prompt = (
         "Estimate nutrition from this meal photo and short description. "
         "Return strict JSON only with keys: name, calories, protein_g, carbs_g, fat_g, "
@@ -213,7 +294,7 @@ def _estimate_from_vision(
                 "role": "user",
                 "content": [
                     {"type": "text", "text": f"{prompt}\nDescription: {description}"},
-                    {"type": "image_url", "image_url": {"url": photo_url}},
+                    {"type": "image_url", "image_url": {"url": image_url}},
                 ],
             }
         ],
@@ -221,18 +302,18 @@ def _estimate_from_vision(
         "max_tokens": 400,
     }
 
+    payload = await vision_client.post_json(
+        f"{base_url}/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        body=body,
+    )
+    if payload is None:
+        return None
+
     try:
-        response = httpx.post(
-            f"{base_url}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json=body,
-            timeout=25.0,
-        )
-        response.raise_for_status()
-        payload = response.json()
         content = payload["choices"][0]["message"]["content"]
         parsed = _extract_json_object(content)
         if not parsed:
@@ -262,33 +343,84 @@ def _estimate_from_vision(
             "method": "vision",
             "confidence": round(confidence, 2),
         }
-    except (httpx.HTTPError, KeyError, TypeError, ValueError):
+    except (KeyError, IndexError, TypeError, ValueError):
         return None
 
 
-def _resolve_photo_estimate(
+async def _cached_vision_estimate(
+    conn: sqlite3.Connection,
     *,
     description: str,
     photo_url: str,
     servings: float,
-    use_vision: bool,
     model: Optional[str],
-) -> dict[str, Any]:
-    if use_vision:
-        vision = _estimate_from_vision(
+) -> Optional[dict[str, Any]]:
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+
+    model_name = _vision_model_name(model)
+    cache_key = estimate_cache_key(
+        photo_url=photo_url,
+        description=description,
+        servings=servings,
+        model=model_name,
+    )
+    ttl_seconds = cache_ttl_seconds()
+    cached = await run_in_threadpool(
+        get_cached_estimate, conn, cache_key, ttl_seconds=ttl_seconds
+    )
+    if cached:
+        return {**cached, "method": "vision_cached"}
+
+    vision, leader = await vision_coalescer.run(
+        cache_key,
+        lambda: _estimate_from_vision(
             description=description,
             photo_url=photo_url,
             servings=servings,
-            model=model,
-        )
-        if vision:
-            return vision
+            model=model_name,
+        ),
+    )
+    if not vision:
+        return None
+    if not leader:
+        return {**copy.deepcopy(vision), "method": "vision_coalesced"}
+
+    await run_in_threadpool(
+        store_estimate,
+        conn,
+        cache_key,
+        model=model_name,
+        analysis=vision,
+        ttl_seconds=ttl_seconds,
+        max_entries=cache_max_entries(),
+    )
+    return copy.deepcopy(vision)
 
-    return {
-        "estimate": _estimate_from_description(description, servings),
-        "method": "heuristic",
-        "confidence": 0.45,
-    }
+
+async def _resolve_photo_estimate(
+    conn: sqlite3.Connection,
+    *,
+    description: str,
+    photo_url: str,
+    servings: float,
+    use_vision: bool,
+    model: Optional[str],
+) -> dict[str, Any]:
+    # The local table answers in microseconds; only descriptions it can't
+    # explain well are worth a vision call.
+    local = _estimate_from_description(description, servings)
+    if not use_vision or local["confidence"] >= _local_match_min_confidence():
+        return local
+
+    vision = await _cached_vision_estimate(
+        conn,
+        description=description,
+        photo_url=photo_url,
+        servings=servings,
+        model=model,
+    )
+    return vision or local
 
 
 def _apply_photo_overrides(
@@ -321,27 +453,10 @@ def create_food_entry(
             fiber_g, sodium_mg, alcohol_g, alcohol_calories, alcohol_type,
             photo_url, servings, is_estimated, source, notes)
            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-        (
-            str(entry.recorded_date),
-            entry.meal_type,
-            entry.name,
-            entry.calories,
-            entry.protein_g,
-            entry.carbs_g,
-            entry.fat_g,
-            entry.fiber_g,
-            entry.sodium_mg,
-            entry.alcohol_g,
-            entry.alcohol_calories,
-            entry.alcohol_type,
-            entry.photo_url,
-            entry.servings,
-            int(entry.is_estimated),
-            entry.source,
-            entry.notes,
-        ),
+        _food_entry_row(entry),
     )
     conn.commit()
+    publish_change("food.create", tables=["food_entries"], dates=[entry.recorded_date])
     row = conn.execute(
         "SELECT * FROM food_entries WHERE id=?",
         (cur.lastrowid,),
@@ -349,24 +464,37 @@ def create_food_entry(
     return row_to_dict(row)
 
 
-@router.post("/from-photo", status_code=201)
-def create_photo_food_entry(
-    entry: PhotoFoodCreate, conn: sqlite3.Connection = Depends(get_db_dependency)
+@router.post("/bulk", status_code=201)
+def create_food_entries_bulk(
+    request: BulkRequest, conn: sqlite3.Connection = Depends(get_db_dependency)
 ):
-    analysis = _resolve_photo_estimate(
-        description=entry.description,
-        photo_url=entry.photo_url,
-        servings=entry.servings,
-        use_vision=entry.use_vision,
-        model=entry.model,
-    )
-    estimated = _apply_photo_overrides(analysis["estimate"], entry)
-    notes = (
-        f"Estimated from photo input ({analysis['method']}, confidence={analysis['confidence']}). "
-        f"Description: {entry.description}. "
-        "Review and patch if needed."
-    )
+    entries, validation_errors = validate_items(FoodEntryCreate, request.items)
+    try:
+        result = bulk_insert(
+            conn,
+            table="food_entries",
+            columns=FOOD_ENTRY_COLUMNS,
+            rows=model_rows(entries, _food_entry_row),
+            mode=request.mode,
+            validation_errors=validation_errors,
+        )
+    except BulkWriteError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+    if result.created:
+        publish_change(
+            "food.bulk",
+            tables=["food_entries"],
+            dates=[row["recorded_date"] for row in result.created],
+        )
+    return result.payload(request.mode)
+
 
+def _insert_photo_food_entry(
+    conn: sqlite3.Connection,
+    entry: PhotoFoodCreate,
+    estimated: dict[str, Any],
+    notes: str,
+) -> dict:
     cur = conn.execute(
         """INSERT INTO food_entries
            (recorded_date, meal_type, name, calories, protein_g, carbs_g, fat_g,
@@ -394,19 +522,53 @@ def create_photo_food_entry(
         ),
     )
     conn.commit()
+    publish_change(
+        "food.from_photo", tables=["food_entries"], dates=[entry.recorded_date]
+    )
     row = conn.execute(
         "SELECT * FROM food_entries WHERE id=?",
         (cur.lastrowid,),
     ).fetchone()
-    payload = row_to_dict(row)
+    return row_to_dict(row)
+
+
+# The photo endpoints are async so slow vision calls wait on the event loop
+# instead of pinning threadpool workers; DB work is handed to the pool briefly.
+@router.post("/from-photo", status_code=201)
+async def create_photo_food_entry(
+    entry: PhotoFoodCreate, conn: sqlite3.Connection = Depends(get_db_dependency)
+):
+    analysis = await _resolve_photo_estimate(
+        conn,
+        description=entry.description,
+        photo_url=entry.photo_url,
+        servings=entry.servings,
+        use_vision=entry.use_vision,
+        model=entry.model,
+    )
+    estimated = _apply_photo_overrides(analysis["estimate"], entry)
+    notes = (
+        f"Estimated from photo input ({analysis['method']}, confidence={analysis['confidence']}). "
+        f"Description: {entry.description}. "
+        "Review and patch if needed."
+    )
+
+    payload = await run_in_threadpool(
+        _insert_photo_food_entry, conn, entry, estimated, notes
+    )
     payload["analysis_method"] = analysis["method"]
     payload["analysis_confidence"] = analysis["confidence"]
+    payload["analysis_items"] = analysis.get("items", [])
     return payload
 
 
 @router.post("/photo-estimate")
-def estimate_photo_food(entry: PhotoFoodEstimateCreate):
-    analysis = _resolve_photo_estimate(
+async def estimate_photo_food(
+    entry: PhotoFoodEstimateCreate,
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    analysis = await _resolve_photo_estimate(
+        conn,
         description=entry.description,
         photo_url=entry.photo_url,
         servings=entry.servings,
@@ -417,12 +579,207 @@ def estimate_photo_food(entry: PhotoFoodEstimateCreate):
         "estimate": analysis["estimate"],
         "analysis_method": analysis["method"],
         "analysis_confidence": analysis["confidence"],
+        "analysis_items": analysis.get("items", []),
+    }
+
+
+async def _estimate_batch_item(
+    index: int, item: PhotoFoodEstimateCreate
+) -> dict[str, Any]:
+    # Each item gets its own connection so cache reads and writes from sibling
+    # items never interleave inside one SQLite transaction.
+    conn = await run_in_threadpool(get_db)
+    try:
+        analysis = await _resolve_photo_estimate(
+            conn,
+            description=item.description,
+            photo_url=item.photo_url,
+            servings=item.servings,
+            use_vision=item.use_vision,
+            model=item.model,
+        )
+    finally:
+        await run_in_threadpool(conn.close)
+    return {
+        "index": index,
+        "estimate": analysis["estimate"],
+        "analysis_method": analysis["method"],
+        "analysis_confidence": analysis["confidence"],
+        "analysis_items": analysis.get("items", []),
+    }
+
+
+async def _stream_batch_estimates(
+    items: list[PhotoFoodEstimateCreate],
+) -> AsyncIterator[str]:
+    tasks = {
+        asyncio.ensure_future(_estimate_batch_item(index, item)): index
+        for index, item in enumerate(items)
+    }
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=tasks.__getitem__):
+                try:
+                    result = task.result()
+                except (Exception, asyncio.CancelledError):
+                    # A cancelled item (e.g. a shared upstream call was
+                    # abandoned) fails alone; the rest of the batch streams on.
+                    result = {"index": tasks[task], "error": "Estimate failed"}
+                yield json.dumps(result, separators=(",", ":")) + "\n"
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+@router.post("/photo-estimate/batch")
+async def estimate_photo_food_batch(
+    items: Annotated[
+        list[PhotoFoodEstimateCreate],
+        Body(min_length=1, max_length=MAX_PHOTO_BATCH_ITEMS),
+    ],
+):
+    # Items fan out together; upstream concurrency is capped globally by the
+    # shared vision client, and identical items coalesce onto one call. Lines
+    # are emitted in completion order, tagged with the item's request index.
+    return StreamingResponse(
+        _stream_batch_estimates(items),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/photos", status_code=201)
+async def upload_food_photo(photo: UploadFile = File(...)):
+    limit = max_upload_bytes()
+    raw = await photo.read(limit + 1)
+    if not raw:
+        raise HTTPException(status_code=400, detail="Empty photo upload")
+    if len(raw) > limit:
+        raise HTTPException(status_code=413, detail="Photo exceeds upload limit")
+
+    digest = await run_in_threadpool(store_original, raw)
+    try:
+        info = await photo_workers.render(digest)
+    except InvalidPhotoError:
+        await run_in_threadpool(original_path(digest).unlink, missing_ok=True)
+        raise HTTPException(status_code=400, detail="Upload is not a readable image")
+
+    url = photo_url(digest)
+    return {
+        "id": digest,
+        "photo_url": url,
+        "thumbnail_url": f"{url}?variant=thumb",
+        **info,
     }
 
 
+@router.get("/photos/{digest}")
+async def get_food_photo(digest: str, variant: str = "original"):
+    if not DIGEST_PATTERN.match(digest):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    if variant not in ("original", "thumb", "model"):
+        raise HTTPException(status_code=400, detail="Unknown photo variant")
+    try:
+        path = await ensure_variant(digest, variant)
+    except InvalidPhotoError:
+        path = None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    # Content-addressed, so every variant is immutable.
+    return FileResponse(
+        path,
+        media_type=await run_in_threadpool(media_type, path),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+@router.get("/catalog")
+def get_food_catalog(
+    q: Optional[str] = None,
+    favorites: bool = False,
+    limit: int = Query(default=20, ge=1, le=100),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    return search_catalog(conn, query=q, limit=limit, favorites_only=favorites)
+
+
+@router.patch("/catalog/{catalog_id}")
+def update_food_catalog_item(
+    catalog_id: int,
+    update: FoodCatalogUpdate,
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    if get_catalog_item(conn, catalog_id) is None:
+        raise HTTPException(status_code=404, detail="Catalog item not found")
+    conn.execute(
+        "UPDATE food_catalog SET is_favorite=?, updated_at=datetime('now') WHERE id=?",
+        (int(update.is_favorite), catalog_id),
+    )
+    conn.commit()
+    return get_catalog_item(conn, catalog_id)
+
+
+@router.post("/from-catalog/{catalog_id}", status_code=201)
+def create_food_entry_from_catalog(
+    catalog_id: int,
+    entry: FoodFromCatalogCreate,
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    item = get_catalog_item(conn, catalog_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Catalog item not found")
+
+    servings = entry.servings if entry.servings is not None else item["servings"]
+    macros = scaled_macros(item, servings)
+    cur = conn.execute(
+        """INSERT INTO food_entries
+           (recorded_date, meal_type, name, calories, protein_g, carbs_g, fat_g,
+            fiber_g, sodium_mg, alcohol_g, alcohol_calories, alcohol_type,
+            servings, source, notes)
+           VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+        (
+            str(entry.recorded_date),
+            entry.meal_type or item["meal_type"],
+            item["name"],
+            macros["calories"],
+            macros["protein_g"],
+            macros["carbs_g"],
+            macros["fat_g"],
+            macros["fiber_g"],
+            macros["sodium_mg"],
+            macros["alcohol_g"],
+            macros["alcohol_calories"],
+            item["alcohol_type"],
+            servings,
+            entry.source,
+            entry.notes,
+        ),
+    )
+    conn.commit()
+    publish_change(
+        "food.from_catalog", tables=["food_entries"], dates=[entry.recorded_date]
+    )
+    row = conn.execute(
+        "SELECT * FROM food_entries WHERE id=?",
+        (cur.lastrowid,),
+    ).fetchone()
+    return row_to_dict(row)
+
+
 @router.get("/")
 def get_food_entries(
-    date: Optional[str] = None, conn: sqlite3.Connection = Depends(get_db_dependency)
+    response: Response,
+    date: Optional[str] = None,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
     if date:
         rows = conn.execute(
@@ -433,15 +790,24 @@ def get_food_entries(
                ORDER BY created_at""",
             (date,),
         ).fetchall()
-    else:
-        rows = conn.execute(
-            """SELECT *
-               FROM food_entries
-               WHERE deleted_at IS NULL
-               ORDER BY recorded_date DESC, created_at DESC
-               LIMIT 100"""
-        ).fetchall()
-    return [row_to_dict(r) for r in rows]
+        return [row_to_dict(r) for r in rows]
+
+    try:
+        page = keyset_page(
+            conn,
+            table="food_entries",
+            sort_key="recorded_date",
+            where=["deleted_at IS NULL"],
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
 
 
 @router.get("/summary")
@@ -461,15 +827,7 @@ def get_daily_summary(date: str, conn: sqlite3.Connection = Depends(get_db_depen
         (date,),
     ).fetchone()
 
-    targets = conn.execute(
-        """SELECT t1.metric, t1.value FROM targets t1
-           WHERE t1.effective_date = (
-               SELECT MAX(t2.effective_date) FROM targets t2
-               WHERE t2.metric = t1.metric AND t2.effective_date <= ?
-           )""",
-        (date,),
-    ).fetchall()
-    target_map = {r["metric"]: r["value"] for r in targets}
+    target_map = targets_on(conn, date)
 
     result = dict(totals)
     result["date"] = date
@@ -534,6 +892,7 @@ def update_food_entry(
     values = list(safe_fields.values()) + [entry_id]
     conn.execute(f"UPDATE food_entries SET {set_clause} WHERE id=?", values)
     conn.commit()
+    publish_change("food.update", tables=["food_entries"], dates=[row["recorded_date"]])
     row = conn.execute(
         "SELECT * FROM food_entries WHERE id=?",
         (entry_id,),
@@ -546,7 +905,8 @@ def delete_food_entry(
     entry_id: int, conn: sqlite3.Connection = Depends(get_db_dependency)
 ):
     row = conn.execute(
-        "SELECT id FROM food_entries WHERE id=? AND deleted_at IS NULL", (entry_id,)
+        "SELECT id, recorded_date FROM food_entries WHERE id=? AND deleted_at IS NULL",
+        (entry_id,),
     ).fetchone()
     if not row:
         raise HTTPException(status_code=404, detail="Entry not found")
@@ -554,3 +914,4 @@ def delete_food_entry(
         "UPDATE food_entries SET deleted_at=datetime('now') WHERE id=?", (entry_id,)
     )
     conn.commit()
+    publish_change("food.delete", tables=["food_entries"], dates=[row["recorded_date"]])
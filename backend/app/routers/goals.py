@@ -2,10 +2,18 @@ import sqlite3
 from datetime import date
 from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.goals import current_value, goal_progress
+from ..services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    date_range_clauses,
+    keyset_page,
+)
 
 router = APIRouter()
 
@@ -102,31 +110,50 @@ def _build_plan(goal: dict, baseline_value: Optional[float]) -> str:
     )
 
 
-def _latest_metric_value(conn: sqlite3.Connection, metric: str) -> Optional[float]:
-    row = conn.execute(
-        """SELECT value
-           FROM body_metrics
-           WHERE metric=?
-           ORDER BY recorded_date DESC, id DESC
-           LIMIT 1""",
-        (metric,),
-    ).fetchone()
-    return row["value"] if row else None
-
-
 @router.get("/")
 def get_goals(
-    active_only: bool = True, conn: sqlite3.Connection = Depends(get_db_dependency)
+    response: Response,
+    active_only: bool = True,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
-    if active_only:
-        rows = conn.execute(
-            "SELECT * FROM goals WHERE active=1 ORDER BY created_at DESC"
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            "SELECT * FROM goals ORDER BY active DESC, created_at DESC"
-        ).fetchall()
-    return [row_to_dict(row) for row in rows]
+    clauses, params = (["active = 1"] if active_only else []), []
+    if limit is None and cursor is None:
+        range_clauses, range_params = date_range_clauses(
+            "start_date", date_from, date_to
+        )
+        query = "SELECT * FROM goals"
+        if clauses or range_clauses:
+            query += " WHERE " + " AND ".join([*clauses, *range_clauses])
+        query += " ORDER BY active DESC, created_at DESC"
+        rows = conn.execute(query, [*params, *range_params]).fetchall()
+        return [row_to_dict(row) for row in rows]
+
+    try:
+        page = keyset_page(
+            conn,
+            table="goals",
+            sort_key="start_date",
+            where=clauses,
+            params=params,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit or DEFAULT_PAGE_SIZE,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
+
+
+@router.get("/progress")
+def get_goal_progress(conn: sqlite3.Connection = Depends(get_db_dependency)):
+    return goal_progress(conn)
 
 
 @router.post("/", status_code=201)
@@ -259,7 +286,7 @@ def generate_goal_plan(
         raise HTTPException(status_code=404, detail="Goal not found")
     goal = row_to_dict(goal_row)
 
-    baseline = _latest_metric_value(conn, goal["metric"])
+    baseline = current_value(conn, goal)
     plan_text = _build_plan(goal, baseline)
     row = conn.execute(
         "SELECT COALESCE(MAX(version), 0) AS max_version FROM goal_plans WHERE goal_id=?",
@@ -1,4 +1,6 @@
+import logging
 import sqlite3
+from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -7,15 +9,37 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
 from ..db import get_db_dependency
+from ..services.anomalies import run_detectors
+from ..services.events import publish_change
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 class IngestResponse(BaseModel):
     status: str
     processed: dict[str, int]
 
 
+def _announce_ingest(
+    conn: sqlite3.Connection,
+    source: str,
+    *,
+    tables: Iterable[str],
+    dates: Iterable[str],
+) -> None:
+    # The write is already committed: a detector failure must not turn it into
+    # a 500 or keep subscribers and the derived-data pipeline from hearing of it.
+    tables, dates = set(tables), set(dates)
+    try:
+        run_detectors(conn, tables=tables, dates=dates)
+    except Exception:
+        conn.rollback()
+        logger.exception("Anomaly detection after %s failed", source)
+    publish_change(source, tables=tables, dates=dates)
+
+
 def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
@@ -165,6 +189,8 @@ def ingest_apple_health(
     processed_metrics = 0
     processed_workouts = 0
     skipped = 0
+    touched_tables: set[str] = set()
+    touched_dates: set[str] = set()
 
     for metric in metrics:
         metric_name = metric.get("name")
@@ -190,6 +216,8 @@ def ingest_apple_health(
                        VALUES (?, ?, 'apple_health')""",
                     (recorded_date, int(round(float(qty) * 60))),
                 )
+                touched_tables.add("sleep_records")
+                touched_dates.add(recorded_date)
                 processed_metrics += 1
             continue
 
@@ -221,6 +249,8 @@ def ingest_apple_health(
                        VALUES (?, ?, ?, 'apple_health')""",
                     (recorded_date, target_metric, float(qty)),
                 )
+            touched_tables.add("body_metrics")
+            touched_dates.add(recorded_date)
             processed_metrics += 1
 
     for workout in workouts:
@@ -380,9 +410,15 @@ def ingest_apple_health(
                     ),
                 )
 
+        touched_tables.update(("exercise_sessions", "exercise_hr_zones"))
+        touched_dates.add(recorded_date)
         processed_workouts += 1
 
     conn.commit()
+    if touched_dates:
+        _announce_ingest(
+            conn, "ingest.apple_health", tables=touched_tables, dates=touched_dates
+        )
     return {
         "status": "ok",
         "processed": {
@@ -404,6 +440,8 @@ def ingest_oura(payload: dict, conn: sqlite3.Connection = Depends(get_db_depende
     processed_readiness = 0
     processed_activity = 0
     skipped = 0
+    touched_tables: set[str] = set()
+    touched_dates: set[str] = set()
 
     merged_sleep: dict[str, dict] = {}
 
@@ -535,6 +573,8 @@ def ingest_oura(payload: dict, conn: sqlite3.Connection = Depends(get_db_depende
                     values.get("sleep_score"),
                 ),
             )
+        touched_tables.add("sleep_records")
+        touched_dates.add(recorded_date)
 
     for entry in activity_entries:
         recorded_date = extract_date_from_record(entry, "day", "date")
@@ -569,9 +609,15 @@ def ingest_oura(payload: dict, conn: sqlite3.Connection = Depends(get_db_depende
                        VALUES (?, ?, ?, 'oura')""",
                     (recorded_date, metric, float(value)),
                 )
+            touched_tables.add("body_metrics")
+            touched_dates.add(recorded_date)
             processed_activity += 1
 
     conn.commit()
+    if touched_dates:
+        _announce_ingest(
+            conn, "ingest.oura", tables=touched_tables, dates=touched_dates
+        )
     return {
         "status": "ok",
         "processed": {
@@ -641,6 +687,7 @@ def ingest_cpap(conn: sqlite3.Connection = Depends(get_db_dependency)):
         }
 
     dates = sorted(night["recorded_date"] for night in nights)
+    _announce_ingest(conn, "ingest.cpap", tables=["sleep_records"], dates=dates)
     ahi_values = [
         night["cpap_ahi"] for night in nights if night["cpap_ahi"] is not None
     ]
@@ -0,0 +1,52 @@
+import sqlite3
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..db import get_db_dependency
+from ..services.asof import in_effect
+from ..services.correlations import earliest_date, get_correlations
+from ..services.timeseries import SeriesRangeError
+
+router = APIRouter()
+
+
+@router.get("/correlations")
+def get_insight_correlations(
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    max_lag: int = Query(default=2, ge=0, le=7),
+    min_days: int = Query(default=14, ge=4, le=365),
+    top: int = Query(default=20, ge=1, le=200),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    end_date = date_to or date.today()
+    start_date = date_from or earliest_date(conn) or end_date
+    if start_date > end_date:
+        raise HTTPException(status_code=422, detail="from must be on or before to")
+    try:
+        return get_correlations(
+            conn,
+            start=start_date,
+            end=end_date,
+            max_lag=max_lag,
+            min_days=min_days,
+            top=top,
+        )
+    except SeriesRangeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/in-effect")
+def get_in_effect(
+    on: Optional[date] = None,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    start_date = on or date_from or date_to or date.today()
+    end_date = on or date_to or start_date
+    if start_date > end_date:
+        raise HTTPException(status_code=422, detail="from must be on or before to")
+    return in_effect(conn, start_date, end_date)
@@ -1,14 +1,43 @@
+import csv
+import io
 import sqlite3
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.bulk_writes import MAX_BULK_ITEMS, validate_items
+from ..services.labs import (
+    LAB_COLUMNS,
+    marker_trends,
+    normalize_result,
+    refresh_marker_history,
+    upsert_results,
+)
+from ..services.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    keyset_page,
+)
 
 router = APIRouter()
 
+MAX_TREND_MARKERS = 100
+MAX_CSV_BYTES = 1024 * 1024
+CSV_REQUIRED_COLUMNS = ("drawn_date", "panel", "marker", "value", "unit")
+DUPLICATE_RESULT_DETAIL = (
+    "A result for this marker, panel and drawn_date already exists; "
+    "update it or re-import the panel"
+)
+
+
+def _split_list(raw: Optional[str]) -> list[str]:
+    if not raw:
+        return []
+    return list(dict.fromkeys(part.strip() for part in raw.split(",") if part.strip()))
+
 
 class LabResultCreate(BaseModel):
     model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
@@ -24,6 +53,115 @@ class LabResultCreate(BaseModel):
     notes: Optional[str] = None
 
 
+class LabPanelMarker(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+    marker: str = Field(min_length=1, max_length=120)
+    value: float
+    unit: str = Field(min_length=1, max_length=40)
+    reference_low: Optional[float] = None
+    reference_high: Optional[float] = None
+    flag: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class LabPanelCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+    drawn_date: date
+    panel: str = Field(min_length=1, max_length=120)
+    notes: Optional[str] = None
+    markers: list[LabPanelMarker] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class LabPanelImport(BaseModel):
+    panels: list[LabPanelCreate] = Field(min_length=1, max_length=50)
+
+
+def _reference_range_errors(results: list[LabResultCreate]) -> list[str]:
+    return [
+        f"{result.marker}: reference_low cannot be greater than reference_high"
+        for result in results
+        if result.reference_low is not None
+        and result.reference_high is not None
+        and result.reference_low > result.reference_high
+    ]
+
+
+def _normalized_values(entry: LabResultCreate) -> tuple:
+    # Same canonical units and derived flag as panel imports.
+    normalized = normalize_result(entry.model_dump())
+    return tuple(normalized[column] for column in LAB_COLUMNS)
+
+
+def _import_results(conn: sqlite3.Connection, results: list[LabResultCreate]) -> dict:
+    if len(results) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Import at most {MAX_BULK_ITEMS} lab results per request",
+        )
+    errors = _reference_range_errors(results)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return upsert_results(conn, [result.model_dump() for result in results])
+
+
+@router.post("/panels", status_code=201)
+def import_lab_panels(
+    request: LabPanelImport, conn: sqlite3.Connection = Depends(get_db_dependency)
+):
+    results = [
+        LabResultCreate(
+            drawn_date=panel.drawn_date,
+            panel=panel.panel,
+            # A marker's own notes override the panel's.
+            **{"notes": panel.notes, **marker.model_dump(exclude_none=True)},
+        )
+        for panel in request.panels
+        for marker in panel.markers
+    ]
+    return _import_results(conn, results)
+
+
+@router.post("/panels/csv", status_code=201)
+async def import_lab_panels_csv(
+    file: UploadFile = File(...),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    raw = await file.read(MAX_CSV_BYTES + 1)
+    if len(raw) > MAX_CSV_BYTES:
+        raise HTTPException(status_code=413, detail="CSV exceeds upload limit")
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {name.strip() for name in reader.fieldnames or ()}
+    missing = [column for column in CSV_REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise HTTPException(
+            status_code=400, detail=f"CSV is missing columns: {', '.join(missing)}"
+        )
+    # Blank cells mean "not reported", not empty strings.
+    rows = [
+        {
+            key.strip(): value.strip()
+            for key, value in row.items()
+            if key and value is not None and value.strip()
+        }
+        for row in reader
+    ]
+    results, errors = validate_items(LabResultCreate, rows)
+    if errors:
+        # Report spreadsheet line numbers (the header is line 1).
+        raise HTTPException(
+            status_code=422,
+            detail=[{"line": error["index"] + 2, **error} for error in errors],
+        )
+    return _import_results(conn, [result for _, result in results])
+
+
 @router.post("/", status_code=201)
 def create_lab_result(
     entry: LabResultCreate, conn: sqlite3.Connection = Depends(get_db_dependency)
@@ -38,32 +176,27 @@ def create_lab_result(
             detail="reference_low cannot be greater than reference_high",
         )
 
-    cur = conn.execute(
-        """INSERT INTO lab_results
-           (
-             drawn_date,
-             panel,
-             marker,
-             value,
-             unit,
-             reference_low,
-             reference_high,
-             flag,
-             notes
-           )
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            str(entry.drawn_date),
-            entry.panel,
-            entry.marker,
-            entry.value,
-            entry.unit,
-            entry.reference_low,
-            entry.reference_high,
-            entry.flag,
-            entry.notes,
-        ),
-    )
+    try:
+        cur = conn.execute(
+            """INSERT INTO lab_results
+               (
+                 drawn_date,
+                 panel,
+                 marker,
+                 value,
+                 unit,
+                 reference_low,
+                 reference_high,
+                 flag,
+                 notes
+               )
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            _normalized_values(entry),
+        )
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        raise HTTPException(status_code=409, detail=DUPLICATE_RESULT_DETAIL)
+    refresh_marker_history(conn, [entry.marker])
     conn.commit()
     row = conn.execute(
         "SELECT * FROM lab_results WHERE id=?",
@@ -74,20 +207,15 @@ def create_lab_result(
 
 @router.get("/")
 def get_lab_results(
+    response: Response,
     marker: Optional[str] = Query(default=None, min_length=1, max_length=120),
     drawn_date: Optional[date] = None,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=200, ge=1, le=1000),
     conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
-    if marker is not None:
-        rows = conn.execute(
-            """SELECT *
-               FROM lab_results
-               WHERE marker = ?
-               ORDER BY drawn_date DESC, created_at DESC""",
-            (marker,),
-        ).fetchall()
-        return [row_to_dict(row) for row in rows]
-
     if drawn_date is not None:
         rows = conn.execute(
             """SELECT *
@@ -98,13 +226,47 @@ def get_lab_results(
         ).fetchall()
         return [row_to_dict(row) for row in rows]
 
-    rows = conn.execute(
-        """SELECT *
-           FROM lab_results
-           ORDER BY drawn_date DESC, panel, marker
-           LIMIT 200"""
-    ).fetchall()
-    return [row_to_dict(row) for row in rows]
+    where, params = [], []
+    if marker is not None:
+        where.append("marker = ?")
+        params.append(marker)
+    try:
+        page = keyset_page(
+            conn,
+            table="lab_results",
+            sort_key="drawn_date",
+            where=where,
+            params=params,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
+
+
+@router.get("/trends")
+def get_lab_trends(
+    markers: Optional[str] = Query(default=None, max_length=4000),
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    requested = _split_list(markers)
+    if len(requested) > MAX_TREND_MARKERS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Request at most {MAX_TREND_MARKERS} markers",
+        )
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=422, detail="from must be on or before to")
+    return {
+        "markers": marker_trends(conn, markers=requested, start=date_from, end=date_to)
+    }
 
 
 @router.patch("/{result_id}")
@@ -124,37 +286,31 @@ def update_lab_result(
         )
 
     existing = conn.execute(
-        "SELECT id FROM lab_results WHERE id=?",
+        "SELECT id, marker FROM lab_results WHERE id=?",
         (result_id,),
     ).fetchone()
     if existing is None:
         raise HTTPException(status_code=404, detail="Lab result not found")
 
-    conn.execute(
-        """UPDATE lab_results
-           SET drawn_date=?,
-               panel=?,
-               marker=?,
-               value=?,
-               unit=?,
-               reference_low=?,
-               reference_high=?,
-               flag=?,
-               notes=?
-           WHERE id=?""",
-        (
-            str(entry.drawn_date),
-            entry.panel,
-            entry.marker,
-            entry.value,
-            entry.unit,
-            entry.reference_low,
-            entry.reference_high,
-            entry.flag,
-            entry.notes,
-            result_id,
-        ),
-    )
+    try:
+        conn.execute(
+            """UPDATE lab_results
+               SET drawn_date=?,
+                   panel=?,
+                   marker=?,
+                   value=?,
+                   unit=?,
+                   reference_low=?,
+                   reference_high=?,
+                   flag=?,
+                   notes=?
+               WHERE id=?""",
+            (*_normalized_values(entry), result_id),
+        )
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        raise HTTPException(status_code=409, detail=DUPLICATE_RESULT_DETAIL)
+    refresh_marker_history(conn, [existing["marker"], entry.marker])
     conn.commit()
     row = conn.execute(
         "SELECT * FROM lab_results WHERE id=?",
@@ -6,9 +6,19 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    date_range_clauses,
+    keyset_page,
+)
 
 router = APIRouter()
 
+# Undated entries page by when they were recorded.
+MEDICAL_HISTORY_SORT_KEY = "COALESCE(date, date(created_at))"
+
 UPDATABLE_COLUMNS = frozenset(
     {
         "category",
@@ -61,6 +71,7 @@ class MedicalHistoryPatch(BaseModel):
 
 @router.get("/")
 def get_medical_history(
+    response: Response,
     category: Optional[
         Literal[
             "condition",
@@ -72,6 +83,10 @@ def get_medical_history(
         ]
     ] = Query(default=None),
     active_only: bool = False,
+    date_from: Optional[dt_date] = Query(default=None, alias="from"),
+    date_to: Optional[dt_date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
     conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
     query = "SELECT * FROM medical_history"
@@ -84,6 +99,30 @@ def get_medical_history(
     if active_only:
         clauses.append("active = 1")
 
+    if limit is not None or cursor is not None:
+        try:
+            page = keyset_page(
+                conn,
+                table="medical_history",
+                sort_key=MEDICAL_HISTORY_SORT_KEY,
+                where=clauses,
+                params=params,
+                date_from=date_from,
+                date_to=date_to,
+                cursor=cursor,
+                limit=limit or DEFAULT_PAGE_SIZE,
+            )
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        return page.rows
+
+    range_clauses, range_params = date_range_clauses(
+        MEDICAL_HISTORY_SORT_KEY, date_from, date_to
+    )
+    clauses.extend(range_clauses)
+    params.extend(range_params)
     if clauses:
         query += " WHERE " + " AND ".join(clauses)
     query += " ORDER BY date DESC, created_at DESC"
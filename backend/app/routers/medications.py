@@ -2,13 +2,24 @@ import sqlite3
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.asof import regimen_on
+from ..services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    date_range_clauses,
+    keyset_page,
+)
 
 router = APIRouter()
 
+# Keyset pagination orders by start date, falling back to when the row was added.
+MEDICATIONS_SORT_KEY = "COALESCE(started_date, date(created_at))"
+
 UPDATABLE_COLUMNS = frozenset(
     {
         "name",
@@ -51,22 +62,48 @@ class MedicationPatch(BaseModel):
 
 @router.get("/")
 def get_medications(
-    active_only: bool = True, conn: sqlite3.Connection = Depends(get_db_dependency)
+    response: Response,
+    active_only: bool = True,
+    as_of: Optional[date] = None,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
-    if active_only:
-        rows = conn.execute(
-            """SELECT *
-               FROM medications
-               WHERE active = 1
-               ORDER BY name"""
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            """SELECT *
-               FROM medications
-               ORDER BY active DESC, name"""
-        ).fetchall()
-    return [row_to_dict(row) for row in rows]
+    if as_of is not None:
+        # Taken on that day per started/stopped dates, regardless of the flag.
+        return regimen_on(conn, "medications", as_of)
+    where, params = (["active = 1"] if active_only else []), []
+    if limit is None and cursor is None:
+        range_where, range_params = date_range_clauses(
+            MEDICATIONS_SORT_KEY, date_from, date_to
+        )
+        clauses = [*where, *range_where]
+        query = "SELECT * FROM medications"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY active DESC, name"
+        rows = conn.execute(query, [*params, *range_params]).fetchall()
+        return [row_to_dict(row) for row in rows]
+
+    try:
+        page = keyset_page(
+            conn,
+            table="medications",
+            sort_key=MEDICATIONS_SORT_KEY,
+            where=where,
+            params=params,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit or DEFAULT_PAGE_SIZE,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
 
 
 @router.post("/", status_code=201)
@@ -1,14 +1,37 @@
 import sqlite3
-from datetime import date
+from datetime import date, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.bulk_writes import (
+    BulkRequest,
+    BulkWriteError,
+    bulk_insert,
+    model_rows,
+    validate_items,
+)
+from ..services.baselines import BASELINE_METRICS, baseline_summary
+from ..services.events import publish_change
+from ..services.timeseries import (
+    SOURCE_PRIORITY,
+    Granularity,
+    SeriesRangeError,
+    metric_series,
+)
 
 router = APIRouter()
 
+MAX_SERIES_METRICS = 10
+
+
+def _split_list(raw: Optional[str]) -> list[str]:
+    if not raw:
+        return []
+    return list(dict.fromkeys(part.strip() for part in raw.split(",") if part.strip()))
+
 
 class BodyMetricCreate(BaseModel):
     recorded_date: date
@@ -18,6 +41,19 @@ class BodyMetricCreate(BaseModel):
     notes: Optional[str] = None
 
 
+BODY_METRIC_COLUMNS = ("recorded_date", "metric", "value", "source", "notes")
+
+
+def _body_metric_row(entry: BodyMetricCreate) -> tuple:
+    return (
+        str(entry.recorded_date),
+        entry.metric,
+        entry.value,
+        entry.source,
+        entry.notes,
+    )
+
+
 @router.post("/", status_code=201)
 def create_body_metric(
     entry: BodyMetricCreate, conn: sqlite3.Connection = Depends(get_db_dependency)
@@ -26,15 +62,12 @@ def create_body_metric(
         """INSERT INTO body_metrics
            (recorded_date, metric, value, source, notes)
            VALUES (?, ?, ?, ?, ?)""",
-        (
-            str(entry.recorded_date),
-            entry.metric,
-            entry.value,
-            entry.source,
-            entry.notes,
-        ),
+        _body_metric_row(entry),
     )
     conn.commit()
+    publish_change(
+        "metrics.create", tables=["body_metrics"], dates=[entry.recorded_date]
+    )
     row = conn.execute(
         "SELECT * FROM body_metrics WHERE id=?",
         (cur.lastrowid,),
@@ -42,6 +75,31 @@ def create_body_metric(
     return row_to_dict(row)
 
 
+@router.post("/bulk", status_code=201)
+def create_body_metrics_bulk(
+    request: BulkRequest, conn: sqlite3.Connection = Depends(get_db_dependency)
+):
+    entries, validation_errors = validate_items(BodyMetricCreate, request.items)
+    try:
+        result = bulk_insert(
+            conn,
+            table="body_metrics",
+            columns=BODY_METRIC_COLUMNS,
+            rows=model_rows(entries, _body_metric_row),
+            mode=request.mode,
+            validation_errors=validation_errors,
+        )
+    except BulkWriteError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+    if result.created:
+        publish_change(
+            "metrics.bulk",
+            tables=["body_metrics"],
+            dates=[row["recorded_date"] for row in result.created],
+        )
+    return result.payload(request.mode)
+
+
 @router.get("/")
 def get_body_metrics(
     metric: str,
@@ -59,3 +117,65 @@ def get_body_metrics(
         (metric, str(end_date), f"-{days - 1} days", str(end_date)),
     ).fetchall()
     return [row_to_dict(row) for row in rows]
+
+
+@router.get("/series")
+def get_metric_series(
+    metrics: str = Query(min_length=1, max_length=500),
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    granularity: Granularity = "day",
+    rolling: Optional[int] = Query(default=None, ge=2, le=365),
+    ewma_span: Optional[int] = Query(default=None, ge=2, le=365),
+    source_priority: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    metric_names = _split_list(metrics)
+    if not metric_names or len(metric_names) > MAX_SERIES_METRICS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"metrics must list 1-{MAX_SERIES_METRICS} comma-separated names",
+        )
+    priority = _split_list(source_priority) or list(SOURCE_PRIORITY)
+    unknown = sorted(set(priority) - set(SOURCE_PRIORITY))
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown source(s): {', '.join(unknown)}"
+        )
+
+    end_date = date_to or date.today()
+    start_date = date_from or end_date - timedelta(days=89)
+    if start_date > end_date:
+        raise HTTPException(status_code=422, detail="from must be on or before to")
+    try:
+        return metric_series(
+            conn,
+            metrics=metric_names,
+            start=start_date,
+            end=end_date,
+            granularity=granularity,
+            rolling=rolling,
+            ewma_span=ewma_span,
+            source_priority=priority,
+        )
+    except SeriesRangeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/baselines")
+def get_metric_baselines(
+    target_date: Optional[date] = None,
+    metrics: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    target = target_date or date.today()
+    wanted = _split_list(metrics) or list(BASELINE_METRICS)
+    unknown = sorted(set(wanted) - set(BASELINE_METRICS))
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"No baseline for: {', '.join(unknown)}"
+        )
+    return {
+        "date": str(target),
+        "baselines": baseline_summary(conn, target, wanted),
+    }
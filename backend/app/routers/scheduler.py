@@ -0,0 +1,25 @@
+import sqlite3
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..db import get_db_dependency
+from ..jobs import scheduler
+
+router = APIRouter()
+
+
+@router.get("/jobs")
+def list_jobs(conn: sqlite3.Connection = Depends(get_db_dependency)):
+    return scheduler.status(conn)
+
+
+@router.post("/jobs/{name}/run")
+def run_job(name: str, conn: sqlite3.Connection = Depends(get_db_dependency)):
+    job = scheduler.jobs.get(name)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {name}")
+    if not job.enabled():
+        raise HTTPException(status_code=409, detail=f"Job is not configured: {name}")
+    if not scheduler.run_job(conn, name):
+        raise HTTPException(status_code=409, detail=f"Job is already running: {name}")
+    return next(row for row in scheduler.status(conn) if row["name"] == name)
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.events import publish_change
 
 router = APIRouter()
 
@@ -98,6 +99,9 @@ def create_sleep_record(
         ),
     )
     conn.commit()
+    publish_change(
+        "sleep.create", tables=["sleep_records"], dates=[entry.recorded_date]
+    )
     row = conn.execute(
         "SELECT * FROM sleep_records WHERE recorded_date=?",
         (str(entry.recorded_date),),
@@ -1,14 +1,34 @@
 import sqlite3
-from datetime import date
+from datetime import date, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..db import get_db_dependency, row_to_dict
+from ..services.adherence import AdherenceRangeError, adherence_matrix
+from ..services.asof import regimen_on
+from ..services.bulk_writes import (
+    BulkRequest,
+    BulkWriteError,
+    bulk_insert,
+    model_rows,
+    validate_items,
+)
+from ..services.events import publish_change
+from ..services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    date_range_clauses,
+    keyset_page,
+)
 
 router = APIRouter()
 
+# Keyset pagination orders by start date, falling back to when the row was added.
+SUPPLEMENTS_SORT_KEY = "COALESCE(started_date, date(created_at))"
+
 UPDATABLE_COLUMNS = frozenset(
     {
         "name",
@@ -46,24 +66,68 @@ class SupplementPatch(BaseModel):
     notes: Optional[str] = None
 
 
+class SupplementLogCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+    supplement_id: int
+    recorded_date: date
+    taken: int = Field(default=1, ge=0, le=1)
+    notes: Optional[str] = None
+
+
+SUPPLEMENT_LOG_COLUMNS = ("supplement_id", "recorded_date", "taken", "notes")
+# Checking a day off again replaces that day's log.
+SUPPLEMENT_LOG_KEY = ("supplement_id", "recorded_date")
+
+
+def _supplement_log_row(entry: SupplementLogCreate) -> tuple:
+    return (entry.supplement_id, str(entry.recorded_date), entry.taken, entry.notes)
+
+
 @router.get("/")
 def get_supplements(
-    active_only: bool = True, conn: sqlite3.Connection = Depends(get_db_dependency)
+    response: Response,
+    active_only: bool = True,
+    as_of: Optional[date] = None,
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
 ):
-    if active_only:
-        rows = conn.execute(
-            """SELECT *
-               FROM supplements
-               WHERE active = 1
-               ORDER BY name"""
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            """SELECT *
-               FROM supplements
-               ORDER BY active DESC, name"""
-        ).fetchall()
-    return [row_to_dict(row) for row in rows]
+    if as_of is not None:
+        # Taken on that day per started/stopped dates, regardless of the flag.
+        return regimen_on(conn, "supplements", as_of)
+    where, params = (["active = 1"] if active_only else []), []
+    if limit is None and cursor is None:
+        range_where, range_params = date_range_clauses(
+            SUPPLEMENTS_SORT_KEY, date_from, date_to
+        )
+        clauses = [*where, *range_where]
+        query = "SELECT * FROM supplements"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY active DESC, name"
+        rows = conn.execute(query, [*params, *range_params]).fetchall()
+        return [row_to_dict(row) for row in rows]
+
+    try:
+        page = keyset_page(
+            conn,
+            table="supplements",
+            sort_key=SUPPLEMENTS_SORT_KEY,
+            where=where,
+            params=params,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit or DEFAULT_PAGE_SIZE,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.rows
 
 
 @router.post("/", status_code=201)
@@ -145,3 +209,44 @@ def update_supplement(
         (supplement_id,),
     ).fetchone()
     return row_to_dict(row)
+
+
+@router.post("/logs/bulk", status_code=201)
+def create_supplement_logs_bulk(
+    request: BulkRequest, conn: sqlite3.Connection = Depends(get_db_dependency)
+):
+    entries, validation_errors = validate_items(SupplementLogCreate, request.items)
+    try:
+        result = bulk_insert(
+            conn,
+            table="supplement_logs",
+            columns=SUPPLEMENT_LOG_COLUMNS,
+            rows=model_rows(entries, _supplement_log_row),
+            mode=request.mode,
+            validation_errors=validation_errors,
+            upsert_key=SUPPLEMENT_LOG_KEY,
+        )
+    except BulkWriteError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+    written = [*result.created, *(result.updated or [])]
+    if written:
+        publish_change(
+            "supplements.logs",
+            tables=["supplement_logs"],
+            dates=[row["recorded_date"] for row in written],
+        )
+    return result.payload(request.mode)
+
+
+@router.get("/adherence")
+def get_supplement_adherence(
+    date_from: Optional[date] = Query(default=None, alias="from"),
+    date_to: Optional[date] = Query(default=None, alias="to"),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    end = date_to or date.today()
+    start = date_from or end - timedelta(days=29)
+    try:
+        return adherence_matrix(conn, start=start, end=end)
+    except AdherenceRangeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
@@ -2,10 +2,11 @@ import sqlite3
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from ..db import get_db_dependency
-from ..services.suggestions import generate_daily_suggestion
+from ..services.date_ranges import BackfillRangeError
+from ..services.suggestions import backfill_suggestions, generate_daily_suggestion
 
 router = APIRouter()
 
@@ -17,3 +18,15 @@ def generate_suggestion(
 ):
     target = target_date or date.today()
     return generate_daily_suggestion(conn, target=target)
+
+
+@router.post("/suggestions/backfill")
+def backfill_suggestion_range(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    conn: sqlite3.Connection = Depends(get_db_dependency),
+):
+    try:
+        return backfill_suggestions(conn, start=date_from, end=date_to)
+    except BackfillRangeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
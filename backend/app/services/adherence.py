@@ -0,0 +1,147 @@
+"""Supplement adherence: daily check-off logs and a supplement x day matrix.
+
+Each supplement's row in the matrix is a string with one character per day,
+so a year-long heatmap for several supplements stays a few kilobytes.
+Monthly percentages come from ``supplement_adherence_monthly``, which
+triggers on ``supplement_logs`` keep current.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from .asof import regimen_index
+
+
+TAKEN, SKIPPED, NOT_LOGGED, NOT_IN_EFFECT = "1", "0", ".", "-"
+LEGEND = {
+    TAKEN: "taken",
+    SKIPPED: "skipped",
+    NOT_LOGGED: "not logged",
+    NOT_IN_EFFECT: "not in effect",
+}
+MAX_ADHERENCE_DAYS = 731
+
+
+class AdherenceRangeError(ValueError):
+    pass
+
+
+def _percent(taken: int, scheduled: int) -> Optional[float]:
+    return round(100.0 * taken / scheduled, 1) if scheduled else None
+
+
+def _month_end(month: str) -> date:
+    first = date.fromisoformat(f"{month}-01")
+    return (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(
+        days=1
+    )
+
+
+def _days_in_effect(
+    interval_start: str, interval_end: Optional[str], first: date, last: date
+) -> int:
+    start = max(first, date.fromisoformat(interval_start))
+    end = min(last, date.fromisoformat(interval_end)) if interval_end else last
+    return max((end - start).days + 1, 0)
+
+
+def adherence_matrix(
+    conn: sqlite3.Connection, *, start: date, end: date, today: Optional[date] = None
+) -> dict[str, Any]:
+    """Per-supplement day strings and adherence for ``start..end``.
+
+    Days count as scheduled while the supplement was in effect (per its
+    started/stopped dates) or whenever it was logged, up to ``today``.
+    """
+    if start > end:
+        raise AdherenceRangeError("from must be on or before to")
+    span = (end - start).days + 1
+    if span > MAX_ADHERENCE_DAYS:
+        raise AdherenceRangeError(f"Request at most {MAX_ADHERENCE_DAYS} days")
+    today = today or date.today()
+
+    supplements = {
+        row["id"]: dict(row)
+        for row in conn.execute("SELECT id, name, dose FROM supplements ORDER BY id")
+    }
+    # Seeks idx uq_supplement_logs_day once per supplement.
+    logs = conn.execute(
+        """SELECT supplement_id, recorded_date, taken
+           FROM supplement_logs
+           WHERE supplement_id IN (SELECT id FROM supplements)
+             AND recorded_date BETWEEN ? AND ?""",
+        (start.isoformat(), end.isoformat()),
+    ).fetchall()
+    months = conn.execute(
+        """SELECT supplement_id, month, days_logged, days_taken
+           FROM supplement_adherence_monthly
+           WHERE month BETWEEN ? AND ?
+             AND days_logged > 0
+           ORDER BY supplement_id, month""",
+        (start.isoformat()[:7], end.isoformat()[:7]),
+    ).fetchall()
+    intervals = {
+        interval.row["id"]: interval
+        for interval in regimen_index(conn, "supplements").between(start, end)
+    }
+
+    cells: dict[int, list[str]] = {}
+    for supplement_id, interval in intervals.items():
+        first = max(start, date.fromisoformat(interval.start))
+        last = min(end, date.fromisoformat(interval.end)) if interval.end else end
+        row = cells[supplement_id] = [NOT_IN_EFFECT] * span
+        for offset in range((first - start).days, (last - start).days + 1):
+            row[offset] = NOT_LOGGED
+    for log in logs:
+        row = cells.setdefault(log["supplement_id"], [NOT_IN_EFFECT] * span)
+        offset = (date.fromisoformat(log["recorded_date"]) - start).days
+        row[offset] = TAKEN if log["taken"] else SKIPPED
+
+    monthly: dict[int, list[dict[str, Any]]] = {}
+    for row in months:
+        interval = intervals.get(row["supplement_id"])
+        month_start = date.fromisoformat(f"{row['month']}-01")
+        month_last = min(_month_end(row["month"]), today)
+        in_effect = (
+            _days_in_effect(interval.start, interval.end, month_start, month_last)
+            if interval
+            else 0
+        )
+        # Logs outside the recorded regimen still count as scheduled days.
+        scheduled = max(in_effect, row["days_logged"])
+        monthly.setdefault(row["supplement_id"], []).append(
+            {
+                "month": row["month"],
+                "taken": row["days_taken"],
+                "scheduled": scheduled,
+                "adherence_pct": _percent(row["days_taken"], scheduled),
+            }
+        )
+
+    past = max(min((today - start).days + 1, span), 0)
+    result = []
+    for supplement_id in sorted(cells):
+        # Days after ``today`` are shown but count toward neither total.
+        row = cells[supplement_id]
+        taken = row[:past].count(TAKEN)
+        scheduled = sum(1 for cell in row[:past] if cell != NOT_IN_EFFECT)
+        result.append(
+            {
+                **supplements[supplement_id],
+                "days": "".join(row),
+                "taken": taken,
+                "scheduled": scheduled,
+                "adherence_pct": _percent(taken, scheduled),
+                "monthly": monthly.get(supplement_id, []),
+            }
+        )
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "days": span,
+        "legend": LEGEND,
+        "supplements": result,
+    }
@@ -0,0 +1,362 @@
+"""Range aggregation over the daily health tables.
+
+Each field is a per-day expression on one source table plus a reducer that
+folds days into buckets. A request is compiled into one grouped query per
+source table, covering every requested field and every comparison period at
+once, and all queries run inside a single read transaction so the periods
+and tables agree with each other.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Literal, Optional
+
+from .timeseries import BUCKET_SQL, SOURCE_PRIORITY, bucket_axis
+
+
+AggregateGranularity = Literal["day", "week", "month", "total"]
+Reducer = Literal["avg", "sum", "min", "max", "count"]
+
+REDUCER_SQL = {
+    "avg": "AVG",
+    "sum": "SUM",
+    "min": "MIN",
+    "max": "MAX",
+    "count": "COUNT",
+}
+MAX_FIELDS = 40
+MAX_COMPARISONS = 4
+
+
+class AggregateRequestError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AggregateSource:
+    """A per-day query over one table.
+
+    ``query`` is formatted with ``columns`` (the per-day field expressions)
+    and ``date_filter`` (a predicate on ``recorded_date``), and must return
+    one row per ``recorded_date``.
+    """
+
+    name: str
+    query: str
+
+
+@dataclass(frozen=True)
+class AggregateField:
+    name: str
+    source: str
+    daily: str
+    reducer: Reducer = "avg"
+
+
+# Activity counters come from device syncs, so Apple Health outranks manual
+# entry for them (as on the dashboard); body composition keeps the series
+# endpoint's manual-first order.
+ACTIVITY_METRICS = ("steps", "active_calories")
+BODY_METRICS = ("weight_lbs", "body_fat_pct", "waist_in")
+_body_priority = " ".join(
+    f"WHEN '{source}' THEN {rank}" for rank, source in enumerate(SOURCE_PRIORITY)
+)
+_activity_names = ", ".join(f"'{name}'" for name in ACTIVITY_METRICS)
+_metric_names = ", ".join(f"'{name}'" for name in ACTIVITY_METRICS + BODY_METRICS)
+
+SOURCES = {
+    source.name: source
+    for source in (
+        AggregateSource(
+            name="food_entries",
+            query="""SELECT recorded_date, {columns}
+                     FROM food_entries
+                     WHERE deleted_at IS NULL AND ({date_filter})
+                     GROUP BY recorded_date""",
+        ),
+        AggregateSource(
+            name="sleep_records",
+            query="""SELECT recorded_date, {columns}
+                     FROM sleep_records
+                     WHERE {date_filter}
+                     GROUP BY recorded_date""",
+        ),
+        AggregateSource(
+            name="exercise_sessions",
+            query="""SELECT recorded_date, {columns}
+                     FROM exercise_sessions
+                     WHERE deleted_at IS NULL AND ({date_filter})
+                     GROUP BY recorded_date""",
+        ),
+        AggregateSource(
+            name="exercise_hr_zones",
+            query="""SELECT s.recorded_date, {columns}
+                     FROM exercise_sessions s
+                     JOIN exercise_hr_zones z ON z.session_id = s.id
+                     WHERE s.deleted_at IS NULL AND ({date_filter})
+                     GROUP BY s.recorded_date""",
+        ),
+        AggregateSource(
+            name="body_metrics",
+            query=f"""SELECT recorded_date, {{columns}}
+                      FROM (
+                        SELECT
+                          recorded_date,
+                          metric,
+                          value,
+                          ROW_NUMBER() OVER (
+                            PARTITION BY recorded_date, metric
+                            ORDER BY
+                              CASE
+                                WHEN metric IN ({_activity_names}) THEN
+                                  CASE source
+                                    WHEN 'apple_health' THEN 0
+                                    WHEN 'oura' THEN 1
+                                    ELSE 2
+                                  END
+                                ELSE CASE source {_body_priority} ELSE 9 END
+                              END,
+                              id DESC
+                          ) AS row_num
+                        FROM body_metrics
+                        WHERE metric IN ({_metric_names})
+                          AND ({{date_filter}})
+                      ) prioritized
+                      WHERE row_num = 1
+                      GROUP BY recorded_date""",
+        ),
+    )
+}
+
+
+def _food(name: str) -> AggregateField:
+    return AggregateField(name, "food_entries", f"SUM({name})")
+
+
+def _sleep(name: str) -> AggregateField:
+    return AggregateField(name, "sleep_records", f"MAX({name})")
+
+
+def _metric(name: str) -> AggregateField:
+    return AggregateField(
+        name, "body_metrics", f"MAX(CASE WHEN metric = '{name}' THEN value END)"
+    )
+
+
+FIELDS = {
+    field.name: field
+    for field in (
+        *(
+            _food(name)
+            for name in (
+                "calories",
+                "protein_g",
+                "carbs_g",
+                "fat_g",
+                "fiber_g",
+                "sodium_mg",
+                "alcohol_g",
+                "alcohol_calories",
+            )
+        ),
+        AggregateField("food_entry_count", "food_entries", "COUNT(*)", "sum"),
+        *(
+            _sleep(name)
+            for name in (
+                "sleep_score",
+                "readiness_score",
+                "hrv",
+                "resting_hr",
+                "duration_min",
+                "deep_min",
+                "rem_min",
+                "cpap_ahi",
+                "cpap_hours",
+            )
+        ),
+        AggregateField("sleep_nights", "sleep_records", "COUNT(*)", "sum"),
+        AggregateField("session_count", "exercise_sessions", "COUNT(*)", "sum"),
+        AggregateField("exercise_min", "exercise_sessions", "SUM(duration_min)", "sum"),
+        AggregateField(
+            "exercise_calories", "exercise_sessions", "SUM(calories_burned)", "sum"
+        ),
+        AggregateField(
+            "zone12_min",
+            "exercise_hr_zones",
+            "SUM(CASE WHEN z.zone IN (1, 2) THEN z.minutes ELSE 0 END)",
+            "sum",
+        ),
+        AggregateField("zone_min", "exercise_hr_zones", "SUM(z.minutes)", "sum"),
+        *(_metric(name) for name in ACTIVITY_METRICS + BODY_METRICS),
+    )
+}
+
+
+@dataclass(frozen=True)
+class FieldRequest:
+    key: str
+    field: AggregateField
+    reducer: Reducer
+
+
+@dataclass(frozen=True)
+class Period:
+    label: str
+    start: date
+    end: date
+
+
+def parse_fields(specs: Sequence[str]) -> list[FieldRequest]:
+    """Parse ``name`` or ``name:reducer`` specs, e.g. ``calories:sum``."""
+    requests: list[FieldRequest] = []
+    for spec in dict.fromkeys(specs):
+        name, _, reducer = spec.partition(":")
+        field = FIELDS.get(name)
+        if field is None:
+            raise AggregateRequestError(f"Unknown field: {name}")
+        reducer = reducer or field.reducer
+        if reducer not in REDUCER_SQL:
+            raise AggregateRequestError(f"Unknown reducer for {name}: {reducer}")
+        requests.append(FieldRequest(key=spec, field=field, reducer=reducer))
+    if not requests or len(requests) > MAX_FIELDS:
+        raise AggregateRequestError(f"Request 1-{MAX_FIELDS} fields")
+    return requests
+
+
+def comparison_period(spec: str, current: Period) -> Period:
+    """Resolve ``previous``, ``previous_year`` or ``YYYY-MM-DD..YYYY-MM-DD``."""
+    if spec == "previous":
+        length = current.end - current.start + timedelta(days=1)
+        return Period(spec, current.start - length, current.end - length)
+    if spec == "previous_year":
+        return Period(spec, _year_earlier(current.start), _year_earlier(current.end))
+    start, separator, end = spec.partition("..")
+    try:
+        if not separator:
+            raise ValueError
+        period = Period(spec, date.fromisoformat(start), date.fromisoformat(end))
+    except ValueError:
+        raise AggregateRequestError(f"Invalid comparison period: {spec}") from None
+    if period.start > period.end:
+        raise AggregateRequestError(f"Comparison period ends before it starts: {spec}")
+    return period
+
+
+def _year_earlier(day: date) -> date:
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:  # Feb 29
+        return day.replace(year=day.year - 1, day=28)
+
+
+@contextmanager
+def read_snapshot(conn: sqlite3.Connection) -> Iterator[None]:
+    """Hold one read transaction so every query sees the same WAL snapshot."""
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN")
+    try:
+        yield
+    finally:
+        conn.commit()
+
+
+def _source_query(
+    source: AggregateSource,
+    fields: Sequence[FieldRequest],
+    periods: Sequence[Period],
+    granularity: AggregateGranularity,
+) -> tuple[str, list[Any]]:
+    # Fields that share a per-day expression (e.g. calories:avg and
+    # calories:sum) compute it once.
+    daily_index = {
+        daily: index
+        for index, daily in enumerate(dict.fromkeys(f.field.daily for f in fields))
+    }
+    daily_columns = ", ".join(
+        f"{daily} AS d{index}" for daily, index in daily_index.items()
+    )
+    date_filter = " OR ".join("recorded_date BETWEEN ? AND ?" for _ in periods)
+    reduced = ", ".join(
+        f"{REDUCER_SQL[f.reducer]}(d{daily_index[f.field.daily]}) AS f{index}"
+        for index, f in enumerate(fields)
+    )
+    bucket = "p.start_date" if granularity == "total" else BUCKET_SQL[granularity]
+    period_rows = ", ".join("(?, ?, ?)" for _ in periods)
+    daily = source.query.format(columns=daily_columns, date_filter=date_filter)
+    query = f"""WITH periods(period, start_date, end_date) AS (VALUES {period_rows}),
+                daily AS ({daily})
+                SELECT p.period AS period, {bucket} AS bucket, {reduced}
+                FROM daily
+                JOIN periods p
+                  ON daily.recorded_date BETWEEN p.start_date AND p.end_date
+                GROUP BY p.period, bucket"""
+    params: list[Any] = []
+    for index, period in enumerate(periods):
+        params.extend([index, str(period.start), str(period.end)])
+    for period in periods:
+        params.extend([str(period.start), str(period.end)])
+    return query, params
+
+
+def _period_axis(period: Period, granularity: AggregateGranularity) -> list[str]:
+    if granularity == "total":
+        return [str(period.start)]
+    return [
+        str(bucket) for bucket in bucket_axis(period.start, period.end, granularity)
+    ]
+
+
+def aggregate(
+    conn: sqlite3.Connection,
+    *,
+    fields: Sequence[FieldRequest],
+    current: Period,
+    comparisons: Sequence[Period] = (),
+    granularity: AggregateGranularity = "week",
+) -> dict[str, Any]:
+    periods = [current, *comparisons]
+    axes = [_period_axis(period, granularity) for period in periods]
+    positions = [{bucket: index for index, bucket in enumerate(axis)} for axis in axes]
+    values: list[dict[str, list[Optional[float]]]] = [
+        {f.key: [None] * len(axis) for f in fields} for axis in axes
+    ]
+
+    by_source: dict[str, list[FieldRequest]] = {}
+    for request in fields:
+        by_source.setdefault(request.field.source, []).append(request)
+
+    with read_snapshot(conn):
+        for source_name, source_fields in by_source.items():
+            query, params = _source_query(
+                SOURCES[source_name], source_fields, periods, granularity
+            )
+            for row in conn.execute(query, params).fetchall():
+                index = positions[row["period"]][row["bucket"]]
+                columns = values[row["period"]]
+                for position, request in enumerate(source_fields):
+                    value = row[f"f{position}"]
+                    columns[request.key][index] = (
+                        round(value, 2) if value is not None else None
+                    )
+
+    return {
+        "granularity": granularity,
+        "fields": [f.key for f in fields],
+        "periods": [
+            {
+                "label": period.label,
+                "from": str(period.start),
+                "to": str(period.end),
+                "buckets": axis,
+                "values": columns,
+            }
+            for period, axis, columns in zip(periods, axes, values)
+        ],
+    }
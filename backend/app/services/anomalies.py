@@ -0,0 +1,275 @@
+"""Online anomaly detection for recovery and CPAP metrics.
+
+Each metric keeps an exponentially weighted mean and variance in
+``anomaly_detector_state``. Ingest endpoints call ``run_detectors`` after
+committing, with the days they touched; every new day costs one state
+update, and a value that sits ``threshold`` standard deviations past the
+mean in the concerning direction is recorded in ``anomalies``.
+
+The state only moves forward in time. A re-sync of the latest day is
+re-scored against the state saved before that day was first applied; older
+days that arrive late are not scored rather than triggering a rescan.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Literal, Optional
+
+
+Direction = Literal["high", "low"]
+
+
+@dataclass(frozen=True)
+class DetectorSpec:
+    """One metric's daily value and what counts as an anomaly.
+
+    ``query`` takes a ``:day`` parameter and returns one ``value`` (or NULL).
+    ``min_sd`` floors the standard deviation so a very steady series doesn't
+    flag trivial changes.
+    """
+
+    metric: str
+    tables: frozenset[str]
+    query: str
+    direction: Direction
+    min_sd: float
+    alpha: float = 0.1
+    threshold: float = 3.0
+    warmup: int = 7
+
+
+def _sleep_or_apple_health(column: str, metric: str) -> str:
+    return f"""SELECT COALESCE(
+                   (SELECT {column} FROM sleep_records WHERE recorded_date = :day),
+                   (SELECT value FROM body_metrics
+                    WHERE recorded_date = :day AND metric = '{metric}'
+                    ORDER BY id DESC LIMIT 1)
+               ) AS value"""
+
+
+def _cpap(column: str) -> str:
+    return f"SELECT {column} AS value FROM sleep_records WHERE recorded_date = :day"
+
+
+DETECTORS = (
+    DetectorSpec(
+        metric="hrv",
+        tables=frozenset({"sleep_records", "body_metrics"}),
+        query=_sleep_or_apple_health("hrv", "hrv"),
+        direction="low",
+        min_sd=2.0,
+    ),
+    DetectorSpec(
+        metric="resting_hr",
+        tables=frozenset({"sleep_records", "body_metrics"}),
+        query=_sleep_or_apple_health("resting_hr", "resting_hr"),
+        direction="high",
+        min_sd=1.5,
+    ),
+    DetectorSpec(
+        metric="cpap_ahi",
+        tables=frozenset({"sleep_records"}),
+        query=_cpap("cpap_ahi"),
+        direction="high",
+        min_sd=0.5,
+    ),
+    DetectorSpec(
+        metric="cpap_leak_95",
+        tables=frozenset({"sleep_records"}),
+        query=_cpap("cpap_leak_95"),
+        direction="high",
+        min_sd=2.0,
+    ),
+)
+
+
+@dataclass
+class DetectorState:
+    n: int = 0
+    mean: float = 0.0
+    var: float = 0.0
+
+    def score(self, spec: DetectorSpec, value: float) -> Optional[float]:
+        if self.n < spec.warmup:
+            return None
+        sd = max(math.sqrt(self.var), spec.min_sd)
+        return (value - self.mean) / sd
+
+    def update(self, spec: DetectorSpec, value: float) -> DetectorState:
+        if self.n == 0:
+            return DetectorState(n=1, mean=value, var=0.0)
+        # Seed with a plain running mean until the EWMA weight takes over, so
+        # the first few points don't dominate.
+        alpha = max(spec.alpha, 1.0 / (self.n + 1))
+        diff = value - self.mean
+        increment = alpha * diff
+        return DetectorState(
+            n=self.n + 1,
+            mean=self.mean + increment,
+            var=(1 - alpha) * (self.var + diff * increment),
+        )
+
+
+def _load_state(
+    conn: sqlite3.Connection, metric: str
+) -> tuple[Optional[dict[str, Any]], DetectorState, DetectorState]:
+    row = conn.execute(
+        "SELECT * FROM anomaly_detector_state WHERE metric = ?", (metric,)
+    ).fetchone()
+    if row is None:
+        return None, DetectorState(), DetectorState()
+    return (
+        dict(row),
+        DetectorState(row["n"], row["mean"], row["var"]),
+        DetectorState(row["prev_n"], row["prev_mean"], row["prev_var"]),
+    )
+
+
+def _record(
+    conn: sqlite3.Connection,
+    spec: DetectorSpec,
+    day: str,
+    value: float,
+    state: DetectorState,
+    z_score: Optional[float],
+) -> Optional[dict[str, Any]]:
+    flagged = z_score is not None and (
+        z_score >= spec.threshold
+        if spec.direction == "high"
+        else z_score <= -spec.threshold
+    )
+    if not flagged:
+        conn.execute(
+            "DELETE FROM anomalies WHERE metric = ? AND recorded_date = ?",
+            (spec.metric, day),
+        )
+        return None
+    row = conn.execute(
+        """INSERT INTO anomalies
+               (metric, recorded_date, value, expected, z_score, direction)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT(metric, recorded_date) DO UPDATE SET
+               value=excluded.value,
+               expected=excluded.expected,
+               z_score=excluded.z_score,
+               direction=excluded.direction,
+               created_at=datetime('now'),
+               acknowledged_at=NULL
+           RETURNING *""",
+        (
+            spec.metric,
+            day,
+            value,
+            round(state.mean, 2),
+            round(z_score, 2),
+            spec.direction,
+        ),
+    ).fetchone()
+    return dict(row)
+
+
+def _save_state(
+    conn: sqlite3.Connection,
+    spec: DetectorSpec,
+    day: str,
+    value: float,
+    state: DetectorState,
+    previous: DetectorState,
+) -> None:
+    conn.execute(
+        """INSERT INTO anomaly_detector_state
+               (metric, last_date, last_value, n, mean, var, prev_n, prev_mean, prev_var)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(metric) DO UPDATE SET
+               last_date=excluded.last_date,
+               last_value=excluded.last_value,
+               n=excluded.n,
+               mean=excluded.mean,
+               var=excluded.var,
+               prev_n=excluded.prev_n,
+               prev_mean=excluded.prev_mean,
+               prev_var=excluded.prev_var,
+               updated_at=datetime('now')""",
+        (
+            spec.metric,
+            day,
+            value,
+            state.n,
+            state.mean,
+            state.var,
+            previous.n,
+            previous.mean,
+            previous.var,
+        ),
+    )
+
+
+def _observe(
+    conn: sqlite3.Connection, spec: DetectorSpec, days: list[str]
+) -> list[dict[str, Any]]:
+    saved, state, previous = _load_state(conn, spec.metric)
+    last_date = saved["last_date"] if saved else None
+    last_value = saved["last_value"] if saved else None
+    flagged: list[dict[str, Any]] = []
+    for day in days:
+        if last_date is not None and day < last_date:
+            continue
+        row = conn.execute(spec.query, {"day": day}).fetchone()
+        if row is None or row["value"] is None:
+            continue
+        value = float(row["value"])
+        if day == last_date:
+            if value == last_value:
+                continue
+            # The latest day was re-synced with a new value: rescore it
+            # against the state from before it was first applied.
+            state = previous
+        else:
+            previous = state
+        anomaly = _record(conn, spec, day, value, state, state.score(spec, value))
+        if anomaly:
+            flagged.append(anomaly)
+        state = state.update(spec, value)
+        last_date, last_value = day, value
+        _save_state(conn, spec, day, value, state, previous)
+    return flagged
+
+
+def run_detectors(
+    conn: sqlite3.Connection,
+    *,
+    tables: Iterable[str],
+    dates: Iterable[date | str],
+) -> list[dict[str, Any]]:
+    """Score the touched days in date order and commit. Returns new anomalies."""
+    touched = set(tables)
+    days = sorted({str(day) for day in dates if day})
+    flagged: list[dict[str, Any]] = []
+    for spec in DETECTORS:
+        if spec.tables & touched:
+            flagged.extend(_observe(conn, spec, days))
+    conn.commit()
+    return flagged
+
+
+def list_anomalies(
+    conn: sqlite3.Connection,
+    *,
+    start: date,
+    end: date,
+    include_acknowledged: bool = False,
+) -> list[dict[str, Any]]:
+    acknowledged_filter = "" if include_acknowledged else "AND acknowledged_at IS NULL"
+    rows = conn.execute(
+        f"""SELECT *
+            FROM anomalies
+            WHERE recorded_date BETWEEN ? AND ? {acknowledged_filter}
+            ORDER BY recorded_date DESC, metric""",
+        (str(start), str(end)),
+    ).fetchall()
+    return [dict(row) for row in rows]
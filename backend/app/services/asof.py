@@ -0,0 +1,170 @@
+"""What was in effect on a date: targets, medications and supplements.
+
+Each table is loaded once into an in-memory interval index, tagged with its
+``data_generations`` counter, so writes (which bump the counter through
+triggers) invalidate it and reads in between never touch the table again.
+
+- A target is in effect from its ``effective_date`` until the next one for
+  the same metric; rows sharing a date resolve to the latest id.
+- A medication or supplement is in effect from ``started_date`` (or the day
+  it was added) through ``stopped_date``. One marked inactive without a stop
+  date has no known end, so it isn't reported for any date.
+"""
+
+from __future__ import annotations
+
+import bisect
+import sqlite3
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Literal, Optional
+
+from .generations import GenerationCache
+
+
+RegimenKind = Literal["medications", "supplements"]
+REGIMEN_KINDS: tuple[RegimenKind, ...] = ("medications", "supplements")
+
+
+@dataclass(frozen=True)
+class TargetIndex:
+    # metric -> effective dates (ascending) and the value from each, as stored.
+    dates: dict[str, list[str]]
+    values: dict[str, list[float]]
+
+    def on(self, day: date | str) -> dict[str, float]:
+        key = day if isinstance(day, str) else day.isoformat()
+        targets: dict[str, float] = {}
+        for metric, dates in self.dates.items():
+            position = bisect.bisect_right(dates, key)
+            if position:
+                targets[metric] = self.values[metric][position - 1]
+        return targets
+
+
+@dataclass(frozen=True)
+class Interval:
+    start: str
+    end: Optional[str]  # inclusive; None while ongoing
+    row: dict[str, Any]
+
+    def overlaps(self, first: str, last: str) -> bool:
+        return self.start <= last and (self.end is None or self.end >= first)
+
+
+@dataclass(frozen=True)
+class IntervalIndex:
+    intervals: list[Interval]  # by start
+    starts: list[str]
+
+    def between(self, start: date, end: date) -> list[Interval]:
+        first, last = start.isoformat(), end.isoformat()
+        # Only intervals starting by ``last`` can overlap; bisect skips the rest.
+        candidates = self.intervals[: bisect.bisect_right(self.starts, last)]
+        return [interval for interval in candidates if interval.overlaps(first, last)]
+
+
+_targets: GenerationCache[TargetIndex] = GenerationCache(("targets",), max_entries=4)
+_regimens: dict[RegimenKind, GenerationCache[IntervalIndex]] = {
+    kind: GenerationCache((kind,), max_entries=4) for kind in REGIMEN_KINDS
+}
+
+
+def _load_targets(conn: sqlite3.Connection) -> TargetIndex:
+    dates: dict[str, list[str]] = {}
+    values: dict[str, list[float]] = {}
+    for row in conn.execute(
+        """SELECT metric, effective_date, value
+           FROM targets
+           ORDER BY metric, effective_date, id"""
+    ):
+        metric_dates = dates.setdefault(row["metric"], [])
+        metric_values = values.setdefault(row["metric"], [])
+        if metric_dates and metric_dates[-1] == row["effective_date"]:
+            metric_values[-1] = row["value"]
+            continue
+        metric_dates.append(row["effective_date"])
+        metric_values.append(row["value"])
+    return TargetIndex(dates=dates, values=values)
+
+
+def _load_regimen(conn: sqlite3.Connection, kind: RegimenKind) -> IntervalIndex:
+    intervals = [
+        Interval(start=row["interval_start"], end=row["stopped_date"], row=dict(row))
+        for row in conn.execute(
+            f"""SELECT *, COALESCE(started_date, date(created_at)) AS interval_start
+                FROM {kind}
+                WHERE stopped_date IS NOT NULL OR active = 1
+                ORDER BY COALESCE(started_date, date(created_at)), id"""
+        )
+    ]
+    return IntervalIndex(
+        intervals=intervals, starts=[interval.start for interval in intervals]
+    )
+
+
+def target_index(conn: sqlite3.Connection) -> TargetIndex:
+    return _targets.get_or_compute(conn, "targets", lambda: _load_targets(conn))
+
+
+def regimen_index(conn: sqlite3.Connection, kind: RegimenKind) -> IntervalIndex:
+    return _regimens[kind].get_or_compute(conn, kind, lambda: _load_regimen(conn, kind))
+
+
+def targets_on(conn: sqlite3.Connection, day: date | str) -> dict[str, float]:
+    """Targets in effect on ``day``, keyed by metric."""
+    return target_index(conn).on(day)
+
+
+def targets_by_day(
+    conn: sqlite3.Connection, days: Sequence[date]
+) -> dict[date, dict[str, float]]:
+    index = target_index(conn)
+    return {day: index.on(day) for day in days}
+
+
+def _public(interval: Interval) -> dict[str, Any]:
+    row = dict(interval.row)
+    del row["interval_start"]
+    return {**row, "effective_from": interval.start, "effective_to": interval.end}
+
+
+def regimen_on(
+    conn: sqlite3.Connection, kind: RegimenKind, day: date
+) -> list[dict[str, Any]]:
+    """Medications or supplements taken on ``day``."""
+    return regimen_between(conn, kind, day, day)
+
+
+def regimen_between(
+    conn: sqlite3.Connection, kind: RegimenKind, start: date, end: date
+) -> list[dict[str, Any]]:
+    """Medications or supplements taken on any day in ``start..end``, with
+    the dates each was in effect."""
+    return [
+        _public(interval) for interval in regimen_index(conn, kind).between(start, end)
+    ]
+
+
+def in_effect(conn: sqlite3.Connection, start: date, end: date) -> dict[str, Any]:
+    """Targets at each change point and regimens overlapping ``start..end``."""
+    index = target_index(conn)
+    first, last = start.isoformat(), end.isoformat()
+    changes = sorted(
+        {first}
+        | {
+            effective
+            for dates in index.dates.values()
+            for effective in dates
+            if first < effective <= last
+        }
+    )
+    return {
+        "from": first,
+        "to": last,
+        "targets": [
+            {"effective_from": day, "targets": index.on(day)} for day in changes
+        ],
+        **{kind: regimen_between(conn, kind, start, end) for kind in REGIMEN_KINDS},
+    }
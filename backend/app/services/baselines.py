@@ -0,0 +1,296 @@
+"""Rolling 7/14/28-day baselines maintained incrementally.
+
+Triggers on the source tables queue changed days in
+``metric_baselines_pending``. ``refresh_baselines`` recomputes only those
+days' values, compares them with what the baselines already include
+(``metric_daily_values``) and, for each day that moved, rebuilds the
+baseline rows whose windows cover it (at most 28 per changed metric-day)
+from the stored daily values.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from .timeseries import SOURCE_PRIORITY
+
+
+WINDOWS = (7, 14, 28)
+MAX_WINDOW = max(WINDOWS)
+
+
+@dataclass(frozen=True)
+class BaselineSource:
+    """Per-day values for one or more metrics from a single table.
+
+    ``query`` returns ``recorded_date`` plus one column per metric, limited
+    to the days queued for ``table``.
+    """
+
+    table: str
+    metrics: tuple[str, ...]
+    query: str
+
+
+_weight_priority = " ".join(
+    f"WHEN '{source}' THEN {rank}" for rank, source in enumerate(SOURCE_PRIORITY)
+)
+
+SOURCES = (
+    BaselineSource(
+        table="sleep_records",
+        metrics=("hrv", "resting_hr", "sleep_score", "readiness_score"),
+        query="""SELECT recorded_date,
+                    MAX(hrv) AS hrv,
+                    MAX(resting_hr) AS resting_hr,
+                    MAX(sleep_score) AS sleep_score,
+                    MAX(readiness_score) AS readiness_score
+                 FROM sleep_records
+                 WHERE recorded_date IN (
+                     SELECT value_date FROM metric_baselines_pending
+                     WHERE source_table = 'sleep_records'
+                 )
+                 GROUP BY recorded_date""",
+    ),
+    BaselineSource(
+        table="body_metrics",
+        metrics=("weight_lbs",),
+        query=f"""SELECT recorded_date, value AS weight_lbs
+                  FROM (
+                    SELECT
+                      recorded_date,
+                      value,
+                      ROW_NUMBER() OVER (
+                        PARTITION BY recorded_date
+                        ORDER BY CASE source {_weight_priority} ELSE 9 END, id DESC
+                      ) AS row_num
+                    FROM body_metrics
+                    WHERE metric = 'weight_lbs'
+                      AND recorded_date IN (
+                          SELECT value_date FROM metric_baselines_pending
+                          WHERE source_table = 'body_metrics'
+                      )
+                  )
+                  WHERE row_num = 1""",
+    ),
+    BaselineSource(
+        table="food_entries",
+        metrics=("calories",),
+        query="""SELECT recorded_date, SUM(calories) AS calories
+                 FROM food_entries
+                 WHERE deleted_at IS NULL
+                   AND recorded_date IN (
+                       SELECT value_date FROM metric_baselines_pending
+                       WHERE source_table = 'food_entries'
+                   )
+                 GROUP BY recorded_date""",
+    ),
+)
+BASELINE_METRICS = tuple(metric for source in SOURCES for metric in source.metrics)
+
+_STAT_COLUMNS = tuple(
+    f"{stat}_{window}" for window in WINDOWS for stat in ("n", "mean", "sd")
+)
+
+
+def _changed_values(
+    conn: sqlite3.Connection,
+) -> dict[str, list[tuple[date, Optional[float], Optional[float]]]]:
+    """(day, old, new) per metric for every queued day whose value moved."""
+    changes: dict[str, list[tuple[date, Optional[float], Optional[float]]]] = {}
+    for source in SOURCES:
+        days = [
+            row["value_date"]
+            for row in conn.execute(
+                """SELECT value_date FROM metric_baselines_pending
+                   WHERE source_table = ?""",
+                (source.table,),
+            ).fetchall()
+        ]
+        if not days:
+            continue
+        fresh = {row["recorded_date"]: row for row in conn.execute(source.query)}
+        for metric in source.metrics:
+            applied = {
+                row["value_date"]: row["value"]
+                for row in conn.execute(
+                    """SELECT value_date, value FROM metric_daily_values
+                       WHERE metric = ?
+                         AND value_date IN (
+                             SELECT value_date FROM metric_baselines_pending
+                             WHERE source_table = ?
+                         )""",
+                    (metric, source.table),
+                )
+            }
+            for day in days:
+                old = applied.get(day)
+                row = fresh.get(day)
+                new = float(row[metric]) if row and row[metric] is not None else None
+                if old != new:
+                    changes.setdefault(metric, []).append(
+                        (date.fromisoformat(day), old, new)
+                    )
+    return changes
+
+
+def _window_stats(values: Sequence[float]) -> dict[str, Any]:
+    """n, mean and sample sd of one window.
+
+    The sum is exact (``math.fsum``) and the sd is taken from deviations about
+    the mean, so a flat series has an sd of exactly zero.
+    """
+    count = len(values)
+    if not count:
+        return {"n": 0, "mean": None, "sd": None}
+    mean = math.fsum(values) / count
+    sd = None
+    if count >= 2:
+        variance = math.fsum((value - mean) ** 2 for value in values) / (count - 1)
+        sd = round(math.sqrt(variance), 4)
+    return {"n": count, "mean": round(mean, 4), "sd": sd}
+
+
+def _apply_metric(
+    conn: sqlite3.Connection,
+    metric: str,
+    changes: list[tuple[date, Optional[float], Optional[float]]],
+) -> None:
+    conn.executemany(
+        """INSERT INTO metric_daily_values (metric, value_date, value)
+           VALUES (?, ?, ?)
+           ON CONFLICT(metric, value_date) DO UPDATE SET value=excluded.value""",
+        [(metric, str(day), new) for day, _, new in changes if new is not None],
+    )
+    conn.executemany(
+        "DELETE FROM metric_daily_values WHERE metric = ? AND value_date = ?",
+        [(metric, str(day)) for day, _, new in changes if new is None],
+    )
+
+    # Recompute every window covering a changed day from the stored values,
+    # so repeated edits can't drift.
+    touched = sorted(
+        {
+            day + timedelta(days=offset)
+            for day, _, _ in changes
+            for offset in range(MAX_WINDOW)
+        }
+    )
+    first = touched[0] - timedelta(days=MAX_WINDOW - 1)
+    values = {
+        date.fromisoformat(row["value_date"]): row["value"]
+        for row in conn.execute(
+            """SELECT value_date, value FROM metric_daily_values
+               WHERE metric = ? AND value_date BETWEEN ? AND ?""",
+            (metric, str(first), str(touched[-1])),
+        )
+    }
+
+    keep, drop = [], []
+    for baseline_date in touched:
+        row: dict[str, Any] = {}
+        for window in WINDOWS:
+            window_values = [
+                values[day]
+                for offset in range(window)
+                if (day := baseline_date - timedelta(days=offset)) in values
+            ]
+            for stat, value in _window_stats(window_values).items():
+                row[f"{stat}_{window}"] = value
+        if row[f"n_{MAX_WINDOW}"] == 0:
+            drop.append((str(baseline_date), metric))
+        else:
+            keep.append((str(baseline_date), metric, *(row[c] for c in _STAT_COLUMNS)))
+    conn.executemany(
+        "DELETE FROM metric_baselines WHERE baseline_date = ? AND metric = ?", drop
+    )
+    updates = ", ".join(f"{column}=excluded.{column}" for column in _STAT_COLUMNS)
+    conn.executemany(
+        f"""INSERT INTO metric_baselines
+                (baseline_date, metric, {", ".join(_STAT_COLUMNS)})
+            VALUES (?, ?, {", ".join("?" for _ in _STAT_COLUMNS)})
+            ON CONFLICT(baseline_date, metric) DO UPDATE SET
+                {updates},
+                updated_at=datetime('now')""",
+        keep,
+    )
+
+
+def refresh_baselines(conn: sqlite3.Connection) -> int:
+    """Fold queued source-day changes into the baselines. Returns days changed."""
+    if (
+        conn.execute("SELECT 1 FROM metric_baselines_pending LIMIT 1").fetchone()
+        is None
+    ):
+        return 0
+    changes = _changed_values(conn)
+    for metric, metric_changes in changes.items():
+        _apply_metric(conn, metric, metric_changes)
+    conn.execute("DELETE FROM metric_baselines_pending")
+    conn.commit()
+    return sum(len(metric_changes) for metric_changes in changes.values())
+
+
+def load_baselines(
+    conn: sqlite3.Connection,
+    on: date,
+    metrics: Sequence[str] = BASELINE_METRICS,
+) -> dict[str, dict[str, Any]]:
+    """Baseline rows for ``on`` keyed by metric, with that day's value."""
+    refresh_baselines(conn)
+    placeholders = ", ".join("?" for _ in metrics)
+    rows = conn.execute(
+        f"""SELECT b.metric, v.value,
+                   {", ".join(f"b.{column}" for column in _STAT_COLUMNS)}
+            FROM metric_baselines b
+            LEFT JOIN metric_daily_values v
+              ON v.metric = b.metric AND v.value_date = b.baseline_date
+            WHERE b.baseline_date = ? AND b.metric IN ({placeholders})""",
+        (str(on), *metrics),
+    ).fetchall()
+    return {
+        row["metric"]: {
+            "value": row["value"],
+            **{column: row[column] for column in _STAT_COLUMNS},
+        }
+        for row in rows
+    }
+
+
+def zscore(
+    value: Optional[float], baseline: Optional[dict[str, Any]], window: int = 28
+) -> Optional[float]:
+    if value is None or not baseline:
+        return None
+    mean = baseline.get(f"mean_{window}")
+    sd = baseline.get(f"sd_{window}")
+    if mean is None or not sd:
+        return None
+    return round((value - mean) / sd, 2)
+
+
+def baseline_summary(
+    conn: sqlite3.Connection, target: date, metrics: Sequence[str]
+) -> dict[str, dict[str, Any]]:
+    """Baselines for ``target`` plus z-scores of its value against the
+    windows ending the day before, so the day isn't scored against itself."""
+    current = load_baselines(conn, target, metrics)
+    prior = load_baselines(conn, target - timedelta(days=1), metrics)
+    summary: dict[str, dict[str, Any]] = {}
+    for metric in metrics:
+        row = current.get(metric)
+        if row is None:
+            continue
+        summary[metric] = {
+            **row,
+            **{
+                f"z_{window}": zscore(row["value"], prior.get(metric), window)
+                for window in WINDOWS
+            },
+        }
+    return summary
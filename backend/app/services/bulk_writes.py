@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Literal, Optional, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+BulkMode = Literal["atomic", "best_effort"]
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+MAX_BULK_ITEMS = 1000
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (32766) per statement.
+MAX_PARAMS_PER_STATEMENT = 30000
+
+
+@dataclass
+class BulkResult:
+    created: list[dict[str, Any]] = field(default_factory=list)
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    # Only set for upserts: existing rows that were overwritten.
+    updated: Optional[list[dict[str, Any]]] = None
+
+    def payload(self, mode: BulkMode) -> dict[str, Any]:
+        payload = {
+            "mode": mode,
+            "created_count": len(self.created),
+            "error_count": len(self.errors),
+            "created": self.created,
+            "errors": self.errors,
+        }
+        if self.updated is not None:
+            payload["updated_count"] = len(self.updated)
+            payload["updated"] = self.updated
+        return payload
+
+
+class BulkWriteError(Exception):
+    """Raised in atomic mode; nothing from the batch was written."""
+
+    def __init__(self, errors: list[dict[str, Any]]):
+        super().__init__(f"{len(errors)} bulk item(s) rejected")
+        self.errors = errors
+
+
+def validate_items(
+    model: type[ModelT], items: Sequence[Any]
+) -> tuple[list[tuple[int, ModelT]], list[dict[str, Any]]]:
+    """Validate every item before any row is written."""
+    valid: list[tuple[int, ModelT]] = []
+    errors: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as exc:
+            errors.append(
+                {
+                    "index": index,
+                    "detail": exc.errors(
+                        include_url=False, include_context=False, include_input=False
+                    ),
+                }
+            )
+    return valid, errors
+
+
+def _insert_many(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: list[tuple],
+    on_conflict: str = "",
+) -> list[dict[str, Any]]:
+    placeholders = "(" + ", ".join("?" for _ in columns) + ")"
+    chunk_size = max(MAX_PARAMS_PER_STATEMENT // len(columns), 1)
+    created: list[dict[str, Any]] = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        # One multi-row INSERT per chunk: sqlite3's executemany discards
+        # RETURNING rows, and this avoids re-selecting what was just written.
+        cursor = conn.execute(
+            f"""INSERT INTO {table} ({", ".join(columns)})
+                VALUES {", ".join(placeholders for _ in chunk)}
+                {on_conflict}
+                RETURNING *""",
+            [value for row in chunk for value in row],
+        )
+        created.extend(dict(row) for row in cursor.fetchall())
+    return created
+
+
+def _insert_each(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: list[tuple[int, tuple]],
+    on_conflict: str = "",
+) -> BulkResult:
+    result = BulkResult()
+    statement = f"""INSERT INTO {table} ({", ".join(columns)})
+                    VALUES ({", ".join("?" for _ in columns)})
+                    {on_conflict}
+                    RETURNING *"""
+    # Open the transaction explicitly so releasing a savepoint doesn't commit.
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    for index, row in rows:
+        conn.execute("SAVEPOINT bulk_item")
+        try:
+            created = conn.execute(statement, row).fetchone()
+        except sqlite3.IntegrityError as exc:
+            conn.execute("ROLLBACK TO SAVEPOINT bulk_item")
+            result.errors.append({"index": index, "detail": str(exc)})
+        else:
+            result.created.append(dict(created))
+        conn.execute("RELEASE SAVEPOINT bulk_item")
+    return result
+
+
+def _upsert_clause(columns: Sequence[str], key: Sequence[str]) -> str:
+    updates = ", ".join(
+        f"{column}=excluded.{column}" for column in columns if column not in key
+    )
+    return f"ON CONFLICT({', '.join(key)}) DO UPDATE SET {updates}"
+
+
+def _existing_ids(
+    conn: sqlite3.Connection,
+    table: str,
+    key: Sequence[str],
+    keys: Sequence[tuple],
+) -> set[int]:
+    chunk_size = max(MAX_PARAMS_PER_STATEMENT // len(key), 1)
+    ids: set[int] = set()
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start : start + chunk_size]
+        placeholders = ", ".join("(" + ", ".join("?" for _ in key) + ")" for _ in chunk)
+        ids.update(
+            row[0]
+            for row in conn.execute(
+                f"""SELECT id FROM {table}
+                    WHERE ({", ".join(key)}) IN (VALUES {placeholders})""",
+                [value for values in chunk for value in values],
+            )
+        )
+    return ids
+
+
+def bulk_insert(
+    conn: sqlite3.Connection,
+    *,
+    table: str,
+    columns: Sequence[str],
+    rows: list[tuple[int, tuple]],
+    mode: BulkMode,
+    validation_errors: list[dict[str, Any]],
+    upsert_key: Sequence[str] = (),
+) -> BulkResult:
+    """Insert pre-validated ``(index, values)`` rows in a single transaction.
+
+    Atomic mode writes everything or nothing and raises ``BulkWriteError``
+    listing every rejected item. Best-effort mode keeps the valid rows and
+    reports the rest. Either way the fast path is one multi-row statement;
+    rows are retried one by one under savepoints only when a constraint fails,
+    to pin down which items were rejected.
+
+    With ``upsert_key`` (columns of a unique index on a table keyed by
+    ``id``), rows matching an
+    existing key overwrite it and are reported as ``updated``; a key
+    repeated within the batch keeps its last occurrence.
+    """
+    if mode == "atomic" and validation_errors:
+        raise BulkWriteError(validation_errors)
+    on_conflict = ""
+    existing: set[int] = set()
+    if upsert_key:
+        positions = [columns.index(column) for column in upsert_key]
+        by_key = {
+            tuple(row[position] for position in positions): (index, row)
+            for index, row in rows
+        }
+        rows = sorted(by_key.values(), key=lambda item: item[0])
+        on_conflict = _upsert_clause(columns, upsert_key)
+        existing = _existing_ids(conn, table, upsert_key, list(by_key))
+    if not rows:
+        return BulkResult(errors=list(validation_errors))
+
+    try:
+        created = _insert_many(
+            conn, table, columns, [row for _, row in rows], on_conflict
+        )
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        result = _insert_each(conn, table, columns, rows, on_conflict)
+        if mode == "atomic":
+            conn.rollback()
+            raise BulkWriteError(result.errors) from None
+    else:
+        result = BulkResult(created=created)
+
+    conn.commit()
+    if upsert_key:
+        written = result.created
+        result.created = [row for row in written if row["id"] not in existing]
+        result.updated = [row for row in written if row["id"] in existing]
+    result.errors = sorted(
+        [*validation_errors, *result.errors], key=lambda error: error["index"]
+    )
+    return result
+
+
+class BulkRequest(BaseModel):
+    mode: BulkMode = "atomic"
+    # Items are validated individually so best-effort mode can report
+    # per-item errors instead of rejecting the whole request.
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+def model_rows(
+    items: list[tuple[int, ModelT]], to_row: Callable[[ModelT], tuple]
+) -> list[tuple[int, tuple]]:
+    return [(index, to_row(item)) for index, item in items]
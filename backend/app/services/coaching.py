@@ -2,8 +2,13 @@ from __future__ import annotations
 
 import json
 import sqlite3
+from collections.abc import Iterable, Sequence
 from datetime import date, timedelta
-from typing import Literal
+from typing import Literal, Optional
+
+from .asof import targets_by_day
+from .date_ranges import backfill_days, date_runs
+from .pagination import Page, keyset_page
 
 
 DigestType = Literal["daily", "weekly"]
@@ -15,104 +20,134 @@ def _safe_number(value: float | None, digits: int = 0) -> float | None:
     return round(float(value), digits)
 
 
-def _load_targets(conn: sqlite3.Connection, target: date) -> dict[str, float]:
-    rows = conn.execute(
-        """SELECT t1.metric, t1.value
-           FROM targets t1
-           WHERE t1.effective_date = (
-             SELECT MAX(t2.effective_date)
-             FROM targets t2
-             WHERE t2.metric = t1.metric
-               AND t2.effective_date <= ?
-           )""",
-        (target.isoformat(),),
+_CALENDAR = """days(day) AS (
+    SELECT ?
+    UNION ALL
+    SELECT date(day, '+1 day') FROM days WHERE day < ?
+)"""
+
+
+def _daily_inputs(
+    conn: sqlite3.Connection, start: date, end: date
+) -> list[sqlite3.Row]:
+    """One row per day with that day's food, sleep and training totals."""
+    start_s, end_s = start.isoformat(), end.isoformat()
+    return conn.execute(
+        f"""WITH RECURSIVE {_CALENDAR},
+            food AS (
+              SELECT
+                recorded_date,
+                ROUND(SUM(calories), 0) AS calories,
+                ROUND(SUM(protein_g), 1) AS protein_g,
+                ROUND(SUM(sodium_mg), 0) AS sodium_mg,
+                ROUND(SUM(alcohol_calories), 0) AS alcohol_calories,
+                COUNT(*) AS entry_count
+              FROM food_entries
+              WHERE recorded_date BETWEEN ? AND ?
+                AND deleted_at IS NULL
+              GROUP BY recorded_date
+            ),
+            exercise AS (
+              SELECT
+                recorded_date,
+                COUNT(*) AS session_count,
+                ROUND(SUM(duration_min), 0) AS duration_min
+              FROM exercise_sessions
+              WHERE recorded_date BETWEEN ? AND ?
+                AND deleted_at IS NULL
+              GROUP BY recorded_date
+            )
+            SELECT
+              d.day,
+              f.calories,
+              f.protein_g,
+              f.sodium_mg,
+              f.alcohol_calories,
+              COALESCE(f.entry_count, 0) AS entry_count,
+              s.id IS NOT NULL AS has_sleep,
+              s.duration_min AS sleep_duration_min,
+              s.sleep_score,
+              s.readiness_score,
+              COALESCE(e.session_count, 0) AS session_count,
+              e.duration_min AS exercise_duration_min
+            FROM days d
+            LEFT JOIN food f ON f.recorded_date = d.day
+            LEFT JOIN sleep_records s ON s.recorded_date = d.day
+            LEFT JOIN exercise e ON e.recorded_date = d.day
+            ORDER BY d.day""",
+        (start_s, end_s, start_s, end_s, start_s, end_s),
     ).fetchall()
-    return {row["metric"]: float(row["value"]) for row in rows}
-
-
-def _persist_digest(
-    conn: sqlite3.Connection,
-    *,
-    digest_date: date,
-    digest_type: DigestType,
-    summary: str,
-    highlights: list[str],
-) -> dict:
-    conn.execute(
-        """INSERT INTO coaching_digests (digest_date, digest_type, summary, highlights)
-           VALUES (?, ?, ?, ?)
-           ON CONFLICT(digest_date, digest_type) DO UPDATE SET
-             summary=excluded.summary,
-             highlights=excluded.highlights""",
-        (
-            digest_date.isoformat(),
-            digest_type,
-            summary,
-            json.dumps(highlights),
-        ),
-    )
-    conn.commit()
-
-    row = conn.execute(
-        """SELECT *
-           FROM coaching_digests
-           WHERE digest_date = ?
-             AND digest_type = ?""",
-        (digest_date.isoformat(), digest_type),
-    ).fetchone()
-
-    return {
-        "id": row["id"],
-        "digest_date": row["digest_date"],
-        "digest_type": row["digest_type"],
-        "summary": row["summary"],
-        "highlights": json.loads(row["highlights"] or "[]"),
-        "created_at": row["created_at"],
-    }
-
 
-def generate_daily_digest(conn: sqlite3.Connection, *, target: date) -> dict:
-    day = target.isoformat()
-    targets = _load_targets(conn, target)
-
-    food = conn.execute(
-        """SELECT
-             ROUND(SUM(calories), 0) AS calories,
-             ROUND(SUM(protein_g), 1) AS protein_g,
-             ROUND(SUM(sodium_mg), 0) AS sodium_mg,
-             ROUND(SUM(alcohol_calories), 0) AS alcohol_calories,
-             COUNT(*) AS entry_count
-           FROM food_entries
-           WHERE recorded_date = ?
-             AND deleted_at IS NULL""",
-        (day,),
-    ).fetchone()
 
-    sleep = conn.execute(
-        """SELECT duration_min, sleep_score, readiness_score
-           FROM sleep_records
-           WHERE recorded_date = ?
-           ORDER BY CASE source WHEN 'oura' THEN 0 ELSE 1 END, created_at DESC
-           LIMIT 1""",
-        (day,),
-    ).fetchone()
+def _weekly_inputs(
+    conn: sqlite3.Connection, start: date, end: date
+) -> list[sqlite3.Row]:
+    """One row per ending day with trailing 7-day food, training and sleep.
+
+    Days are laid out densely from six days before ``start`` so each window
+    is a fixed ``ROWS 6 PRECEDING`` frame; AVG/COUNT skip days without rows.
+    """
+    lead_in = (start - timedelta(days=6)).isoformat()
+    start_s, end_s = start.isoformat(), end.isoformat()
+    return conn.execute(
+        f"""WITH RECURSIVE {_CALENDAR},
+            food AS (
+              SELECT
+                recorded_date,
+                SUM(calories) AS day_calories,
+                SUM(protein_g) AS day_protein,
+                SUM(sodium_mg) AS day_sodium,
+                SUM(alcohol_calories) AS day_alcohol
+              FROM food_entries
+              WHERE recorded_date BETWEEN ? AND ?
+                AND deleted_at IS NULL
+              GROUP BY recorded_date
+            ),
+            exercise AS (
+              SELECT
+                recorded_date,
+                COUNT(*) AS sessions,
+                SUM(duration_min) AS duration_min,
+                SUM(calories_burned) AS calories_burned
+              FROM exercise_sessions
+              WHERE recorded_date BETWEEN ? AND ?
+                AND deleted_at IS NULL
+              GROUP BY recorded_date
+            ),
+            windows AS (
+              SELECT
+                d.day,
+                ROUND(AVG(f.day_calories) OVER week, 0) AS avg_calories,
+                ROUND(AVG(f.day_protein) OVER week, 1) AS avg_protein_g,
+                ROUND(AVG(f.day_sodium) OVER week, 0) AS avg_sodium_mg,
+                ROUND(SUM(f.day_alcohol) OVER week, 0) AS alcohol_calories_total,
+                COUNT(f.recorded_date) OVER week AS days_with_food,
+                COALESCE(SUM(e.sessions) OVER week, 0) AS session_count,
+                ROUND(SUM(e.duration_min) OVER week, 0) AS total_duration_min,
+                ROUND(SUM(e.calories_burned) OVER week, 0) AS total_calories_burned,
+                ROUND(AVG(s.duration_min) OVER week, 1) AS avg_sleep_min,
+                ROUND(AVG(s.sleep_score) OVER week, 1) AS avg_sleep_score,
+                ROUND(AVG(s.readiness_score) OVER week, 1) AS avg_readiness
+              FROM days d
+              LEFT JOIN food f ON f.recorded_date = d.day
+              LEFT JOIN exercise e ON e.recorded_date = d.day
+              LEFT JOIN sleep_records s ON s.recorded_date = d.day
+              WINDOW week AS (ORDER BY d.day ROWS BETWEEN 6 PRECEDING AND CURRENT ROW)
+            )
+            SELECT * FROM windows WHERE day >= ? ORDER BY day""",
+        (lead_in, end_s, lead_in, end_s, lead_in, end_s, start_s),
+    ).fetchall()
 
-    exercise = conn.execute(
-        """SELECT
-             COUNT(*) AS session_count,
-             ROUND(SUM(duration_min), 0) AS duration_min
-           FROM exercise_sessions
-           WHERE recorded_date = ?
-             AND deleted_at IS NULL""",
-        (day,),
-    ).fetchone()
 
+def _daily_content(
+    day: str, targets: dict[str, float], row: sqlite3.Row
+) -> tuple[str, list[str]]:
     highlights: list[str] = []
-    calories = food["calories"]
-    protein = food["protein_g"]
-    sodium = food["sodium_mg"]
-    alcohol = food["alcohol_calories"]
-    entry_count = int(food["entry_count"] or 0)
+    calories = row["calories"]
+    protein = row["protein_g"]
+    sodium = row["sodium_mg"]
+    alcohol = row["alcohol_calories"]
+    entry_count = int(row["entry_count"] or 0)
 
     if entry_count > 0:
         calories_target = targets.get("calories")
@@ -139,10 +174,10 @@ def generate_daily_digest(conn: sqlite3.Connection, *, target: date) -> dict:
     else:
         highlights.append("No nutrition entries logged today.")
 
-    if sleep:
-        sleep_duration = sleep["duration_min"]
-        sleep_score = sleep["sleep_score"]
-        readiness = sleep["readiness_score"]
+    sleep_score = row["sleep_score"]
+    if row["has_sleep"]:
+        sleep_duration = row["sleep_duration_min"]
+        readiness = row["readiness_score"]
         if sleep_duration is not None:
             highlights.append(
                 f"Sleep: {round(float(sleep_duration) / 60, 1)} h"
@@ -153,9 +188,9 @@ def generate_daily_digest(conn: sqlite3.Connection, *, target: date) -> dict:
     else:
         highlights.append("No sleep record for this date.")
 
-    session_count = int(exercise["session_count"] or 0)
+    session_count = int(row["session_count"] or 0)
     if session_count > 0:
-        duration = int(exercise["duration_min"] or 0)
+        duration = int(row["exercise_duration_min"] or 0)
         highlights.append(
             f"Training: {session_count} session(s), {duration} total minutes."
         )
@@ -166,73 +201,21 @@ def generate_daily_digest(conn: sqlite3.Connection, *, target: date) -> dict:
         f"Daily digest for {day}: "
         f"{entry_count} food entries, {session_count} workouts, "
         + (
-            f"sleep score {sleep['sleep_score']}."
-            if sleep and sleep["sleep_score"] is not None
+            f"sleep score {sleep_score}."
+            if sleep_score is not None
             else "sleep score unavailable."
         )
     )
-    return _persist_digest(
-        conn,
-        digest_date=target,
-        digest_type="daily",
-        summary=summary,
-        highlights=highlights[:6],
-    )
-
+    return summary, highlights[:6]
 
-def generate_weekly_digest(conn: sqlite3.Connection, *, ending: date) -> dict:
-    start = ending - timedelta(days=6)
-    start_s = start.isoformat()
-    end_s = ending.isoformat()
-    targets = _load_targets(conn, ending)
-
-    food = conn.execute(
-        """SELECT
-             ROUND(AVG(day_calories), 0) AS avg_calories,
-             ROUND(AVG(day_protein), 1) AS avg_protein_g,
-             ROUND(AVG(day_sodium), 0) AS avg_sodium_mg,
-             ROUND(SUM(day_alcohol), 0) AS alcohol_calories_total,
-             COUNT(*) AS days_with_food
-           FROM (
-             SELECT
-               recorded_date,
-               SUM(calories) AS day_calories,
-               SUM(protein_g) AS day_protein,
-               SUM(sodium_mg) AS day_sodium,
-               SUM(alcohol_calories) AS day_alcohol
-             FROM food_entries
-             WHERE recorded_date BETWEEN ? AND ?
-               AND deleted_at IS NULL
-             GROUP BY recorded_date
-           )""",
-        (start_s, end_s),
-    ).fetchone()
-
-    exercise = conn.execute(
-        """SELECT
-             COUNT(*) AS session_count,
-             ROUND(SUM(duration_min), 0) AS total_duration_min,
-             ROUND(SUM(calories_burned), 0) AS total_calories_burned
-           FROM exercise_sessions
-           WHERE recorded_date BETWEEN ? AND ?
-             AND deleted_at IS NULL""",
-        (start_s, end_s),
-    ).fetchone()
-
-    sleep = conn.execute(
-        """SELECT
-             ROUND(AVG(duration_min), 1) AS avg_sleep_min,
-             ROUND(AVG(sleep_score), 1) AS avg_sleep_score,
-             ROUND(AVG(readiness_score), 1) AS avg_readiness
-           FROM sleep_records
-           WHERE recorded_date BETWEEN ? AND ?""",
-        (start_s, end_s),
-    ).fetchone()
 
+def _weekly_content(
+    start_s: str, end_s: str, targets: dict[str, float], row: sqlite3.Row
+) -> tuple[str, list[str]]:
     highlights: list[str] = []
-    avg_calories = food["avg_calories"]
-    avg_protein = food["avg_protein_g"]
-    avg_sodium = food["avg_sodium_mg"]
+    avg_calories = row["avg_calories"]
+    avg_protein = row["avg_protein_g"]
+    avg_sodium = row["avg_sodium_mg"]
     if avg_calories is not None:
         calories_target = targets.get("calories")
         calorie_line = f"Average calories/day: {int(avg_calories)}"
@@ -254,22 +237,22 @@ def generate_weekly_digest(conn: sqlite3.Connection, *, ending: date) -> dict:
             f"Average sodium/day: {int(avg_sodium)} mg ({gap:+} vs {int(targets['sodium_mg'])} mg target)."
         )
 
-    session_count = int(exercise["session_count"] or 0)
+    session_count = int(row["session_count"] or 0)
     if session_count > 0:
-        total_duration = int(exercise["total_duration_min"] or 0)
+        total_duration = int(row["total_duration_min"] or 0)
         highlights.append(
             f"Training volume: {session_count} sessions and {total_duration} minutes."
         )
     else:
         highlights.append("No training sessions logged this week.")
 
-    avg_sleep_min = sleep["avg_sleep_min"]
+    avg_sleep_min = row["avg_sleep_min"]
     if avg_sleep_min is not None:
         highlights.append(
             f"Average sleep: {round(float(avg_sleep_min) / 60, 1)} h/night"
             + (
-                f", score {sleep['avg_sleep_score']}"
-                if sleep["avg_sleep_score"] is not None
+                f", score {row['avg_sleep_score']}"
+                if row["avg_sleep_score"] is not None
                 else ""
             )
             + "."
@@ -286,37 +269,182 @@ def generate_weekly_digest(conn: sqlite3.Connection, *, ending: date) -> dict:
             else "no nutrition averages yet."
         )
     )
-    return _persist_digest(
-        conn,
-        digest_date=ending,
-        digest_type="weekly",
-        summary=summary,
-        highlights=highlights[:6],
+    return summary, highlights[:6]
+
+
+def build_digests(
+    conn: sqlite3.Connection,
+    *,
+    start: date,
+    end: date,
+    digest_types: Sequence[DigestType] = ("daily", "weekly"),
+) -> list[tuple[str, DigestType, str, list[str]]]:
+    """``(digest_date, digest_type, summary, highlights)`` for every day.
+
+    Inputs for the whole range come from one query per digest type, and
+    the rules run in memory.
+    """
+    days = backfill_days(start, end)
+    targets = targets_by_day(conn, days)
+    digests: list[tuple[str, DigestType, str, list[str]]] = []
+    if "daily" in digest_types:
+        for day, row in zip(days, _daily_inputs(conn, start, end)):
+            summary, highlights = _daily_content(row["day"], targets[day], row)
+            digests.append((row["day"], "daily", summary, highlights))
+    if "weekly" in digest_types:
+        for day, row in zip(days, _weekly_inputs(conn, start, end)):
+            week_start = (day - timedelta(days=6)).isoformat()
+            summary, highlights = _weekly_content(
+                week_start, row["day"], targets[day], row
+            )
+            digests.append((row["day"], "weekly", summary, highlights))
+    return digests
+
+
+def _persist_digests(
+    conn: sqlite3.Connection,
+    digests: list[tuple[str, DigestType, str, list[str]]],
+) -> None:
+    conn.executemany(
+        """INSERT INTO coaching_digests (digest_date, digest_type, summary, highlights)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT(digest_date, digest_type) DO UPDATE SET
+             summary=excluded.summary,
+             highlights=excluded.highlights""",
+        [
+            (digest_date, digest_type, summary, json.dumps(highlights))
+            for digest_date, digest_type, summary, highlights in digests
+        ],
     )
+    conn.commit()
 
 
-def get_latest_digests(conn: sqlite3.Connection) -> dict:
-    rows = conn.execute(
-        """SELECT id, digest_date, digest_type, summary, highlights, created_at
-           FROM coaching_digests
-           ORDER BY digest_type, digest_date DESC, id DESC"""
-    ).fetchall()
+DIGEST_COLUMNS = "id, digest_date, digest_type, summary, highlights, created_at"
+DIGEST_SELECT = f"SELECT {DIGEST_COLUMNS} FROM coaching_digests"
 
-    latest = {"daily": None, "weekly": None}
-    for row in rows:
-        digest_type = row["digest_type"]
-        if latest.get(digest_type) is not None:
-            continue
-        latest[digest_type] = {
-            "id": row["id"],
-            "digest_date": row["digest_date"],
-            "digest_type": digest_type,
-            "summary": row["summary"],
-            "highlights": json.loads(row["highlights"] or "[]"),
-            "created_at": row["created_at"],
-        }
-
-        if latest["daily"] is not None and latest["weekly"] is not None:
-            break
 
+def _digest_from_row(row: dict) -> dict:
+    # Only rows that are actually returned pay for the JSON decode.
+    return {**row, "highlights": json.loads(row["highlights"] or "[]")}
+
+
+def _load_digest(
+    conn: sqlite3.Connection, digest_date: date, digest_type: DigestType
+) -> dict:
+    row = conn.execute(
+        f"""{DIGEST_SELECT}
+            WHERE digest_date = ?
+              AND digest_type = ?""",
+        (digest_date.isoformat(), digest_type),
+    ).fetchone()
+    return _digest_from_row(dict(row))
+
+
+def generate_daily_digest(conn: sqlite3.Connection, *, target: date) -> dict:
+    _persist_digests(
+        conn, build_digests(conn, start=target, end=target, digest_types=("daily",))
+    )
+    return _load_digest(conn, target, "daily")
+
+
+def generate_weekly_digest(conn: sqlite3.Connection, *, ending: date) -> dict:
+    _persist_digests(
+        conn, build_digests(conn, start=ending, end=ending, digest_types=("weekly",))
+    )
+    return _load_digest(conn, ending, "weekly")
+
+
+def backfill_digests(
+    conn: sqlite3.Connection,
+    *,
+    start: date,
+    end: date,
+    digest_types: Sequence[DigestType] = ("daily", "weekly"),
+) -> dict:
+    """Regenerate digests for ``start..end`` and upsert them in one transaction."""
+    digests = build_digests(conn, start=start, end=end, digest_types=digest_types)
+    _persist_digests(conn, digests)
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "generated": {
+            digest_type: sum(1 for digest in digests if digest[1] == digest_type)
+            for digest_type in digest_types
+        },
+    }
+
+
+def refresh_stored_digests(
+    conn: sqlite3.Connection, days: Iterable[date], digest_type: DigestType
+) -> int:
+    """Rebuild the ``digest_type`` digests already stored for any of ``days``.
+
+    Days without a digest are left to the scheduled job or an explicit
+    generate call. Returns the digests rebuilt.
+    """
+    wanted = sorted({day.isoformat() for day in days})
+    if not wanted:
+        return 0
+    stored = [
+        date.fromisoformat(row["digest_date"])
+        for row in conn.execute(
+            f"""SELECT digest_date
+                FROM coaching_digests
+                WHERE digest_type = ?
+                  AND digest_date IN ({", ".join("?" for _ in wanted)})""",
+            (digest_type, *wanted),
+        )
+    ]
+    digests = [
+        digest
+        for start, end in date_runs(stored)
+        for digest in build_digests(
+            conn, start=start, end=end, digest_types=(digest_type,)
+        )
+    ]
+    _persist_digests(conn, digests)
+    return len(digests)
+
+
+def get_latest_digests(conn: sqlite3.Connection) -> dict:
+    """Newest digest of each type: one LIMIT 1 probe per type on
+    ``idx_coaching_digests_type_date``, so cost doesn't grow with history."""
+    latest: dict[str, Optional[dict]] = {}
+    for digest_type in ("daily", "weekly"):
+        row = conn.execute(
+            f"""{DIGEST_SELECT}
+                WHERE digest_type = ?
+                ORDER BY digest_date DESC, id DESC
+                LIMIT 1""",
+            (digest_type,),
+        ).fetchone()
+        latest[digest_type] = _digest_from_row(dict(row)) if row else None
     return latest
+
+
+def list_digests(
+    conn: sqlite3.Connection,
+    *,
+    digest_type: DigestType,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = 30,
+) -> Page:
+    """Newest-first page of one digest type, read as an index range."""
+    page = keyset_page(
+        conn,
+        table="coaching_digests",
+        columns=DIGEST_COLUMNS,
+        sort_key="digest_date",
+        where=["digest_type = ?"],
+        params=[digest_type],
+        date_from=start,
+        date_to=end,
+        cursor=cursor,
+        limit=limit,
+    )
+    return Page(
+        rows=[_digest_from_row(row) for row in page.rows],
+        next_cursor=page.next_cursor,
+    )
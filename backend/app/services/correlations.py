@@ -0,0 +1,235 @@
+"""Lagged cross-domain correlations over aligned daily vectors.
+
+Daily values come from the aggregate service (one grouped query per source
+table) and are stacked into a days x features matrix with NaN for days a
+feature wasn't recorded. For each lag, pairwise-complete Pearson
+coefficients for every feature pair are computed at once from masked matrix
+products, so the cost is a handful of BLAS calls regardless of history
+length. Confidence intervals use the Fisher transform.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional
+
+import numpy as np
+
+from .aggregates import FIELDS, Period, aggregate, parse_fields
+from .generations import GenerationCache
+
+
+@dataclass(frozen=True)
+class CorrelationFeature:
+    name: str
+    domain: str
+    # Days with no row mean "none" rather than "unknown" (no workout, no
+    # drinks). ``when_logged`` limits that to days where the named feature
+    # was recorded, so alcohol isn't assumed zero on days with no food log.
+    fill_zero: bool = False
+    when_logged: Optional[str] = None
+
+
+FEATURES = (
+    CorrelationFeature("calories", "food"),
+    CorrelationFeature("protein_g", "food"),
+    CorrelationFeature("carbs_g", "food"),
+    CorrelationFeature("fat_g", "food"),
+    CorrelationFeature("sodium_mg", "food"),
+    CorrelationFeature(
+        "alcohol_calories", "food", fill_zero=True, when_logged="calories"
+    ),
+    CorrelationFeature("exercise_min", "training", fill_zero=True),
+    CorrelationFeature("zone12_min", "training", fill_zero=True),
+    CorrelationFeature("zone_min", "training", fill_zero=True),
+    CorrelationFeature("sleep_score", "sleep"),
+    CorrelationFeature("duration_min", "sleep"),
+    CorrelationFeature("deep_min", "sleep"),
+    CorrelationFeature("hrv", "sleep"),
+    CorrelationFeature("resting_hr", "sleep"),
+    CorrelationFeature("readiness_score", "sleep"),
+    CorrelationFeature("steps", "activity"),
+    CorrelationFeature("cpap_ahi", "sleep"),
+)
+# exercise_hr_zones joins through exercise_sessions, so both invalidate.
+SOURCE_TABLES = tuple(
+    dict.fromkeys(
+        [FIELDS[feature.name].source for feature in FEATURES] + ["exercise_sessions"]
+    )
+)
+Z_95 = 1.959964
+
+_cache: GenerationCache[dict[str, Any]] = GenerationCache(SOURCE_TABLES)
+
+
+def earliest_date(conn: sqlite3.Connection) -> Optional[date]:
+    row = conn.execute(
+        """SELECT MIN(first_date) FROM (
+               SELECT MIN(recorded_date) AS first_date FROM food_entries
+               UNION ALL SELECT MIN(recorded_date) FROM sleep_records
+               UNION ALL SELECT MIN(recorded_date) FROM exercise_sessions
+               UNION ALL SELECT MIN(recorded_date) FROM body_metrics
+           )"""
+    ).fetchone()
+    return date.fromisoformat(row[0]) if row and row[0] else None
+
+
+def load_matrix(
+    conn: sqlite3.Connection, start: date, end: date
+) -> tuple[list[str], np.ndarray]:
+    """Days x features matrix for ``start..end`` with NaN for missing days."""
+    result = aggregate(
+        conn,
+        fields=parse_fields([feature.name for feature in FEATURES]),
+        current=Period("current", start, end),
+        granularity="day",
+    )
+    (period,) = result["periods"]
+    columns = {
+        name: np.array(
+            [np.nan if value is None else value for value in values], dtype=float
+        )
+        for name, values in period["values"].items()
+    }
+    for feature in FEATURES:
+        if not feature.fill_zero:
+            continue
+        column = columns[feature.name]
+        missing = np.isnan(column)
+        if feature.when_logged:
+            missing &= ~np.isnan(columns[feature.when_logged])
+        column[missing] = 0.0
+    return period["buckets"], np.column_stack(
+        [columns[feature.name] for feature in FEATURES]
+    )
+
+
+def lagged_correlations(matrix: np.ndarray, lag: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pairwise-complete Pearson r and n for X[t] against X[t + lag].
+
+    Entry ``[i, j]`` correlates feature ``i`` on a day with feature ``j``
+    ``lag`` days later.
+    """
+    leading = matrix[: len(matrix) - lag] if lag else matrix
+    lagging = matrix[lag:]
+    lead_mask = (~np.isnan(leading)).astype(float)
+    lag_mask = (~np.isnan(lagging)).astype(float)
+    lead = np.nan_to_num(leading)
+    lagged = np.nan_to_num(lagging)
+
+    n = lead_mask.T @ lag_mask
+    sum_a = lead.T @ lag_mask
+    sum_b = lead_mask.T @ lagged
+    sum_aa = (lead * lead).T @ lag_mask
+    sum_bb = lead_mask.T @ (lagged * lagged)
+    sum_ab = lead.T @ lagged
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sum_ab - sum_a * sum_b
+        var_a = n * sum_aa - sum_a * sum_a
+        var_b = n * sum_bb - sum_b * sum_b
+        r = cov / np.sqrt(var_a * var_b)
+    r[(var_a <= 0) | (var_b <= 0)] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+def fisher_interval(
+    r: np.ndarray, n: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """95% CI bounds and two-sided p-values for correlation coefficients."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.arctanh(np.clip(r, -0.999999, 0.999999))
+        se = 1.0 / np.sqrt(n - 3)
+        low = np.tanh(z - Z_95 * se)
+        high = np.tanh(z + Z_95 * se)
+        stat = np.abs(z) / se
+    p = np.array([math.erfc(value / math.sqrt(2)) for value in stat.ravel()])
+    return low, high, p.reshape(r.shape)
+
+
+def _round(value: float, digits: int = 3) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), digits)
+
+
+def compute_correlations(
+    conn: sqlite3.Connection,
+    *,
+    start: date,
+    end: date,
+    max_lag: int = 2,
+    min_days: int = 14,
+    top: int = 20,
+) -> dict[str, Any]:
+    days, matrix = load_matrix(conn, start, end)
+    names = [feature.name for feature in FEATURES]
+    domains = [feature.domain for feature in FEATURES]
+
+    matrices: list[list[list[Optional[float]]]] = []
+    effects: list[dict[str, Any]] = []
+    for lag in range(max_lag + 1):
+        if lag >= len(matrix):
+            break
+        r, n = lagged_correlations(matrix, lag)
+        low, high, p = fisher_interval(r, n)
+        matrices.append([[_round(value) for value in row] for row in r])
+
+        # Cross-domain pairs only; same-day pairs are symmetric, so keep one.
+        for i, j in zip(*np.nonzero(n >= min_days)):
+            if domains[i] == domains[j] or math.isnan(r[i, j]):
+                continue
+            if lag == 0 and i > j:
+                continue
+            effects.append(
+                {
+                    "feature": names[i],
+                    "outcome": names[j],
+                    "lag_days": lag,
+                    "r": _round(r[i, j]),
+                    "ci_low": _round(low[i, j]),
+                    "ci_high": _round(high[i, j]),
+                    "p_value": _round(p[i, j], 4),
+                    "n": int(n[i, j]),
+                }
+            )
+
+    # Rank by how far the interval sits from zero, so strong but noisy
+    # pairs don't outrank consistent ones.
+    def strength(effect: dict[str, Any]) -> float:
+        if effect["ci_low"] > 0:
+            return effect["ci_low"]
+        if effect["ci_high"] < 0:
+            return -effect["ci_high"]
+        return 0.0
+
+    effects.sort(key=lambda effect: (strength(effect), abs(effect["r"])), reverse=True)
+    return {
+        "from": str(start),
+        "to": str(end),
+        "days": len(days),
+        "features": names,
+        "lags": list(range(len(matrices))),
+        "matrices": matrices,
+        "effects": effects[:top],
+    }
+
+
+def get_correlations(
+    conn: sqlite3.Connection,
+    *,
+    start: date,
+    end: date,
+    max_lag: int = 2,
+    min_days: int = 14,
+    top: int = 20,
+) -> dict[str, Any]:
+    """``compute_correlations``, cached until a source table changes."""
+    return _cache.get_or_compute(
+        conn,
+        (start, end, max_lag, min_days, top),
+        lambda: compute_correlations(
+            conn, start=start, end=end, max_lag=max_lag, min_days=min_days, top=top
+        ),
+    )
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+
+class BackfillRangeError(ValueError):
+    pass
+
+
+# Generous enough to regenerate a couple of years after a rule change.
+MAX_BACKFILL_DAYS = 1096
+
+
+def backfill_days(start: date, end: date) -> list[date]:
+    if start > end:
+        raise BackfillRangeError("from must be on or before to")
+    span = (end - start).days + 1
+    if span > MAX_BACKFILL_DAYS:
+        raise BackfillRangeError(f"Backfill at most {MAX_BACKFILL_DAYS} days")
+    return [start + timedelta(days=offset) for offset in range(span)]
+
+
+def date_runs(days: Iterable[date]) -> list[tuple[date, date]]:
+    """Split ``days`` into runs of consecutive days, each a valid backfill."""
+    runs: list[tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs:
+            start, end = runs[-1]
+            if (
+                day == end + timedelta(days=1)
+                and (day - start).days < MAX_BACKFILL_DAYS
+            ):
+                runs[-1] = (start, day)
+                continue
+        runs.append((day, day))
+    return runs
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+
+class Subscription:
+    """A single listener's queue, bound to the event loop that created it."""
+
+    def __init__(self, broker: EventBroker, max_pending: int):
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[Optional[dict[str, Any]]] = asyncio.Queue(
+            maxsize=max_pending
+        )
+        self.dropped = 0
+
+    def _offer(self, event: Optional[dict[str, Any]]) -> None:
+        # Runs on the subscriber's loop. Slow readers lose their oldest events
+        # rather than applying back-pressure to the write paths.
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    def deliver(self, event: Optional[dict[str, Any]]) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            # Loop already closed; the stream is gone.
+            self._broker.unsubscribe(self)
+
+    async def get(self) -> Optional[dict[str, Any]]:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process fan-out of data change notifications.
+
+    ``publish`` is safe to call from sync endpoints running on the threadpool;
+    delivery is handed to each subscriber's event loop.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+        self._ids = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, max_pending: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self, max_pending or self._max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(
+        self,
+        event_type: str,
+        *,
+        source: str,
+        tables: Iterable[str] = (),
+        dates: Iterable[date | str] = (),
+    ) -> dict[str, Any]:
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "source": source,
+            "tables": sorted(set(tables)),
+            "dates": sorted({str(value) for value in dates if value}),
+            "emitted_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscription in subscribers:
+            subscription.deliver(None)
+
+
+broker = EventBroker()
+
+
+def publish_change(
+    source: str,
+    *,
+    tables: Iterable[str],
+    dates: Iterable[date | str],
+) -> dict[str, Any]:
+    return broker.publish("data_changed", source=source, tables=tables, dates=dates)
+
+
+def format_sse(event: dict[str, Any]) -> str:
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+    )
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import string
+from typing import Any, Optional
+
+
+MACRO_COLUMNS = (
+    "calories",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "fiber_g",
+    "sodium_mg",
+    "alcohol_g",
+    "alcohol_calories",
+)
+
+_per_serving = ",\n             ".join(
+    f"{column} / COALESCE(NULLIF(servings, 0), 1)" for column in MACRO_COLUMNS
+)
+_macro_updates = ",\n             ".join(
+    f"{column}=excluded.{column}" for column in MACRO_COLUMNS
+)
+
+_REFRESH_SQL = f"""
+    WITH live AS (
+        SELECT
+            *,
+            lower(trim(name)) AS normalized_name,
+            ROW_NUMBER() OVER (
+                PARTITION BY lower(trim(name))
+                ORDER BY recorded_date DESC, id DESC
+            ) AS recency,
+            COUNT(*) OVER (PARTITION BY lower(trim(name))) AS use_count
+        FROM food_entries
+        WHERE deleted_at IS NULL
+          AND lower(trim(name)) IN (SELECT normalized_name FROM food_catalog_pending)
+    )
+    INSERT INTO food_catalog
+        (normalized_name, name, meal_type, {", ".join(MACRO_COLUMNS)},
+         alcohol_type, servings, use_count, last_used_date, last_entry_id)
+    SELECT
+        normalized_name,
+        trim(name),
+        meal_type,
+        {_per_serving},
+        alcohol_type,
+        servings,
+        use_count,
+        recorded_date,
+        id
+    FROM live
+    WHERE recency = 1
+    ON CONFLICT(normalized_name) DO UPDATE SET
+        name=excluded.name,
+        meal_type=excluded.meal_type,
+        {_macro_updates},
+        alcohol_type=excluded.alcohol_type,
+        servings=excluded.servings,
+        use_count=excluded.use_count,
+        last_used_date=excluded.last_used_date,
+        last_entry_id=excluded.last_entry_id,
+        updated_at=datetime('now')
+"""
+
+_ORPHANED = """
+    normalized_name IN (SELECT normalized_name FROM food_catalog_pending)
+    AND NOT EXISTS (
+        SELECT 1 FROM food_entries fe
+        WHERE lower(trim(fe.name)) = food_catalog.normalized_name
+          AND fe.deleted_at IS NULL
+    )
+"""
+
+
+def refresh_catalog(conn: sqlite3.Connection) -> int:
+    """Fold queued name changes from food_entries into the catalog.
+
+    Each queued name is recomputed from its live entries in one grouped
+    statement, so inserts, edits, renames and deletes all converge. Names with
+    no live entries are dropped unless favorited. Returns the names processed.
+    """
+    pending = conn.execute("SELECT COUNT(*) FROM food_catalog_pending").fetchone()[0]
+    if not pending:
+        return 0
+    conn.execute(_REFRESH_SQL)
+    conn.execute(
+        f"""UPDATE food_catalog
+            SET use_count = 0, last_entry_id = NULL, updated_at = datetime('now')
+            WHERE is_favorite = 1 AND {_ORPHANED}"""
+    )
+    conn.execute(f"DELETE FROM food_catalog WHERE is_favorite = 0 AND {_ORPHANED}")
+    conn.execute("DELETE FROM food_catalog_pending")
+    conn.commit()
+    return pending
+
+
+# SQLite's lower() only folds ASCII letters.
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize_name(name: str) -> str:
+    """The catalog key, computed exactly as ``lower(trim(name))`` in SQL."""
+    return name.strip(" ").translate(_ASCII_LOWER)
+
+
+def _fts_query(text: str) -> Optional[str]:
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return None
+    # Every term must match; the last one is still being typed.
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_catalog(
+    conn: sqlite3.Connection,
+    *,
+    query: Optional[str],
+    limit: int,
+    favorites_only: bool = False,
+) -> list[dict[str, Any]]:
+    refresh_catalog(conn)
+    favorite_filter = "AND is_favorite = 1" if favorites_only else ""
+    if not query or not query.strip():
+        rows = conn.execute(
+            f"""SELECT *
+                FROM food_catalog
+                WHERE 1 = 1 {favorite_filter}
+                ORDER BY is_favorite DESC, last_used_date DESC, use_count DESC
+                LIMIT ?""",
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    prefix = normalize_name(query)
+    params: list[Any] = [prefix, prefix]
+    fts_branch = ""
+    fts_query = _fts_query(query)
+    if fts_query:
+        fts_branch = """
+                UNION ALL
+                SELECT rowid AS id, 1 AS rank_group
+                FROM food_catalog_fts
+                WHERE food_catalog_fts MATCH ?"""
+        params.append(fts_query)
+    params.append(limit)
+    # Whole-name prefix hits ("chicken b" -> "chicken bowl") rank ahead of
+    # word-level FTS hits ("bowl" -> "chicken bowl").
+    rows = conn.execute(
+        f"""WITH hits AS (
+                SELECT id, 0 AS rank_group
+                FROM food_catalog
+                WHERE normalized_name >= ? AND normalized_name < ? || char(1114111)
+                {fts_branch}
+            )
+            SELECT fc.*
+            FROM food_catalog fc
+            JOIN (SELECT id, MIN(rank_group) AS rank_group FROM hits GROUP BY id) h
+              ON h.id = fc.id
+            WHERE 1 = 1 {favorite_filter}
+            ORDER BY h.rank_group, fc.is_favorite DESC, fc.use_count DESC,
+                     fc.last_used_date DESC
+            LIMIT ?""",
+        params,
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_catalog_item(
+    conn: sqlite3.Connection, catalog_id: int
+) -> Optional[dict[str, Any]]:
+    refresh_catalog(conn)
+    row = conn.execute(
+        "SELECT * FROM food_catalog WHERE id = ?", (catalog_id,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def scaled_macros(item: dict[str, Any], servings: float) -> dict[str, Any]:
+    return {
+        column: round(item[column] * servings, 2) if item[column] is not None else None
+        for column in MACRO_COLUMNS
+    }
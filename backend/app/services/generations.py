@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from typing import Generic, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+Generation = tuple[int, ...]
+
+
+def data_generation(conn: sqlite3.Connection, tables: Sequence[str]) -> Generation:
+    """Current change counters for ``tables``, in the order given."""
+    placeholders = ", ".join("?" for _ in tables)
+    counters = dict(
+        conn.execute(
+            f"""SELECT source_table, generation
+                FROM data_generations
+                WHERE source_table IN ({placeholders})""",
+            tuple(tables),
+        ).fetchall()
+    )
+    return tuple(counters.get(table, 0) for table in tables)
+
+
+def _database_file(conn: sqlite3.Connection) -> str:
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+class GenerationCache(Generic[T]):
+    """Small in-process LRU whose entries are valid for one data generation.
+
+    Entries are computed from a set of source tables; a lookup whose current
+    generation differs from the stored one recomputes and replaces it.
+    """
+
+    def __init__(self, tables: Sequence[str], max_entries: int = 32):
+        self.tables = tuple(tables)
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[Generation, T]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(
+        self, conn: sqlite3.Connection, key: Hashable
+    ) -> tuple[Hashable, Generation, Optional[T]]:
+        """``(cache key, current generation, value or None if stale)``.
+
+        Keys are scoped to the database file so connections to different
+        databases never share entries.
+        """
+        scoped = (_database_file(conn), key)
+        generation = data_generation(conn, self.tables)
+        with self._lock:
+            cached = self._entries.get(scoped)
+            if cached is not None and cached[0] == generation:
+                self._entries.move_to_end(scoped)
+                self.hits += 1
+                return scoped, generation, cached[1]
+            self.misses += 1
+        return scoped, generation, None
+
+    def store(self, scoped: Hashable, generation: Generation, value: T) -> None:
+        with self._lock:
+            self._entries[scoped] = (generation, value)
+            self._entries.move_to_end(scoped)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(
+        self, conn: sqlite3.Connection, key: Hashable, compute: Callable[[], T]
+    ) -> T:
+        scoped, generation, value = self.lookup(conn, key)
+        if value is None:
+            value = compute()
+            # Tagged with the generation read before computing, so a write
+            # that lands mid-compute forces a recompute next time.
+            self.store(scoped, generation, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,290 @@
+"""Progress toward every active goal, evaluated in one pass.
+
+Goals are grouped by metric and each metric's daily series is read once:
+food, sleep and training metrics through the aggregate service's per-day
+queries, anything else straight from ``body_metrics``. The series are
+stacked into a metrics x days matrix and every statistic (current value,
+baseline, least-squares trend, projected completion) is computed for all
+goals at once with NumPy. Results are cached until goals or any source
+table change.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from collections.abc import Sequence
+from datetime import date, timedelta
+from typing import Any, Optional
+
+import numpy as np
+
+from .aggregates import FIELDS, MAX_FIELDS, Period, aggregate, parse_fields
+from .generations import GenerationCache
+from .timeseries import fetch_buckets
+
+
+CURRENT_DAYS = 7
+TREND_DAYS = 28
+MIN_TREND_POINTS = 3
+MAX_LOOKBACK_DAYS = 365
+MAX_ETA_DAYS = 3 * 365
+# Days with food logged but no drinks are zero, not missing.
+ZERO_WHEN_FOOD_LOGGED = ("alcohol_g", "alcohol_calories")
+
+SOURCE_TABLES = tuple(
+    dict.fromkeys(
+        ["goals", *(field.source for field in FIELDS.values()), "body_metrics"]
+    )
+)
+
+_cache: GenerationCache[dict[str, Any]] = GenerationCache(SOURCE_TABLES, max_entries=4)
+
+
+def _aggregate_series(
+    conn: sqlite3.Connection, metrics: Sequence[str], start: date, end: date
+) -> dict[str, np.ndarray]:
+    names = list(metrics)
+    if any(metric in ZERO_WHEN_FOOD_LOGGED for metric in names):
+        names.append("food_entry_count")
+    columns: dict[str, np.ndarray] = {}
+    for offset in range(0, len(names), MAX_FIELDS):
+        result = aggregate(
+            conn,
+            fields=parse_fields(names[offset : offset + MAX_FIELDS]),
+            current=Period("current", start, end),
+            granularity="day",
+        )
+        (period,) = result["periods"]
+        for name, values in period["values"].items():
+            columns[name] = np.array(
+                [np.nan if value is None else value for value in values], dtype=float
+            )
+    logged = columns.pop("food_entry_count", None)
+    for metric in ZERO_WHEN_FOOD_LOGGED:
+        if metric in columns and logged is not None:
+            column = columns[metric]
+            column[np.isnan(column) & ~np.isnan(logged)] = 0.0
+    return columns
+
+
+def daily_series(
+    conn: sqlite3.Connection, metrics: Sequence[str], start: date, end: date
+) -> np.ndarray:
+    """Metrics x days matrix over ``start..end``, NaN where nothing was logged."""
+    days = (end - start).days + 1
+    matrix = np.full((len(metrics), days), np.nan)
+    rows = {metric: index for index, metric in enumerate(metrics)}
+    known = [metric for metric in metrics if metric in FIELDS]
+    for metric, column in (
+        _aggregate_series(conn, known, start, end) if known else {}
+    ).items():
+        matrix[rows[metric]] = column
+    other = [metric for metric in metrics if metric not in FIELDS]
+    if other:
+        for row in fetch_buckets(
+            conn, metrics=other, start=start, end=end, granularity="day"
+        ):
+            offset = (date.fromisoformat(row["bucket"]) - start).days
+            matrix[rows[row["metric"]], offset] = row["mean"]
+    return matrix
+
+
+def _latest_readings(
+    conn: sqlite3.Connection, metrics: Sequence[str], before: date
+) -> dict[str, tuple[str, float]]:
+    """Latest ``body_metrics`` reading before ``before`` per metric, however
+    old, so sparse metrics keep a current value past the series window."""
+    latest = {}
+    for metric in metrics:
+        # One seek on idx_metrics_metric_date per metric.
+        row = conn.execute(
+            """SELECT recorded_date, value
+               FROM body_metrics
+               WHERE metric = ? AND recorded_date < ?
+               ORDER BY recorded_date DESC, id DESC
+               LIMIT 1""",
+            (metric, before.isoformat()),
+        ).fetchone()
+        if row is not None:
+            latest[metric] = (row["recorded_date"], row["value"])
+    return latest
+
+
+def _trend_slopes(matrix: np.ndarray) -> np.ndarray:
+    """Least-squares slope per row (units per day) over the trailing window."""
+    window = matrix[:, -TREND_DAYS:]
+    present = ~np.isnan(window)
+    x = np.broadcast_to(np.arange(window.shape[1], dtype=float), window.shape)
+    y = np.where(present, window, 0.0)
+    xs = np.where(present, x, 0.0)
+    n = present.sum(axis=1)
+    sum_x, sum_y = xs.sum(axis=1), y.sum(axis=1)
+    sum_xx, sum_xy = (xs * xs).sum(axis=1), (xs * y).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slopes = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
+    slopes[n < MIN_TREND_POINTS] = np.nan
+    return slopes
+
+
+def _current_values(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Trailing mean per row, falling back to the last reading, and that
+    reading's day offset (-1 when the row is empty)."""
+    present = ~np.isnan(matrix)
+    positions = np.arange(matrix.shape[1])
+    last = np.where(present, positions, -1).max(axis=1)
+    recent = matrix[:, -CURRENT_DAYS:]
+    recent_n = (~np.isnan(recent)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent_mean = np.nansum(recent, axis=1) / recent_n
+    latest = matrix[np.arange(len(matrix)), np.maximum(last, 0)]
+    current = np.where(recent_n > 0, recent_mean, np.where(last >= 0, latest, np.nan))
+    return current, last
+
+
+def _first_values(matrix: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """First reading per row at or after its ``starts`` offset."""
+    present = ~np.isnan(matrix) & (np.arange(matrix.shape[1]) >= starts[:, None])
+    first = present.argmax(axis=1)
+    values = matrix[np.arange(len(matrix)), first]
+    return np.where(present.any(axis=1), values, np.nan)
+
+
+def _number(value: float, digits: int = 2) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), digits)
+
+
+def evaluate_goals(
+    conn: sqlite3.Connection, goals: Sequence[dict[str, Any]], today: date
+) -> list[dict[str, Any]]:
+    if not goals:
+        return []
+    metrics = list(dict.fromkeys(goal["metric"] for goal in goals))
+    earliest = min(date.fromisoformat(goal["start_date"]) for goal in goals)
+    start = max(
+        min(earliest, today - timedelta(days=TREND_DAYS - 1)),
+        today - timedelta(days=MAX_LOOKBACK_DAYS - 1),
+    )
+    matrix = daily_series(conn, metrics, start, today)
+
+    # Per-metric statistics, then broadcast to goals by row index.
+    slopes = _trend_slopes(matrix)
+    current, last = _current_values(matrix)
+    last_recorded: list[Optional[str]] = [
+        (start + timedelta(days=int(offset))).isoformat() if offset >= 0 else None
+        for offset in last
+    ]
+    sparse = [
+        metric
+        for index, metric in enumerate(metrics)
+        if last[index] < 0
+        and (metric not in FIELDS or FIELDS[metric].source == "body_metrics")
+    ]
+    for metric, (recorded_date, value) in _latest_readings(conn, sparse, start).items():
+        current[metrics.index(metric)] = value
+        last_recorded[metrics.index(metric)] = recorded_date
+    rows = np.array([metrics.index(goal["metric"]) for goal in goals])
+    starts = np.array(
+        [
+            max((date.fromisoformat(goal["start_date"]) - start).days, 0)
+            for goal in goals
+        ]
+    )
+    baseline = _first_values(matrix[rows], starts)
+    current, slopes = current[rows], slopes[rows]
+
+    is_target = np.array([goal["goal_type"] == "target" for goal in goals])
+    target = np.array(
+        [
+            goal["target_value"] if goal["target_value"] is not None else np.nan
+            for goal in goals
+        ],
+        dtype=float,
+    )
+    # Which way a target goal moves: from its baseline toward the target.
+    heading = np.sign(target - np.where(np.isnan(baseline), current, baseline))
+    remaining = target - current
+    achieved = is_target & (heading * remaining <= 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = np.clip(
+            100.0 * (current - baseline) / (target - baseline), 0.0, 100.0
+        )
+        eta_days = np.ceil(remaining / slopes)
+    percent = np.where(achieved, 100.0, percent)
+    approaching = (eta_days > 0) & (eta_days <= MAX_ETA_DAYS) & ~achieved
+    directional = np.array(
+        [{"up": 1.0, "down": -1.0}.get(goal["direction"] or "", 0.0) for goal in goals]
+    )
+
+    results = []
+    for index, goal in enumerate(goals):
+        eta = (
+            today + timedelta(days=int(eta_days[index]))
+            if is_target[index] and approaching[index]
+            else None
+        )
+        if math.isnan(slopes[index]) or math.isnan(current[index]):
+            on_track = bool(achieved[index]) or None
+        elif is_target[index]:
+            on_track = bool(achieved[index]) or (
+                eta is not None
+                and (
+                    goal["target_date"] is None
+                    or eta.isoformat() <= goal["target_date"]
+                )
+            )
+        else:
+            on_track = bool(slopes[index] * directional[index] > 0)
+        results.append(
+            {
+                "goal_id": goal["id"],
+                "name": goal["name"],
+                "metric": goal["metric"],
+                "goal_type": goal["goal_type"],
+                "target_value": goal["target_value"],
+                "direction": goal["direction"],
+                "start_date": goal["start_date"],
+                "target_date": goal["target_date"],
+                "baseline": _number(baseline[index]),
+                "current": _number(current[index]),
+                "last_recorded": last_recorded[rows[index]],
+                "percent": (_number(percent[index], 1) if is_target[index] else None),
+                "slope_per_day": _number(slopes[index], 4),
+                "achieved": bool(achieved[index]) if is_target[index] else None,
+                "eta": eta.isoformat() if eta else None,
+                "on_track": on_track,
+            }
+        )
+    return results
+
+
+def goal_progress(
+    conn: sqlite3.Connection, *, today: Optional[date] = None
+) -> dict[str, Any]:
+    """Progress for every active goal as of ``today``."""
+    today = today or date.today()
+
+    def compute() -> dict[str, Any]:
+        goals = [
+            dict(row)
+            for row in conn.execute(
+                "SELECT * FROM goals WHERE active = 1 ORDER BY start_date, id"
+            )
+        ]
+        return {
+            "as_of": today.isoformat(),
+            "current_days": CURRENT_DAYS,
+            "trend_days": TREND_DAYS,
+            "goals": evaluate_goals(conn, goals, today),
+        }
+
+    return _cache.get_or_compute(conn, ("progress", today), compute)
+
+
+def current_value(
+    conn: sqlite3.Connection, goal: dict[str, Any], *, today: Optional[date] = None
+) -> Optional[float]:
+    """The value a goal's progress is measured from right now; for a
+    ``body_metrics`` metric with nothing recent, its latest reading."""
+    (progress,) = evaluate_goals(conn, [goal], today or date.today())
+    return progress["current"]
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+
+FeatureVector = dict[str, Optional[float]]
+DailyVectors = list[tuple[str, FeatureVector]]
+
+
+@dataclass(frozen=True)
+class FeatureGroup:
+    """Per-day features produced by one grouped query over a date range.
+
+    The query takes ``(start, end)`` parameters and returns one row per
+    ``recorded_date`` with a column for each name in ``features``.
+    """
+
+    features: tuple[str, ...]
+    query: str
+
+
+@dataclass(frozen=True)
+class InsightRule:
+    name: str
+    features: tuple[str, ...]
+    lookback_days: int
+    evaluate: Callable[[str, DailyVectors], Optional[str]]
+
+
+FEATURE_GROUPS: list[FeatureGroup] = [
+    FeatureGroup(
+        features=(
+            "sleep_logged",
+            "sleep_score",
+            "resting_hr",
+            "hrv",
+            "readiness_score",
+        ),
+        query="""SELECT
+                   recorded_date,
+                   1 AS sleep_logged,
+                   sleep_score,
+                   resting_hr,
+                   hrv,
+                   readiness_score
+                 FROM sleep_records
+                 WHERE recorded_date BETWEEN ? AND ?""",
+    ),
+    FeatureGroup(
+        features=("calories", "protein_g", "sodium_mg", "alcohol_calories"),
+        query="""SELECT
+                   recorded_date,
+                   SUM(calories) AS calories,
+                   SUM(protein_g) AS protein_g,
+                   SUM(sodium_mg) AS sodium_mg,
+                   SUM(alcohol_calories) AS alcohol_calories
+                 FROM food_entries
+                 WHERE recorded_date BETWEEN ? AND ?
+                   AND deleted_at IS NULL
+                 GROUP BY recorded_date""",
+    ),
+    FeatureGroup(
+        features=("cardio_zone12_min", "cardio_zone_min"),
+        query="""SELECT
+                   s.recorded_date,
+                   SUM(CASE WHEN z.zone IN (1, 2) THEN z.minutes ELSE 0 END) AS cardio_zone12_min,
+                   SUM(z.minutes) AS cardio_zone_min
+                 FROM exercise_sessions s
+                 JOIN exercise_hr_zones z
+                   ON z.session_id = s.id
+                 WHERE s.recorded_date BETWEEN ? AND ?
+                   AND s.deleted_at IS NULL
+                   AND s.session_type = 'cardio'
+                 GROUP BY s.recorded_date""",
+    ),
+]
+
+INSIGHT_RULES: list[InsightRule] = []
+
+
+def all_features() -> tuple[str, ...]:
+    return tuple(name for group in FEATURE_GROUPS for name in group.features)
+
+
+def register_rule(
+    name: str, *, features: tuple[str, ...], lookback_days: int
+) -> Callable[
+    [Callable[[str, DailyVectors], Optional[str]]],
+    Callable[[str, DailyVectors], Optional[str]],
+]:
+    known = set(all_features())
+    unknown = [feature for feature in features if feature not in known]
+    if unknown:
+        raise ValueError(f"Rule {name} uses unknown features: {', '.join(unknown)}")
+
+    def decorator(
+        evaluate: Callable[[str, DailyVectors], Optional[str]],
+    ) -> Callable[[str, DailyVectors], Optional[str]]:
+        INSIGHT_RULES.append(
+            InsightRule(
+                name=name,
+                features=features,
+                lookback_days=lookback_days,
+                evaluate=evaluate,
+            )
+        )
+        return evaluate
+
+    return decorator
+
+
+def _date_range(start: date, end: date) -> list[str]:
+    return [
+        (start + timedelta(days=offset)).isoformat()
+        for offset in range((end - start).days + 1)
+    ]
+
+
+def refresh_daily_features(conn: sqlite3.Connection, start: date, end: date) -> int:
+    """Compute and persist feature vectors for days in range that have none.
+
+    Cached rows are removed by triggers on the source tables whenever a day's
+    data changes, so only new or invalidated days are recomputed here.
+    """
+    features = all_features()
+    cached = {
+        row["feature_date"]
+        for row in conn.execute(
+            """SELECT feature_date
+               FROM daily_features
+               WHERE feature_date BETWEEN ? AND ?
+               GROUP BY feature_date
+               HAVING COUNT(*) = ?""",
+            (start.isoformat(), end.isoformat(), len(features)),
+        ).fetchall()
+    }
+    missing = [day for day in _date_range(start, end) if day not in cached]
+    if not missing:
+        return 0
+
+    vectors: dict[str, FeatureVector] = {
+        day: {feature: None for feature in features} for day in missing
+    }
+    for group in FEATURE_GROUPS:
+        rows = conn.execute(group.query, (missing[0], missing[-1])).fetchall()
+        for row in rows:
+            vector = vectors.get(row["recorded_date"])
+            if vector is None:
+                continue
+            for feature in group.features:
+                value = row[feature]
+                vector[feature] = float(value) if value is not None else None
+
+    conn.executemany(
+        """INSERT OR REPLACE INTO daily_features (feature_date, feature, value)
+           VALUES (?, ?, ?)""",
+        [
+            (day, feature, value)
+            for day, vector in vectors.items()
+            for feature, value in vector.items()
+        ],
+    )
+    conn.commit()
+    return len(missing)
+
+
+def load_feature_vectors(
+    conn: sqlite3.Connection,
+    start: date,
+    end: date,
+    features: tuple[str, ...] | None = None,
+) -> DailyVectors:
+    refresh_daily_features(conn, start, end)
+    wanted = features or all_features()
+    placeholders = ", ".join("?" for _ in wanted)
+    rows = conn.execute(
+        f"""SELECT feature_date, feature, value
+            FROM daily_features
+            WHERE feature_date BETWEEN ? AND ?
+              AND feature IN ({placeholders})""",
+        (start.isoformat(), end.isoformat(), *wanted),
+    ).fetchall()
+
+    by_day: dict[str, FeatureVector] = {
+        day: {feature: None for feature in wanted} for day in _date_range(start, end)
+    }
+    for row in rows:
+        by_day[row["feature_date"]][row["feature"]] = row["value"]
+    return sorted(by_day.items())
+
+
+def build_narrative_insights(
+    conn: sqlite3.Connection, today: date, *, limit: int = 3
+) -> list[str]:
+    if not INSIGHT_RULES:
+        return []
+
+    lookback = max(rule.lookback_days for rule in INSIGHT_RULES)
+    wanted = tuple(
+        dict.fromkeys(feature for rule in INSIGHT_RULES for feature in rule.features)
+    )
+    vectors = load_feature_vectors(
+        conn, today - timedelta(days=lookback - 1), today, wanted
+    )
+
+    today_str = today.isoformat()
+    insights: list[str] = []
+    for rule in INSIGHT_RULES:
+        window = vectors[-rule.lookback_days :]
+        insight = rule.evaluate(today_str, window)
+        if insight:
+            insights.append(insight)
+        if len(insights) >= limit:
+            break
+    return insights
+
+
+def _split_today(
+    today: str, window: DailyVectors
+) -> tuple[Optional[FeatureVector], list[FeatureVector]]:
+    current = None
+    prior: list[FeatureVector] = []
+    for day, vector in window:
+        if not vector.get("sleep_logged"):
+            continue
+        if day == today:
+            current = vector
+        else:
+            prior.append(vector)
+    return current, prior
+
+
+@register_rule(
+    "sleep_score_vs_recent",
+    features=("sleep_logged", "sleep_score"),
+    lookback_days=7,
+)
+def _sleep_score_vs_recent(today: str, window: DailyVectors) -> Optional[str]:
+    current, prior = _split_today(today, window)
+    if current is None or current["sleep_score"] is None:
+        return None
+    prior_scores = [
+        row["sleep_score"] for row in prior if row["sleep_score"] is not None
+    ]
+    if not prior_scores:
+        return None
+
+    score = int(current["sleep_score"])
+    avg_score = sum(prior_scores) / len(prior_scores)
+    delta = round(score - avg_score, 1)
+    if delta <= -2:
+        return f"Sleep score is {score}, {abs(delta):g} below your recent average ({avg_score:.1f})."
+    if delta >= 2:
+        return f"Sleep score is {score}, {delta:g} above your recent average ({avg_score:.1f})."
+    return None
+
+
+@register_rule(
+    "resting_hr_vs_recent",
+    features=("sleep_logged", "resting_hr"),
+    lookback_days=7,
+)
+def _resting_hr_vs_recent(today: str, window: DailyVectors) -> Optional[str]:
+    current, prior = _split_today(today, window)
+    if current is None or current["resting_hr"] is None:
+        return None
+    prior_rhr = [row["resting_hr"] for row in prior if row["resting_hr"] is not None]
+    if not prior_rhr:
+        return None
+
+    resting_hr = int(current["resting_hr"])
+    avg_rhr = sum(prior_rhr) / len(prior_rhr)
+    delta_rhr = round(resting_hr - avg_rhr, 1)
+    if delta_rhr <= -1:
+        return f"Resting HR is {resting_hr} bpm, down {abs(delta_rhr):g} vs your recent average."
+    if delta_rhr >= 1:
+        return (
+            f"Resting HR is {resting_hr} bpm, up {delta_rhr:g} vs your recent average."
+        )
+    return None
+
+
+@register_rule(
+    "alcohol_vs_sleep",
+    features=("sleep_logged", "sleep_score", "alcohol_calories"),
+    lookback_days=14,
+)
+def _alcohol_vs_sleep(today: str, window: DailyVectors) -> Optional[str]:
+    alcohol_nights = 0
+    low_sleep_after_alcohol = 0
+    for _, vector in window:
+        if not vector["sleep_logged"] or not (vector["alcohol_calories"] or 0) > 0:
+            continue
+        alcohol_nights += 1
+        if vector["sleep_score"] is not None and vector["sleep_score"] < 70:
+            low_sleep_after_alcohol += 1
+
+    if alcohol_nights >= 2 and low_sleep_after_alcohol >= 2:
+        return f"Alcohol intake coincided with lower sleep quality on {low_sleep_after_alcohol} of the last {alcohol_nights} drinking nights."
+    return None
+
+
+@register_rule(
+    "cardio_zone12_share",
+    features=("cardio_zone12_min", "cardio_zone_min"),
+    lookback_days=14,
+)
+def _cardio_zone12_share(today: str, window: DailyVectors) -> Optional[str]:
+    zone12_pcts = [
+        (vector["cardio_zone12_min"] or 0) / vector["cardio_zone_min"] * 100.0
+        for _, vector in window
+        if vector["cardio_zone_min"]
+    ]
+    if not zone12_pcts:
+        return None
+
+    recent = zone12_pcts[-3:]
+    recent_avg = sum(recent) / len(recent)
+    prior = zone12_pcts[:-3]
+    prior_avg = (sum(prior[-3:]) / len(prior[-3:])) if prior else None
+
+    if recent_avg < 50:
+        return f"Recent cardio sessions averaged {recent_avg:.0f}% in Zone 1-2; target at least 50% for aerobic base/fat-burn work."
+    if prior_avg is not None and recent_avg >= prior_avg + 10:
+        return f"Zone 1-2 cardio time is improving ({prior_avg:.0f}% → {recent_avg:.0f}% across recent sessions)."
+    return None
@@ -0,0 +1,278 @@
+"""Lab results: panel imports, derived per-draw columns and trend series.
+
+``previous_value``, ``delta`` and ``range_flag`` are stored on each
+``lab_results`` row and recomputed for a marker whenever one of its draws is
+written, so reading trends is a single scan of the covering
+``(marker, drawn_date, ...)`` index with no window functions or subqueries.
+
+Panel imports normalize units to the spelling (and, for common markers, the
+US conventional unit) the rest of the history uses, and upsert on
+``(drawn_date, panel, marker)`` so re-importing a panel is idempotent.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable, Sequence
+from datetime import date
+from typing import Any, Optional
+
+
+LAB_COLUMNS = (
+    "drawn_date",
+    "panel",
+    "marker",
+    "value",
+    "unit",
+    "reference_low",
+    "reference_high",
+    "flag",
+    "notes",
+)
+
+# Lowercased spelling -> canonical spelling.
+UNIT_ALIASES = {
+    "mg/dl": "mg/dL",
+    "g/dl": "g/dL",
+    "ng/dl": "ng/dL",
+    "ng/ml": "ng/mL",
+    "pg/ml": "pg/mL",
+    "mmol/l": "mmol/L",
+    "nmol/l": "nmol/L",
+    "pmol/l": "pmol/L",
+    "umol/l": "µmol/L",
+    "µmol/l": "µmol/L",
+    "μmol/l": "µmol/L",
+    "meq/l": "mEq/L",
+    "u/l": "U/L",
+    "iu/l": "IU/L",
+    "miu/l": "mIU/L",
+    "uiu/ml": "mIU/L",  # 1 µIU/mL == 1 mIU/L
+    "µiu/ml": "mIU/L",
+    "μiu/ml": "mIU/L",
+    "k/ul": "K/µL",
+    "k/µl": "K/µL",
+    "x10^3/ul": "K/µL",
+    "x10e3/ul": "K/µL",
+    "%": "%",
+    "percent": "%",
+}
+
+_LIPIDS_MMOL = ("mg/dL", 38.67)
+
+# (lowercased marker, canonical unit) -> (target unit, multiplier), for
+# markers where international reports use a different unit than the history.
+UNIT_CONVERSIONS = {
+    ("glucose", "mmol/L"): ("mg/dL", 18.016),
+    ("total cholesterol", "mmol/L"): _LIPIDS_MMOL,
+    ("ldl", "mmol/L"): _LIPIDS_MMOL,
+    ("hdl", "mmol/L"): _LIPIDS_MMOL,
+    ("non-hdl cholesterol", "mmol/L"): _LIPIDS_MMOL,
+    ("triglycerides", "mmol/L"): ("mg/dL", 88.57),
+    ("creatinine", "µmol/L"): ("mg/dL", 1 / 88.42),
+    ("vitamin d", "nmol/L"): ("ng/mL", 1 / 2.496),
+    ("testosterone", "nmol/L"): ("ng/dL", 28.84),
+}
+
+
+def normalize_unit(marker: str, unit: str) -> tuple[str, float]:
+    """Canonical unit for ``marker`` and the multiplier to convert into it."""
+    canonical = UNIT_ALIASES.get(unit.strip().lower(), unit.strip())
+    return UNIT_CONVERSIONS.get((marker.strip().lower(), canonical), (canonical, 1.0))
+
+
+def range_flag(
+    value: float, reference_low: Optional[float], reference_high: Optional[float]
+) -> Optional[str]:
+    if reference_low is not None and value < reference_low:
+        return "L"
+    if reference_high is not None and value > reference_high:
+        return "H"
+    return None
+
+
+def normalize_result(result: dict[str, Any]) -> dict[str, Any]:
+    """Convert a lab result into canonical units and fill in its flag.
+
+    A flag reported by the lab (e.g. ``HH``) is kept; otherwise it is derived
+    from the reference range.
+    """
+    unit, factor = normalize_unit(result["marker"], result["unit"])
+
+    def convert(value: Optional[float]) -> Optional[float]:
+        if value is None or factor == 1.0:
+            return value
+        return round(value * factor, 2)
+
+    normalized = {
+        **result,
+        "drawn_date": str(result["drawn_date"]),
+        "unit": unit,
+        "value": convert(result["value"]),
+        "reference_low": convert(result.get("reference_low")),
+        "reference_high": convert(result.get("reference_high")),
+    }
+    normalized["flag"] = result.get("flag") or range_flag(
+        normalized["value"], normalized["reference_low"], normalized["reference_high"]
+    )
+    return normalized
+
+
+def upsert_results(
+    conn: sqlite3.Connection, results: Sequence[dict[str, Any]]
+) -> dict[str, Any]:
+    """Normalize and upsert results on ``(drawn_date, panel, marker)``.
+
+    Everything is written in one transaction. A key repeated within the batch
+    keeps its last occurrence. Returns the stored rows plus how many were new.
+    """
+    by_key = {}
+    for result in results:
+        row = normalize_result(result)
+        by_key[(row["drawn_date"], row["panel"], row["marker"])] = row
+    if not by_key:
+        return {"inserted": 0, "updated": 0, "results": []}
+
+    keys = list(by_key)
+    key_rows = ", ".join("(?, ?, ?)" for _ in keys)
+    key_params = [value for key in keys for value in key]
+    existing = conn.execute(
+        f"""SELECT COUNT(*) FROM lab_results
+            WHERE (drawn_date, panel, marker) IN (VALUES {key_rows})""",
+        key_params,
+    ).fetchone()[0]
+
+    updates = ", ".join(
+        f"{column}=excluded.{column}"
+        for column in LAB_COLUMNS
+        if column not in ("drawn_date", "panel", "marker")
+    )
+    conn.executemany(
+        f"""INSERT INTO lab_results ({", ".join(LAB_COLUMNS)})
+            VALUES ({", ".join("?" for _ in LAB_COLUMNS)})
+            ON CONFLICT(drawn_date, panel, marker) DO UPDATE SET {updates}""",
+        [tuple(row.get(column) for column in LAB_COLUMNS) for row in by_key.values()],
+    )
+    refresh_marker_history(conn, (marker for _, _, marker in keys))
+    conn.commit()
+
+    stored = conn.execute(
+        f"""SELECT * FROM lab_results
+            WHERE (drawn_date, panel, marker) IN (VALUES {key_rows})
+            ORDER BY drawn_date, panel, marker""",
+        key_params,
+    ).fetchall()
+    return {
+        "inserted": len(keys) - existing,
+        "updated": existing,
+        "results": [dict(row) for row in stored],
+    }
+
+
+# Draws are ordered by (drawn_date, id). Deltas are only meaningful between
+# draws reported in the same unit, so a unit change starts a fresh baseline.
+_REFRESH_SQL = """
+    UPDATE lab_results
+    SET previous_value = ordered.previous_value,
+        delta = CASE
+            WHEN ordered.previous_unit = lab_results.unit
+            THEN round(lab_results.value - ordered.previous_value, 4)
+        END,
+        range_flag = CASE
+            WHEN lab_results.reference_low IS NOT NULL
+                 AND lab_results.value < lab_results.reference_low THEN 'L'
+            WHEN lab_results.reference_high IS NOT NULL
+                 AND lab_results.value > lab_results.reference_high THEN 'H'
+        END
+    FROM (
+        SELECT
+            id,
+            LAG(value) OVER marker_draws AS previous_value,
+            LAG(unit) OVER marker_draws AS previous_unit
+        FROM lab_results
+        WHERE {marker_filter}
+        WINDOW marker_draws AS (PARTITION BY marker ORDER BY drawn_date, id)
+    ) AS ordered
+    WHERE lab_results.id = ordered.id
+"""
+
+
+def refresh_marker_history(
+    conn: sqlite3.Connection, markers: Optional[Iterable[str]] = None
+) -> None:
+    """Recompute derived columns for ``markers`` (every marker if None).
+
+    Does not commit; callers run it inside the write that touched the draws.
+    """
+    if markers is None:
+        conn.execute(_REFRESH_SQL.format(marker_filter="1"))
+        return
+    names = sorted(set(markers))
+    if not names:
+        return
+    placeholders = ", ".join("?" for _ in names)
+    conn.execute(
+        _REFRESH_SQL.format(marker_filter=f"marker IN ({placeholders})"), names
+    )
+
+
+def marker_trends(
+    conn: sqlite3.Connection,
+    *,
+    markers: Sequence[str] = (),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list[dict[str, Any]]:
+    """Every requested marker's draws as parallel arrays, plus its latest draw.
+
+    ``latest`` is the most recent draw in the range, so its delta is against
+    the draw before it even when that one falls outside ``start..end``.
+    """
+    where, params = [], []
+    if markers:
+        where.append(f"marker IN ({', '.join('?' for _ in markers)})")
+        params.extend(markers)
+    if start is not None:
+        where.append("drawn_date >= ?")
+        params.append(str(start))
+    if end is not None:
+        where.append("drawn_date <= ?")
+        params.append(str(end))
+    rows = conn.execute(
+        f"""SELECT marker, drawn_date, id, value, unit, previous_value, delta,
+                   range_flag, flag, panel, reference_low, reference_high
+            FROM lab_results
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY marker, drawn_date, id""",
+        params,
+    ).fetchall()
+
+    trends: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        trend = trends.get(row["marker"])
+        if trend is None:
+            trend = trends[row["marker"]] = {
+                "marker": row["marker"],
+                "dates": [],
+                "values": [],
+                "flags": [],
+            }
+        out_of_range = row["range_flag"] or row["flag"]
+        trend["dates"].append(row["drawn_date"])
+        trend["values"].append(row["value"])
+        trend["flags"].append(out_of_range)
+        trend.update(
+            panel=row["panel"],
+            unit=row["unit"],
+            reference_low=row["reference_low"],
+            reference_high=row["reference_high"],
+            latest={
+                "drawn_date": row["drawn_date"],
+                "value": row["value"],
+                "previous_value": row["previous_value"],
+                "delta": row["delta"],
+                "flag": out_of_range,
+            },
+            out_of_range=out_of_range is not None,
+        )
+    return list(trends.values())
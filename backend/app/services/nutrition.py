@@ -0,0 +1,346 @@
+"""Resolve free-text meal descriptions against the bundled nutrition table.
+
+Descriptions such as "2 eggs, toast and a large latte" are tokenized once and
+scanned against a token trie built from food names and aliases, taking the
+longest match at each position. Quantities, sizes and units immediately
+before a match ("2", "half", "large", "8 oz", "a cup of") scale that item.
+Confidence reflects how much of the description was explained by matches, so
+callers can decide whether a slower vision estimate is worth requesting.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "nutrition_foods.csv"
+
+NUTRIENT_FIELDS = (
+    "calories",
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "fiber_g",
+    "sodium_mg",
+    "alcohol_g",
+)
+ALCOHOL_KCAL_PER_G = 7.0
+
+NUMBER_WORDS = {
+    "a": 1.0,
+    "an": 1.0,
+    "one": 1.0,
+    "two": 2.0,
+    "three": 3.0,
+    "four": 4.0,
+    "five": 5.0,
+    "six": 6.0,
+    "half": 0.5,
+    "couple": 2.0,
+    "double": 2.0,
+    "dozen": 12.0,
+}
+SIZE_WORDS = {"small": 0.75, "medium": 1.0, "regular": 1.0, "large": 1.5}
+# Mass/volume units convert through the item's serving weight; count units
+# ("cup", "slice", "glass") mean one table serving each.
+GRAMS_PER_UNIT = {
+    "g": 1.0,
+    "gram": 1.0,
+    "oz": 28.35,
+    "ounce": 28.35,
+    "lb": 453.6,
+    "lbs": 453.6,
+    "ml": 1.0,
+    "l": 1000.0,
+    "pint": 473.0,
+}
+COUNT_UNITS = frozenset(
+    {
+        "cup",
+        "slice",
+        "piece",
+        "serving",
+        "glass",
+        "bottle",
+        "can",
+        "bowl",
+        "plate",
+        "scoop",
+        "handful",
+        "order",
+        "pour",
+        "tbsp",
+        "tsp",
+    }
+)
+BOUNDARY_TOKENS = frozenset({",", ";", "+", "&", "and", "with", "plus", "w"})
+FILLER_WORDS = frozenset(
+    {
+        "of",
+        "the",
+        "some",
+        "side",
+        "on",
+        "in",
+        "my",
+        "for",
+        "fresh",
+        "homemade",
+        "plain",
+        "grilled",
+        "baked",
+        "roasted",
+        "steamed",
+        "boiled",
+        "topped",
+        "served",
+        "extra",
+        "little",
+        "bit",
+        "breakfast",
+        "lunch",
+        "dinner",
+        "snack",
+        "meal",
+        "drink",
+    }
+)
+
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?(?:/\d+)?|[a-z]+|[,;+&]")
+_MATCH = "\0"
+
+
+@dataclass(frozen=True)
+class FoodItem:
+    name: str
+    serving: str
+    serving_grams: float
+    nutrients: dict[str, float]
+    alcohol_type: Optional[str]
+
+
+@dataclass(frozen=True)
+class MatchedItem:
+    food: FoodItem
+    quantity: float
+    matched_text: str
+
+
+@dataclass(frozen=True)
+class LocalEstimate:
+    items: list[MatchedItem]
+    confidence: float
+
+    def totals(self, servings: float) -> dict[str, Any]:
+        totals = dict.fromkeys(NUTRIENT_FIELDS, 0.0)
+        alcohol_by_type: dict[str, float] = {}
+        for item in self.items:
+            for field in NUTRIENT_FIELDS:
+                totals[field] += item.food.nutrients[field] * item.quantity
+            if item.food.alcohol_type:
+                alcohol_by_type[item.food.alcohol_type] = (
+                    alcohol_by_type.get(item.food.alcohol_type, 0.0)
+                    + item.food.nutrients["alcohol_g"] * item.quantity
+                )
+        totals["alcohol_calories"] = totals["alcohol_g"] * ALCOHOL_KCAL_PER_G
+        factor = float(servings)
+        result: dict[str, Any] = {
+            field: round(value * factor, 2) for field, value in totals.items()
+        }
+        result["alcohol_type"] = (
+            max(alcohol_by_type, key=alcohol_by_type.__getitem__)
+            if alcohol_by_type
+            else None
+        )
+        return result
+
+    def describe_items(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": item.food.name,
+                "matched": item.matched_text,
+                "quantity": round(item.quantity, 2),
+                "serving": item.food.serving,
+            }
+            for item in self.items
+        ]
+
+
+def _normalize(token: str) -> str:
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("oes", "sses", "ches", "shes", "xes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [_normalize(token) for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+def _parse_number(token: str) -> Optional[float]:
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    try:
+        if "/" in token:
+            numerator, denominator = token.split("/", 1)
+            return float(numerator) / float(denominator)
+        return float(token)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+class NutritionMatcher:
+    def __init__(self, foods: list[tuple[FoodItem, list[str]]]):
+        self._trie: dict[str, Any] = {}
+        for food, phrases in foods:
+            for phrase in phrases:
+                tokens = tokenize(phrase)
+                if not tokens:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node[_MATCH] = food
+
+    @classmethod
+    def from_csv(cls, path: Path) -> NutritionMatcher:
+        foods = []
+        with open(path, newline="") as handle:
+            for row in csv.DictReader(handle):
+                food = FoodItem(
+                    name=row["name"],
+                    serving=row["serving"],
+                    serving_grams=float(row["serving_grams"]),
+                    nutrients={field: float(row[field]) for field in NUTRIENT_FIELDS},
+                    alcohol_type=row["alcohol_type"] or None,
+                )
+                aliases = [alias for alias in row["aliases"].split("|") if alias]
+                foods.append((food, [row["name"], *aliases]))
+        return cls(foods)
+
+    def _longest_match(
+        self, tokens: list[str], start: int
+    ) -> Optional[tuple[int, FoodItem]]:
+        node = self._trie
+        best = None
+        for index in range(start, len(tokens)):
+            node = node.get(tokens[index])
+            if node is None:
+                break
+            if _MATCH in node:
+                best = (index + 1, node[_MATCH])
+        return best
+
+    def _leading_quantity(
+        self, tokens: list[str], start: int, floor: int, food: FoodItem
+    ) -> tuple[float, int]:
+        """Scan left of a match for ``[qty] [size] [unit] [of]``.
+
+        Returns the multiplier and the first token index it consumed.
+        """
+        position = start
+        if position > floor and tokens[position - 1] == "of":
+            position -= 1
+
+        grams_per_unit = None
+        if position > floor:
+            unit = tokens[position - 1]
+            if unit in GRAMS_PER_UNIT:
+                grams_per_unit = GRAMS_PER_UNIT[unit]
+                position -= 1
+            elif unit in COUNT_UNITS:
+                position -= 1
+
+        size = 1.0
+        if position > floor and tokens[position - 1] in SIZE_WORDS:
+            size = SIZE_WORDS[tokens[position - 1]]
+            position -= 1
+
+        count = None
+        if position > floor:
+            count = _parse_number(tokens[position - 1])
+            if count is not None:
+                position -= 1
+                # "half a pizza"
+                if position > floor and tokens[position - 1] == "half":
+                    count *= 0.5
+                    position -= 1
+                # "1 1/2 cups"
+                if position > floor and "/" in tokens[position]:
+                    whole = _parse_number(tokens[position - 1])
+                    if whole is not None and "/" not in tokens[position - 1]:
+                        count += whole
+                        position -= 1
+
+        if grams_per_unit is not None:
+            if count is None:
+                return size, start
+            grams = count * grams_per_unit
+            return grams / food.serving_grams * size, position
+        return (count if count is not None else 1.0) * size, position
+
+    def match(self, description: str) -> LocalEstimate:
+        tokens = tokenize(description)
+        covered = [False] * len(tokens)
+        items: list[MatchedItem] = []
+        floor = 0
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            if token in BOUNDARY_TOKENS:
+                floor = index + 1
+                index += 1
+                continue
+            found = self._longest_match(tokens, index)
+            if found is None:
+                index += 1
+                continue
+            end, food = found
+            quantity, consumed_from = self._leading_quantity(tokens, index, floor, food)
+            for position in range(consumed_from, end):
+                covered[position] = True
+            items.append(
+                MatchedItem(
+                    food=food,
+                    quantity=quantity,
+                    matched_text=" ".join(tokens[index:end]),
+                )
+            )
+            floor = end
+            index = end
+
+        # Stray numbers and sizes don't name a food, so they don't count
+        # against coverage; unexplained words (including units) do.
+        content = [
+            position
+            for position, token in enumerate(tokens)
+            if token not in BOUNDARY_TOKENS
+            and token not in FILLER_WORDS
+            and token not in SIZE_WORDS
+            and _parse_number(token) is None
+        ]
+        if not items or not content:
+            return LocalEstimate(items=items, confidence=0.0)
+        coverage = sum(covered[position] for position in content) / len(content)
+        # Table values are generic servings, so even a full match stays below
+        # what a good photo estimate reports.
+        return LocalEstimate(items=items, confidence=round(0.3 + 0.55 * coverage, 2))
+
+
+@lru_cache(maxsize=1)
+def default_matcher() -> NutritionMatcher:
+    return NutritionMatcher.from_csv(DATA_PATH)
+
+
+def estimate_description(description: str) -> LocalEstimate:
+    return default_matcher().match(description)
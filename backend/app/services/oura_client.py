@@ -0,0 +1,107 @@
+"""Oura API v2 fetch shared by both sync paths.
+
+The in-process sync job hands the payload straight to the ingest code;
+``scripts/sync_oura.py`` imports the same helpers and posts it to the API.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+from typing import Any
+
+import httpx
+
+
+OURA_API_BASE = os.getenv("OURA_API_BASE", "https://api.ouraring.com").rstrip("/")
+COLLECTIONS = ("sleep", "daily_readiness", "daily_activity")
+
+
+def sync_window(days_back: int, today: date) -> tuple[date, date]:
+    end = today - timedelta(days=1)
+    return end - timedelta(days=max(days_back - 1, 0)), end
+
+
+def fetch_collection(
+    client: httpx.Client,
+    *,
+    token: str,
+    endpoint: str,
+    start: date,
+    end: date,
+    api_base: str = OURA_API_BASE,
+) -> list[dict[str, Any]]:
+    records: list[dict[str, Any]] = []
+    params: dict[str, Any] = {"start_date": str(start), "end_date": str(end)}
+    while True:
+        response = client.get(
+            f"{api_base.rstrip('/')}/v2/usercollection/{endpoint}",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        records.extend(payload.get("data") or [])
+        if not payload.get("next_token"):
+            return records
+        params["next_token"] = payload["next_token"]
+
+
+def _nested_value(entry: dict[str, Any], *path: str) -> Any:
+    current: Any = entry
+    for key in path:
+        if not isinstance(current, dict):
+            return None
+        current = current.get(key)
+    return current
+
+
+def normalize_readiness_entry(entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "day": entry.get("day") or entry.get("date"),
+        "score": entry.get("score"),
+        "average_hrv": (
+            entry.get("average_hrv")
+            or _nested_value(entry, "contributors", "hrv_balance", "value")
+            or _nested_value(entry, "contributors", "hrv", "value")
+        ),
+        "resting_heart_rate": (
+            entry.get("resting_heart_rate")
+            or _nested_value(entry, "contributors", "resting_heart_rate", "value")
+        ),
+    }
+
+
+def build_ingest_payload(
+    sleep: list[dict[str, Any]],
+    readiness: list[dict[str, Any]],
+    activity: list[dict[str, Any]],
+) -> dict[str, Any]:
+    return {
+        "sleep": sleep,
+        "readiness": [normalize_readiness_entry(entry) for entry in readiness],
+        "activity": activity,
+    }
+
+
+def fetch_ingest_payload(
+    client: httpx.Client,
+    *,
+    token: str,
+    start: date,
+    end: date,
+    api_base: str = OURA_API_BASE,
+) -> dict[str, Any]:
+    """Sleep, readiness and activity for ``start..end`` in ingest format."""
+    sleep, readiness, activity = (
+        fetch_collection(
+            client,
+            token=token,
+            endpoint=endpoint,
+            start=start,
+            end=end,
+            api_base=api_base,
+        )
+        for endpoint in COLLECTIONS
+    )
+    return build_ingest_payload(sleep, readiness, activity)
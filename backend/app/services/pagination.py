@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import sqlite3
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Page size when a cursor is supplied without an explicit limit.
+DEFAULT_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass
+class Page:
+    rows: list[dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise InvalidCursorError("Invalid cursor")
+    # Anything else would reach sqlite as an unbindable parameter.
+    if not isinstance(sort_value, (str, int, float)) or isinstance(sort_value, bool):
+        raise InvalidCursorError("Invalid cursor")
+    return sort_value, row_id
+
+
+def date_range_clauses(
+    sort_key: str, date_from: Optional[date], date_to: Optional[date]
+) -> tuple[list[str], list[Any]]:
+    clauses: list[str] = []
+    values: list[Any] = []
+    if date_from is not None:
+        clauses.append(f"{sort_key} >= ?")
+        values.append(str(date_from))
+    if date_to is not None:
+        clauses.append(f"{sort_key} <= ?")
+        values.append(str(date_to))
+    return clauses, values
+
+
+def keyset_page(
+    conn: sqlite3.Connection,
+    *,
+    table: str,
+    sort_key: str,
+    columns: str = "*",
+    where: Sequence[str] = (),
+    params: Sequence[Any] = (),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int,
+) -> Page:
+    """Newest-first page of ``table`` ordered by ``(sort_key, id)``.
+
+    ``sort_key`` is a column or deterministic expression with a matching
+    ``(sort_key, id)`` index, so each page is an index range seek rather than
+    an OFFSET scan. ``date_from``/``date_to`` bound ``sort_key`` inclusively.
+    """
+    range_clauses, range_values = date_range_clauses(sort_key, date_from, date_to)
+    clauses = [*where, *range_clauses]
+    values = [*params, *range_values]
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        clauses.append(f"({sort_key} < ? OR ({sort_key} = ? AND id < ?))")
+        values.extend([sort_value, sort_value, row_id])
+
+    query = f"SELECT {columns}, {sort_key} AS _sort_key FROM {table}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY {sort_key} DESC, id DESC LIMIT ?"
+    values.append(limit + 1)
+
+    rows = [dict(row) for row in conn.execute(query, values).fetchall()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["_sort_key"], rows[-1]["id"])
+    for row in rows:
+        del row["_sort_key"]
+    return Page(rows=rows, next_cursor=next_cursor)
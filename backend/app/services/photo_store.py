@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Literal, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .. import db
+
+
+Variant = Literal["original", "thumb", "model"]
+
+PHOTO_URL_PREFIX = "/api/v1/food/photos/"
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# variant -> (max-edge env var, format, quality). The thumbnail backs the food log UI; the
+# model variant is what the vision call sees, sized for its low-detail tiles.
+VARIANT_SPECS: dict[str, tuple[str, str, int]] = {
+    "thumb": ("FOOD_PHOTO_THUMB_EDGE", "WEBP", 70),
+    "model": ("FOOD_PHOTO_MODEL_EDGE", "JPEG", 80),
+}
+DEFAULT_EDGES = {"thumb": 320, "model": 1024}
+VARIANT_SUFFIXES = {"WEBP": ".webp", "JPEG": ".jpg"}
+MEDIA_TYPES = {".webp": "image/webp", ".jpg": "image/jpeg"}
+
+
+class InvalidPhotoError(ValueError):
+    pass
+
+
+def photo_root() -> Path:
+    configured = os.getenv("FOOD_PHOTO_DIR")
+    if configured:
+        return Path(configured)
+    return Path(db.DATABASE_PATH).parent / "photos"
+
+
+def max_upload_bytes() -> int:
+    return int(os.getenv("FOOD_PHOTO_MAX_BYTES", 20 * 1024 * 1024))
+
+
+def _variant_edge(variant: str) -> int:
+    env_name = VARIANT_SPECS[variant][0]
+    return int(os.getenv(env_name, DEFAULT_EDGES[variant]))
+
+
+def original_path(digest: str) -> Path:
+    return photo_root() / "originals" / digest[:2] / digest
+
+
+def variant_path(digest: str, variant: str) -> Path:
+    if variant == "original":
+        return original_path(digest)
+    _, image_format, _ = VARIANT_SPECS[variant]
+    suffix = VARIANT_SUFFIXES[image_format]
+    return photo_root() / variant / digest[:2] / f"{digest}{suffix}"
+
+
+def media_type(path: Path) -> str:
+    if path.suffix in MEDIA_TYPES:
+        return MEDIA_TYPES[path.suffix]
+    # Originals are stored without a suffix; sniff the header instead.
+    try:
+        with Image.open(path) as image:
+            return image.get_format_mimetype() or "application/octet-stream"
+    except (UnidentifiedImageError, OSError):
+        return "application/octet-stream"
+
+
+def photo_url(digest: str) -> str:
+    return f"{PHOTO_URL_PREFIX}{digest}"
+
+
+def digest_from_url(url: str) -> Optional[str]:
+    """Return the digest if ``url`` points at a stored upload."""
+    if not url.startswith(PHOTO_URL_PREFIX):
+        return None
+    digest = url[len(PHOTO_URL_PREFIX) :].split("?", 1)[0]
+    return digest if DIGEST_PATTERN.match(digest) else None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def store_original(raw: bytes) -> str:
+    """Persist upload bytes under their sha256 and return the digest."""
+    digest = hashlib.sha256(raw).hexdigest()
+    path = original_path(digest)
+    if not path.exists():
+        _write_atomic(path, raw)
+    return digest
+
+
+def render_variants(digest: str) -> dict[str, Any]:
+    """Decode the original once and write any missing variants.
+
+    Runs on the worker pool; Pillow releases the GIL while decoding, resizing
+    and encoding, so renders proceed in parallel with request handling.
+    """
+    source = original_path(digest)
+    try:
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except FileNotFoundError:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        raise InvalidPhotoError(str(exc)) from exc
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    info: dict[str, Any] = {
+        "width": image.width,
+        "height": image.height,
+        "original_bytes": source.stat().st_size,
+    }
+    for variant, (_, image_format, quality) in VARIANT_SPECS.items():
+        target = variant_path(digest, variant)
+        if not target.exists():
+            edge = _variant_edge(variant)
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format, quality=quality, optimize=True)
+            _write_atomic(target, buffer.getvalue())
+        info[f"{variant}_bytes"] = target.stat().st_size
+    return info
+
+
+class PhotoWorkerPool:
+    """Bounded pool that renders photo variants off the request path."""
+
+    def __init__(self) -> None:
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            workers = max(int(os.getenv("FOOD_PHOTO_WORKERS", 2)), 1)
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="photo-render"
+            )
+        return self._executor
+
+    async def render(self, digest: str) -> dict[str, Any]:
+        future = self._pool().submit(render_variants, digest)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+
+photo_workers = PhotoWorkerPool()
+
+
+async def ensure_variant(digest: str, variant: Variant) -> Optional[Path]:
+    """Path to a stored variant, rendering it first if only the original exists."""
+    path = variant_path(digest, variant)
+    if path.exists():
+        return path
+    if not original_path(digest).exists():
+        return None
+    await photo_workers.render(digest)
+    return path
+
+
+async def model_data_url(url: str) -> Optional[str]:
+    """Inline the model-sized variant for a stored upload URL, else ``None``."""
+    digest = digest_from_url(url)
+    if digest is None:
+        return None
+    try:
+        path = await ensure_variant(digest, "model")
+    except InvalidPhotoError:
+        return None
+    if path is None:
+        return None
+    encoded = base64.b64encode(await asyncio.to_thread(path.read_bytes)).decode()
+    return f"data:{media_type(path)};base64,{encoded}"
@@ -0,0 +1,247 @@
+"""Event-driven refresh of derived data.
+
+Write paths publish the tables and days they touched (``publish_change``).
+The pipeline listens on the event broker, coalesces changes until writes go
+quiet for ``debounce_seconds`` (or ``max_delay_seconds`` pass), then walks a
+dependency graph of derived artifacts and refreshes only those downstream of
+the touched tables, only for the touched days and the days whose windows
+cover them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from .baselines import refresh_baselines
+from .coaching import refresh_stored_digests
+from .date_ranges import date_runs
+from .events import EventBroker, Subscription, publish_change
+from .food_catalog import refresh_catalog
+from .insights import refresh_daily_features
+from .suggestions import refresh_stored_suggestions
+
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_SOURCE = "pipeline"
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A derived result and what it is computed from.
+
+    ``inputs`` name source tables or earlier artifacts. ``refresh`` gets the
+    affected days, already widened by ``reach_days`` (a change on day ``d``
+    affects this artifact on ``d .. d + reach_days``) and capped at today;
+    artifacts that aren't per-day (``per_day=False``) ignore them. ``outputs``
+    are the tables announced once it has been refreshed.
+    """
+
+    name: str
+    inputs: frozenset[str]
+    refresh: Callable[[sqlite3.Connection, list[date]], Any]
+    outputs: tuple[str, ...] = ()
+    per_day: bool = True
+    reach_days: int = 0
+
+
+def _refresh_features(conn: sqlite3.Connection, days: list[date]) -> int:
+    return sum(
+        refresh_daily_features(conn, start, end) for start, end in date_runs(days)
+    )
+
+
+DERIVED_ARTIFACTS = (
+    Artifact(
+        "food_catalog",
+        frozenset({"food_entries"}),
+        lambda conn, days: refresh_catalog(conn),
+        outputs=("food_catalog",),
+        per_day=False,
+    ),
+    Artifact(
+        "baselines",
+        frozenset({"sleep_records", "body_metrics", "food_entries"}),
+        lambda conn, days: refresh_baselines(conn),
+        outputs=("metric_baselines",),
+        per_day=False,
+    ),
+    # Feature vectors behind the narrative insights.
+    Artifact(
+        "daily_features",
+        frozenset(
+            {"sleep_records", "food_entries", "exercise_sessions", "exercise_hr_zones"}
+        ),
+        _refresh_features,
+        outputs=("daily_features",),
+    ),
+    # HRV 7-day mean and week-to-date sessions reach six days forward.
+    Artifact(
+        "daily_suggestion",
+        frozenset({"sleep_records", "exercise_sessions", "baselines"}),
+        refresh_stored_suggestions,
+        outputs=("daily_suggestions",),
+        reach_days=6,
+    ),
+    Artifact(
+        "daily_digest",
+        frozenset({"food_entries", "sleep_records", "exercise_sessions"}),
+        lambda conn, days: refresh_stored_digests(conn, days, "daily"),
+        outputs=("coaching_digests",),
+    ),
+    Artifact(
+        "weekly_digest",
+        frozenset({"food_entries", "sleep_records", "exercise_sessions"}),
+        lambda conn, days: refresh_stored_digests(conn, days, "weekly"),
+        outputs=("coaching_digests",),
+        reach_days=6,
+    ),
+)
+
+
+class DerivedDataPipeline:
+    def __init__(
+        self,
+        artifacts: Iterable[Artifact],
+        *,
+        connect: Callable[[], sqlite3.Connection],
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+    ):
+        self.artifacts = list(artifacts)
+        known: set[str] = set()
+        for artifact in self.artifacts:
+            # Declaration order is the refresh order, so upstream comes first.
+            if artifact.name in known:
+                raise ValueError(f"Duplicate artifact: {artifact.name}")
+            known.add(artifact.name)
+        for index, artifact in enumerate(self.artifacts):
+            later = {other.name for other in self.artifacts[index:]}
+            if artifact.inputs & later:
+                raise ValueError(f"{artifact.name} depends on a later artifact")
+        self._connect = connect
+        self._debounce = debounce_seconds
+        self._max_delay = max_delay_seconds
+        self._subscription: Optional[Subscription] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self.runs = 0
+
+    def affected(self, tables: Iterable[str]) -> list[Artifact]:
+        """Artifacts downstream of ``tables``, in refresh order."""
+        dirty = set(tables)
+        result = []
+        for artifact in self.artifacts:
+            if artifact.inputs & dirty:
+                result.append(artifact)
+                dirty.add(artifact.name)
+        return result
+
+    def run(
+        self,
+        tables: Iterable[str],
+        dates: Iterable[date | str],
+        *,
+        today: Optional[date] = None,
+    ) -> dict[str, Any]:
+        """Refresh everything downstream of ``tables`` for ``dates``."""
+        artifacts = self.affected(tables)
+        if not artifacts:
+            return {}
+        today = today or date.today()
+        touched = {
+            day if isinstance(day, date) else date.fromisoformat(day)
+            for day in dates
+            if day
+        }
+        results: dict[str, Any] = {}
+        outputs: set[str] = set()
+        conn = self._connect()
+        try:
+            for artifact in artifacts:
+                days = sorted(
+                    {
+                        day + timedelta(days=offset)
+                        for day in touched
+                        for offset in range(artifact.reach_days + 1)
+                        if day + timedelta(days=offset) <= today
+                    }
+                )
+                if artifact.per_day and not days:
+                    continue
+                try:
+                    results[artifact.name] = artifact.refresh(conn, days)
+                except Exception:
+                    conn.rollback()
+                    logger.exception("Refreshing %s failed", artifact.name)
+                    results[artifact.name] = None
+                    continue
+                outputs.update(artifact.outputs)
+        finally:
+            conn.close()
+        self.runs += 1
+        if outputs:
+            publish_change(PIPELINE_SOURCE, tables=outputs, dates=touched)
+        return results
+
+    async def _consume(self, subscription: Subscription) -> None:
+        loop = asyncio.get_running_loop()
+        tables: set[str] = set()
+        dates: set[str] = set()
+        first_seen: Optional[float] = None
+        while True:
+            timeout = None
+            if first_seen is not None:
+                timeout = max(
+                    0.0, min(self._debounce, first_seen + self._max_delay - loop.time())
+                )
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout)
+            except asyncio.TimeoutError:
+                event = {}
+            if event:
+                # Our own announcements (and derived-only writes such as a
+                # manual digest) have nothing downstream.
+                if event["source"] != PIPELINE_SOURCE and self.affected(
+                    event["tables"]
+                ):
+                    tables.update(event["tables"])
+                    dates.update(event["dates"])
+                    if first_seen is None:
+                        first_seen = loop.time()
+                continue
+            if tables:
+                try:
+                    await asyncio.to_thread(self.run, tables, dates)
+                except Exception:
+                    logger.exception("Derived data refresh failed")
+                tables, dates, first_seen = set(), set(), None
+            if event is None:
+                return
+
+    def start(self, broker: EventBroker) -> None:
+        if self._task is not None:
+            return
+        # Large enough that a burst of batch posts isn't dropped while a
+        # refresh runs.
+        self._subscription = broker.subscribe(max_pending=10_000)
+        self._task = asyncio.create_task(self._consume(self._subscription))
+
+    async def stop(self) -> None:
+        """Flush pending changes and stop listening."""
+        if self._task is None or self._subscription is None:
+            return
+        self._subscription.deliver(None)
+        await self._task
+        self._subscription.close()
+        self._task = self._subscription = None
+
+
+def pipeline_enabled() -> bool:
+    return os.getenv("PIPELINE_ENABLED", "1") == "1" and os.getenv("TESTING") != "1"
@@ -0,0 +1,488 @@
+"""Doctor-visit report: assembly, caching and HTML/PDF rendering.
+
+Reports are cached per (ending, days) until any source table's data
+generation moves. HTML and PDF renders are cached the same way and produced
+on a process pool, and the longer report windows are warmed in a background
+thread after a report is requested, so switching the report length in the UI
+is served from memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import html
+import multiprocessing
+import os
+import sqlite3
+import textwrap
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Literal, Optional
+
+from .aggregates import read_snapshot
+from .generations import GenerationCache
+
+
+ReportFormat = Literal["json", "html", "pdf"]
+
+REPORT_TABLES = (
+    "food_entries",
+    "exercise_sessions",
+    "sleep_records",
+    "body_metrics",
+    "supplements",
+    "medications",
+    "lab_results",
+    "medical_history",
+)
+# Report lengths worth rendering ahead of time; shorter windows are cheap.
+PRECOMPUTE_DAYS = (90, 180, 365)
+MEDIA_TYPES = {"html": "text/html; charset=utf-8", "pdf": "application/pdf"}
+
+_reports: GenerationCache[dict[str, Any]] = GenerationCache(
+    REPORT_TABLES, max_entries=64
+)
+_renders: GenerationCache[bytes] = GenerationCache(REPORT_TABLES, max_entries=32)
+
+
+def _safe_delta(latest: Optional[float], earliest: Optional[float]) -> Optional[float]:
+    if latest is None or earliest is None:
+        return None
+    return round(float(latest) - float(earliest), 2)
+
+
+def build_doctor_visit_report(
+    conn: sqlite3.Connection, end: date, days: int
+) -> dict[str, Any]:
+    start = end - timedelta(days=days - 1)
+
+    food_row = conn.execute(
+        """SELECT
+            ROUND(AVG(calories), 1) as avg_calories,
+            ROUND(AVG(protein_g), 1) as avg_protein_g,
+            ROUND(AVG(sodium_mg), 0) as avg_sodium_mg,
+            ROUND(SUM(alcohol_calories), 0) as alcohol_calories_total
+           FROM (
+             SELECT recorded_date,
+                    SUM(calories) as calories,
+                    SUM(protein_g) as protein_g,
+                    SUM(sodium_mg) as sodium_mg,
+                    SUM(alcohol_calories) as alcohol_calories
+             FROM food_entries
+             WHERE recorded_date BETWEEN ? AND ?
+               AND deleted_at IS NULL
+             GROUP BY recorded_date
+           )""",
+        (str(start), str(end)),
+    ).fetchone()
+
+    exercise_row = conn.execute(
+        """SELECT
+            COUNT(*) as session_count,
+            ROUND(SUM(duration_min), 1) as total_duration_min,
+            ROUND(SUM(calories_burned), 1) as total_calories_burned
+           FROM exercise_sessions
+           WHERE recorded_date BETWEEN ? AND ?
+             AND deleted_at IS NULL""",
+        (str(start), str(end)),
+    ).fetchone()
+
+    sleep_row = conn.execute(
+        """SELECT
+            ROUND(AVG(duration_min), 1) as avg_sleep_min,
+            ROUND(AVG(sleep_score), 1) as avg_sleep_score,
+            ROUND(AVG(readiness_score), 1) as avg_readiness
+           FROM sleep_records
+           WHERE recorded_date BETWEEN ? AND ?""",
+        (str(start), str(end)),
+    ).fetchone()
+
+    weight_rows = conn.execute(
+        """SELECT recorded_date, value
+           FROM body_metrics
+           WHERE metric='weight_lbs'
+             AND recorded_date BETWEEN ? AND ?
+           ORDER BY recorded_date""",
+        (str(start), str(end)),
+    ).fetchall()
+    latest_weight = weight_rows[-1]["value"] if weight_rows else None
+    earliest_weight = weight_rows[0]["value"] if weight_rows else None
+    weight_delta = _safe_delta(latest_weight, earliest_weight)
+
+    waist_rows = conn.execute(
+        """SELECT recorded_date, value
+           FROM body_metrics
+           WHERE metric='waist_in'
+             AND recorded_date BETWEEN ? AND ?
+           ORDER BY recorded_date""",
+        (str(start), str(end)),
+    ).fetchall()
+    latest_waist = waist_rows[-1]["value"] if waist_rows else None
+    earliest_waist = waist_rows[0]["value"] if waist_rows else None
+    waist_delta = _safe_delta(latest_waist, earliest_waist)
+
+    active_supplements = conn.execute(
+        "SELECT name, dose, frequency FROM supplements WHERE active=1 ORDER BY name"
+    ).fetchall()
+    active_medications = conn.execute(
+        "SELECT name, dose, indication FROM medications WHERE active=1 ORDER BY name"
+    ).fetchall()
+
+    latest_labs = conn.execute(
+        """SELECT *
+           FROM lab_results
+           WHERE drawn_date = (
+             SELECT MAX(drawn_date) FROM lab_results
+           )
+           ORDER BY panel, marker"""
+    ).fetchall()
+    medical_items = conn.execute(
+        """SELECT category, title, detail, date, notes
+           FROM medical_history
+           WHERE active=1
+           ORDER BY date DESC, created_at DESC
+           LIMIT 20"""
+    ).fetchall()
+
+    food = dict(food_row)
+    exercise = dict(exercise_row)
+    sleep = dict(sleep_row)
+    supplements_payload = [dict(row) for row in active_supplements]
+    medications_payload = [dict(row) for row in active_medications]
+    labs_payload = [dict(row) for row in latest_labs]
+    history_payload = [dict(row) for row in medical_items]
+
+    markdown_lines = [
+        f"# Doctor Visit Report ({start} to {end})",
+        "",
+        "## Intake and Recovery",
+        f"- Avg calories/day: {food.get('avg_calories') or 'n/a'}",
+        f"- Avg protein/day: {food.get('avg_protein_g') or 'n/a'} g",
+        f"- Avg sodium/day: {food.get('avg_sodium_mg') or 'n/a'} mg",
+        f"- Alcohol calories total: {food.get('alcohol_calories_total') or 0}",
+        f"- Avg sleep: {sleep.get('avg_sleep_min') or 'n/a'} min",
+        f"- Avg sleep score: {sleep.get('avg_sleep_score') or 'n/a'}",
+        f"- Avg readiness: {sleep.get('avg_readiness') or 'n/a'}",
+        "",
+        "## Training",
+        f"- Sessions: {exercise.get('session_count') or 0}",
+        f"- Total duration: {exercise.get('total_duration_min') or 0} min",
+        f"- Total calories burned: {exercise.get('total_calories_burned') or 0}",
+        "",
+        "## Body Metrics",
+        f"- Weight: {latest_weight if latest_weight is not None else 'n/a'}"
+        + (f" ({weight_delta:+} vs period start)" if weight_delta is not None else ""),
+        f"- Waist: {latest_waist if latest_waist is not None else 'n/a'}"
+        + (f" ({waist_delta:+} vs period start)" if waist_delta is not None else ""),
+        "",
+        "## Active Medications",
+    ]
+
+    if medications_payload:
+        markdown_lines.extend(
+            [
+                f"- {item['name']} {item.get('dose') or ''} ({item.get('indication') or 'no indication'})".strip()
+                for item in medications_payload
+            ]
+        )
+    else:
+        markdown_lines.append("- none")
+
+    markdown_lines.append("")
+    markdown_lines.append("## Active Supplements")
+    if supplements_payload:
+        markdown_lines.extend(
+            [
+                f"- {item['name']} {item.get('dose') or ''} ({item.get('frequency') or 'no frequency'})".strip()
+                for item in supplements_payload
+            ]
+        )
+    else:
+        markdown_lines.append("- none")
+
+    markdown_lines.append("")
+    markdown_lines.append("## Latest Labs")
+    if labs_payload:
+        for row in labs_payload:
+            flag = row.get("flag") or row.get("range_flag")
+            flag_text = f" ({flag})" if flag else ""
+            delta_text = (
+                f", {row['delta']:+g} since last draw"
+                if row.get("delta") is not None
+                else ""
+            )
+            markdown_lines.append(
+                f"- {row['panel']}: {row['marker']} {row['value']} {row['unit']}"
+                f"{flag_text}{delta_text}"
+            )
+    else:
+        markdown_lines.append("- no labs available")
+
+    markdown_lines.append("")
+    markdown_lines.append("## Active Medical History Notes")
+    if history_payload:
+        for row in history_payload:
+            when = f" [{row['date']}]" if row.get("date") else ""
+            detail = f": {row['detail']}" if row.get("detail") else ""
+            markdown_lines.append(f"- {row['category']} - {row['title']}{when}{detail}")
+    else:
+        markdown_lines.append("- none")
+
+    return {
+        "start": str(start),
+        "end": str(end),
+        "food": food,
+        "exercise": exercise,
+        "sleep": sleep,
+        "body_metrics": {
+            "latest_weight": latest_weight,
+            "weight_delta": weight_delta,
+            "latest_waist": latest_waist,
+            "waist_delta": waist_delta,
+        },
+        "active_medications": medications_payload,
+        "active_supplements": supplements_payload,
+        "latest_labs": labs_payload,
+        "medical_history": history_payload,
+        "report_markdown": "\n".join(markdown_lines),
+    }
+
+
+def cached_doctor_visit_report(
+    conn: sqlite3.Connection, end: date, days: int
+) -> tuple[dict[str, Any], bool]:
+    """The cached report and whether it had to be built (a cache miss)."""
+    scoped, generation, report = _reports.lookup(conn, (end, days))
+    if report is not None:
+        return report, False
+    with read_snapshot(conn):
+        report = build_doctor_visit_report(conn, end, days)
+    _reports.store(scoped, generation, report)
+    return report, True
+
+
+def doctor_visit_report(
+    conn: sqlite3.Connection, end: date, days: int
+) -> dict[str, Any]:
+    """``build_doctor_visit_report``, cached until a source table changes."""
+    return cached_doctor_visit_report(conn, end, days)[0]
+
+
+def _markdown_blocks(markdown: str) -> list[tuple[str, str]]:
+    """``(kind, text)`` pairs for the report's small markdown subset."""
+    blocks = []
+    for line in markdown.splitlines():
+        if line.startswith("## "):
+            blocks.append(("h2", line[3:]))
+        elif line.startswith("# "):
+            blocks.append(("h1", line[2:]))
+        elif line.startswith("- "):
+            blocks.append(("li", line[2:]))
+        elif line.strip():
+            blocks.append(("p", line))
+    return blocks
+
+
+def render_html(report: dict[str, Any]) -> bytes:
+    parts = []
+    in_list = False
+    for kind, text in _markdown_blocks(report["report_markdown"]):
+        if kind == "li" and not in_list:
+            parts.append("<ul>")
+        elif kind != "li" and in_list:
+            parts.append("</ul>")
+        in_list = kind == "li"
+        parts.append(f"<{kind}>{html.escape(text)}</{kind}>")
+    if in_list:
+        parts.append("</ul>")
+    title = html.escape(f"Doctor Visit Report ({report['start']} to {report['end']})")
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en"><head><meta charset="utf-8">'
+        f"<title>{title}</title>"
+        "<style>body{font-family:system-ui,sans-serif;max-width:46rem;"
+        "margin:2rem auto;line-height:1.4}h2{margin-top:1.5rem;"
+        "border-bottom:1px solid #ccc}@media print{body{margin:0}}</style>"
+        "</head><body>\n" + "\n".join(parts) + "\n</body></html>\n"
+    ).encode()
+
+
+# Minimal text PDF: US Letter pages with the standard Helvetica fonts, so no
+# font embedding or third-party library is needed.
+_PAGE_WIDTH, _PAGE_HEIGHT, _MARGIN = 612, 792, 54
+_PDF_STYLES = {
+    "h1": ("F2", 16, 26),
+    "h2": ("F2", 12, 22),
+    "li": ("F1", 10, 14),
+    "p": ("F1", 10, 14),
+}
+
+
+def _pdf_text(text: str) -> str:
+    encoded = text.encode("cp1252", errors="replace").decode("latin-1")
+    return encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(report: dict[str, Any]) -> bytes:
+    pages: list[list[str]] = [[]]
+    y = _PAGE_HEIGHT - _MARGIN
+    for kind, text in _markdown_blocks(report["report_markdown"]):
+        font, size, leading = _PDF_STYLES[kind]
+        indent = 12 if kind == "li" else 0
+        lines = textwrap.wrap(text, width=95 if size <= 10 else 70) or [""]
+        for index, line in enumerate(lines):
+            if y - leading < _MARGIN:
+                pages.append([])
+                y = _PAGE_HEIGHT - _MARGIN
+            y -= leading
+            if kind == "li":
+                line = ("• " if index == 0 else "  ") + line
+            pages[-1].append(
+                f"BT /{font} {size} Tf {_MARGIN + indent} {y} Td "
+                f"({_pdf_text(line)}) Tj ET"
+            )
+
+    # Objects: 1 catalog, 2 page tree, 3-4 fonts, then a page and its
+    # content stream per page.
+    page_ids = [5 + 2 * index for index in range(len(pages))]
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] "
+        f"/Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        "/Encoding /WinAnsiEncoding >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+        "/Encoding /WinAnsiEncoding >>",
+    ]
+    for page_id, commands in zip(page_ids, pages):
+        stream = "\n".join(commands)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R "
+            f"/MediaBox [0 0 {_PAGE_WIDTH} {_PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+            f"/Contents {page_id + 1} 0 R >>"
+        )
+        objects.append(
+            f"<< /Length {len(stream.encode('latin-1'))} >>\n"
+            f"stream\n{stream}\nendstream"
+        )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(output)
+
+
+RENDERERS: dict[str, Callable[[dict[str, Any]], bytes]] = {
+    "html": render_html,
+    "pdf": render_pdf,
+}
+
+
+class ReportWorkers:
+    """Render pool and background precompute for doctor-visit reports.
+
+    Rendering runs in worker processes so a year-long PDF never holds the
+    GIL on the request threads; precompute runs on one background thread
+    with its own connection.
+    """
+
+    def __init__(self) -> None:
+        self._renderer: Optional[ProcessPoolExecutor] = None
+        self._precompute: Optional[ThreadPoolExecutor] = None
+        self._pending: set[date] = set()
+        self._lock = threading.Lock()
+
+    def _render_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._renderer is None:
+                workers = max(int(os.getenv("REPORT_RENDER_WORKERS", 1)), 1)
+                # Spawned workers don't inherit the server's threads or locks.
+                self._renderer = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._renderer
+
+    async def report(
+        self,
+        conn: sqlite3.Connection,
+        end: date,
+        days: int,
+        connect: Callable[[], sqlite3.Connection],
+    ) -> dict[str, Any]:
+        """The JSON report; building it (data changed) also warms the longer
+        windows for ``end``."""
+        report, built = await asyncio.to_thread(
+            cached_doctor_visit_report, conn, end, days
+        )
+        if built:
+            self.precompute(end, connect)
+        return report
+
+    async def render(
+        self,
+        conn: sqlite3.Connection,
+        end: date,
+        days: int,
+        output_format: str,
+        connect: Callable[[], sqlite3.Connection],
+    ) -> bytes:
+        scoped, generation, content = await asyncio.to_thread(
+            _renders.lookup, conn, (end, days, output_format)
+        )
+        if content is not None:
+            return content
+        report = await self.report(conn, end, days, connect)
+        future = self._render_pool().submit(RENDERERS[output_format], report)
+        content = await asyncio.wrap_future(future)
+        _renders.store(scoped, generation, content)
+        return content
+
+    def precompute(self, end: date, connect: Callable[[], sqlite3.Connection]) -> None:
+        """Warm the longer report windows for ``end`` in the background."""
+        with self._lock:
+            if end in self._pending:
+                return
+            self._pending.add(end)
+            if self._precompute is None:
+                self._precompute = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="report-precompute"
+                )
+            self._precompute.submit(self._warm, end, connect)
+
+    def _warm(self, end: date, connect: Callable[[], sqlite3.Connection]) -> None:
+        try:
+            conn = connect()
+            try:
+                for days in PRECOMPUTE_DAYS:
+                    doctor_visit_report(conn, end, days)
+            finally:
+                conn.close()
+        finally:
+            with self._lock:
+                self._pending.discard(end)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            renderer, precompute = self._renderer, self._precompute
+            self._renderer = self._precompute = None
+        if precompute is not None:
+            precompute.shutdown(wait=True, cancel_futures=True)
+        if renderer is not None:
+            renderer.shutdown(wait=True, cancel_futures=True)
+
+
+report_workers = ReportWorkers()
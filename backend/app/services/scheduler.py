@@ -0,0 +1,414 @@
+"""In-process job scheduler with persisted state and a database lease.
+
+Jobs run on cron-like schedules (``minute hour day-of-month month
+day-of-week``, local time). Each job's last and next run live in
+``scheduled_jobs``; a worker claims a due job by taking a time-limited lease
+on its row, so when several server processes share the database only one of
+them runs it. Next runs get random jitter, and jobs marked ``heavy`` are
+pushed back while interactive traffic is high, up to a maximum delay.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Requests that don't represent someone waiting on the app; the event stream
+# is long-lived and would otherwise always count as in flight.
+UNTRACKED_PATH_PREFIXES = ("/api/v1/events", "/health")
+
+
+class CronError(ValueError):
+    pass
+
+
+_FIELD_RANGES = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+
+
+def _parse_field(spec: str, name: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in spec.split(","):
+        base, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                first, last = base.split("-", 1)
+                start, end = int(first), int(last)
+            else:
+                start = int(base)
+                end = high if step_text else start
+        except ValueError:
+            raise CronError(f"Invalid {name} field: {spec}") from None
+        if step < 1 or not low <= start <= end <= high:
+            raise CronError(f"Invalid {name} field: {spec}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]  # 0 = Sunday
+    # Standard cron: when both day fields are restricted, either may match.
+    days_restricted: bool
+    weekdays_restricted: bool
+
+    @classmethod
+    def parse(cls, spec: str) -> CronSchedule:
+        fields = spec.split()
+        if len(fields) != 5:
+            raise CronError(f"Expected 5 cron fields, got {len(fields)}: {spec}")
+        parsed = [
+            _parse_field(field, name, low, high)
+            for field, (name, low, high) in zip(fields, _FIELD_RANGES)
+        ]
+        return cls(
+            minutes=parsed[0],
+            hours=parsed[1],
+            days=parsed[2],
+            months=parsed[3],
+            weekdays=frozenset(day % 7 for day in parsed[4]),
+            days_restricted=fields[2] != "*",
+            weekdays_restricted=fields[4] != "*",
+        )
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after ``after``."""
+        candidate = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Walk day by day, then only through matching hours and minutes.
+        for _ in range(366 * 5):
+            if self._day_matches(candidate):
+                for hour in sorted(self.hours):
+                    if hour < candidate.hour:
+                        continue
+                    for minute in sorted(self.minutes):
+                        if hour == candidate.hour and minute < candidate.minute:
+                            continue
+                        return candidate.replace(hour=hour, minute=minute)
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+        raise CronError("Schedule never matches")
+
+
+@dataclass(frozen=True)
+class Job:
+    """A scheduled callable.
+
+    ``run`` gets its own connection and returns a small JSON-able summary
+    (or None). ``heavy`` jobs are deferred while the app is busy.
+    """
+
+    name: str
+    schedule: str
+    run: Callable[[sqlite3.Connection], Optional[Mapping[str, Any]]]
+    heavy: bool = False
+    jitter_seconds: int = 120
+    lease_seconds: int = 900
+    enabled: Callable[[], bool] = lambda: True
+
+    def __post_init__(self) -> None:
+        CronSchedule.parse(self.schedule)
+
+
+class LoadMonitor:
+    """Counts interactive requests in flight and over the last minute."""
+
+    def __init__(self, window_seconds: float = 60.0):
+        self._window = window_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._recent: deque[float] = deque()
+
+    def begin(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+            self._recent.append(now)
+
+    def end(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def snapshot(self) -> tuple[int, int]:
+        cutoff = time.monotonic() - self._window
+        with self._lock:
+            while self._recent and self._recent[0] < cutoff:
+                self._recent.popleft()
+            return self._in_flight, len(self._recent)
+
+    def busy(self) -> bool:
+        in_flight, per_minute = self.snapshot()
+        return in_flight >= int(
+            os.getenv("SCHEDULER_BUSY_IN_FLIGHT", 4)
+        ) or per_minute >= int(os.getenv("SCHEDULER_BUSY_PER_MINUTE", 120))
+
+
+class LoadTrackingMiddleware:
+    """ASGI middleware feeding a ``LoadMonitor``."""
+
+    def __init__(self, app: Any, monitor: LoadMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(UNTRACKED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        self.monitor.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.end()
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(value, TIMESTAMP_FORMAT) if value else None
+
+
+class Scheduler:
+    def __init__(
+        self,
+        jobs: list[Job],
+        *,
+        connect: Callable[[], sqlite3.Connection],
+        monitor: Optional[LoadMonitor] = None,
+        defer_seconds: int = 300,
+        max_defer_seconds: int = 3600,
+    ):
+        self.jobs = {job.name: job for job in jobs}
+        self.monitor = monitor or LoadMonitor()
+        self._connect = connect
+        self._defer = timedelta(seconds=defer_seconds)
+        self._max_defer = timedelta(seconds=max_defer_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def next_run(self, job: Job, after: datetime) -> datetime:
+        scheduled = CronSchedule.parse(job.schedule).next_after(after)
+        return scheduled + timedelta(seconds=random.uniform(0, job.jitter_seconds))
+
+    def register(self, conn: sqlite3.Connection, now: datetime) -> None:
+        """Create rows for new jobs and reschedule ones whose cron changed."""
+        rows = {
+            row["name"]: row
+            for row in conn.execute("SELECT name, schedule FROM scheduled_jobs")
+        }
+        for job in self.jobs.values():
+            row = rows.get(job.name)
+            if row is not None and row["schedule"] == job.schedule:
+                continue
+            conn.execute(
+                """INSERT INTO scheduled_jobs (name, schedule, next_run_at)
+                   VALUES (?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET
+                     schedule=excluded.schedule,
+                     next_run_at=excluded.next_run_at,
+                     updated_at=datetime('now')""",
+                (job.name, job.schedule, _timestamp(self.next_run(job, now))),
+            )
+        conn.commit()
+
+    def _acquire(
+        self, conn: sqlite3.Connection, job: Job, now: datetime, *, due_by: datetime
+    ) -> bool:
+        # The conditional UPDATE is the lease: only one worker's write can
+        # match while the row is unleased (or its lease has expired).
+        cursor = conn.execute(
+            """UPDATE scheduled_jobs
+               SET lease_owner = ?, lease_expires_at = ?
+               WHERE name = ?
+                 AND next_run_at <= ?
+                 AND (lease_expires_at IS NULL OR lease_expires_at < ?)""",
+            (
+                self.owner,
+                _timestamp(now + timedelta(seconds=job.lease_seconds)),
+                job.name,
+                _timestamp(due_by),
+                _timestamp(now),
+            ),
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+    def _defer_if_busy(
+        self, conn: sqlite3.Connection, job: Job, row: sqlite3.Row, now: datetime
+    ) -> bool:
+        if not job.heavy or not self.monitor.busy():
+            return False
+        deferred_since = _parse_timestamp(row["deferred_since"]) or now
+        if now - deferred_since >= self._max_defer:
+            return False
+        conn.execute(
+            """UPDATE scheduled_jobs
+               SET next_run_at = ?, deferred_since = ?, updated_at = datetime('now')
+               WHERE name = ?""",
+            (_timestamp(now + self._defer), _timestamp(deferred_since), job.name),
+        )
+        conn.commit()
+        logger.info("Deferred %s while the app is busy", job.name)
+        return True
+
+    def _execute(self, conn: sqlite3.Connection, job: Job, now: datetime) -> None:
+        started = time.perf_counter()
+        status, error = "ok", None
+        try:
+            job.run(conn)
+        except Exception:
+            conn.rollback()
+            status, error = "error", traceback.format_exc(limit=5)
+            logger.exception("Scheduled job %s failed", job.name)
+        elapsed = time.perf_counter() - started
+        finished = now + timedelta(seconds=elapsed)
+        conn.execute(
+            """UPDATE scheduled_jobs
+               SET last_run_at = ?,
+                   last_status = ?,
+                   last_error = ?,
+                   last_duration_ms = ?,
+                   next_run_at = ?,
+                   deferred_since = NULL,
+                   lease_owner = NULL,
+                   lease_expires_at = NULL,
+                   updated_at = datetime('now')
+               WHERE name = ? AND lease_owner = ?""",
+            (
+                _timestamp(now),
+                status,
+                error,
+                round(elapsed * 1000),
+                _timestamp(self.next_run(job, finished)),
+                job.name,
+                self.owner,
+            ),
+        )
+        conn.commit()
+
+    def run_due(self, now: Optional[datetime] = None) -> list[str]:
+        """Run every due job once, in next-run order. Returns the names run."""
+        now = now or datetime.now()
+        ran: list[str] = []
+        conn = self._connect()
+        try:
+            self.register(conn, now)
+            due = conn.execute(
+                """SELECT name, deferred_since
+                   FROM scheduled_jobs
+                   WHERE next_run_at <= ?
+                     AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+                   ORDER BY next_run_at""",
+                (_timestamp(now), _timestamp(now)),
+            ).fetchall()
+            for row in due:
+                job = self.jobs.get(row["name"])
+                if job is None or not job.enabled():
+                    continue
+                if self._defer_if_busy(conn, job, row, now):
+                    continue
+                if not self._acquire(conn, job, now, due_by=now):
+                    continue
+                self._execute(conn, job, now)
+                ran.append(job.name)
+        finally:
+            conn.close()
+        return ran
+
+    def run_job(self, conn: sqlite3.Connection, name: str) -> bool:
+        """Run ``name`` now, ahead of schedule. Returns False if another
+        worker holds its lease."""
+        job = self.jobs[name]
+        now = datetime.now()
+        self.register(conn, now)
+        if not self._acquire(conn, job, now, due_by=datetime.max):
+            return False
+        self._execute(conn, job, now)
+        return True
+
+    def status(self, conn: sqlite3.Connection) -> list[dict[str, Any]]:
+        self.register(conn, datetime.now())
+        rows = conn.execute(
+            """SELECT name, schedule, last_run_at, last_status, last_error,
+                      last_duration_ms, next_run_at, deferred_since,
+                      lease_owner, lease_expires_at
+               FROM scheduled_jobs
+               ORDER BY next_run_at"""
+        ).fetchall()
+        return [
+            {
+                **dict(row),
+                "heavy": self.jobs[row["name"]].heavy,
+                "enabled": self.jobs[row["name"]].enabled(),
+            }
+            for row in rows
+            if row["name"] in self.jobs
+        ]
+
+    async def _loop(self, tick_seconds: float) -> None:
+        assert self._stopping is not None
+        while not self._stopping.is_set():
+            try:
+                await asyncio.to_thread(self.run_due)
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        tick_seconds = float(os.getenv("SCHEDULER_TICK_SECONDS", 30))
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._loop(tick_seconds))
+
+    async def stop(self) -> None:
+        if self._task is None or self._stopping is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+
+def scheduler_enabled() -> bool:
+    return os.getenv("SCHEDULER_ENABLED", "1") == "1" and os.getenv("TESTING") != "1"
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import sqlite3
+from collections.abc import Iterable
 from datetime import date, timedelta
 
+from .date_ranges import backfill_days, date_runs
+
 
 SCHEDULE_BY_WEEKDAY = {
     0: "strength",  # Monday
@@ -80,53 +83,137 @@ def _build_suggestion(
     return (base, "moderate")
 
 
-def generate_daily_suggestion(conn: sqlite3.Connection, *, target: date) -> dict:
-    target_str = target.isoformat()
-    scheduled_type = SCHEDULE_BY_WEEKDAY[target.weekday()]
-
-    sleep_row = conn.execute(
-        """SELECT readiness_score, hrv
+def _sleep_by_day(
+    conn: sqlite3.Connection, start: date, end: date
+) -> dict[str, sqlite3.Row]:
+    rows = conn.execute(
+        """SELECT recorded_date, readiness_score, hrv
            FROM sleep_records
-           WHERE recorded_date = ?
-           ORDER BY CASE source WHEN 'oura' THEN 0 ELSE 1 END, created_at DESC
-           LIMIT 1""",
-        (target_str,),
-    ).fetchone()
-    readiness_score = sleep_row["readiness_score"] if sleep_row else None
-    hrv = sleep_row["hrv"] if sleep_row else None
+           WHERE recorded_date BETWEEN ? AND ?""",
+        (start.isoformat(), end.isoformat()),
+    ).fetchall()
+    return {row["recorded_date"]: row for row in rows}
 
-    hrv_avg_row = conn.execute(
-        """SELECT AVG(hrv) AS hrv_7day_avg
-           FROM sleep_records
-           WHERE recorded_date BETWEEN date(?, '-6 days') AND ?
-             AND hrv IS NOT NULL""",
-        (target_str, target_str),
-    ).fetchone()
-    hrv_7day_avg = hrv_avg_row["hrv_7day_avg"] if hrv_avg_row else None
 
-    week_start = _week_start(target).isoformat()
-    session_counts = conn.execute(
-        """SELECT session_type, COUNT(*) AS count
+def _hrv_means_by_day(
+    conn: sqlite3.Connection, start: date, end: date
+) -> dict[str, float]:
+    """Mean of every HRV reading from each day's date-6 through that day,
+    including days with no sleep record of their own."""
+    start_s, end_s = start.isoformat(), end.isoformat()
+    rows = conn.execute(
+        """WITH RECURSIVE days(day) AS (
+               SELECT date(?, '-6 days')
+               UNION ALL
+               SELECT date(day, '+1 day') FROM days WHERE day < ?
+           ),
+           readings AS (
+               SELECT recorded_date, SUM(hrv) AS total, COUNT(hrv) AS n
+               FROM sleep_records
+               WHERE recorded_date BETWEEN date(?, '-6 days') AND ?
+               GROUP BY recorded_date
+           ),
+           windows AS (
+               SELECT
+                   day,
+                   SUM(readings.total) OVER week / SUM(readings.n) OVER week
+                       AS hrv_7day_avg
+               FROM days
+               LEFT JOIN readings ON readings.recorded_date = days.day
+               WINDOW week AS (ORDER BY day ROWS 6 PRECEDING)
+           )
+           SELECT day, hrv_7day_avg FROM windows
+           WHERE day >= ? AND hrv_7day_avg IS NOT NULL""",
+        (start_s, end_s, start_s, end_s, start_s),
+    ).fetchall()
+    return {row["day"]: row["hrv_7day_avg"] for row in rows}
+
+
+def _sessions_week_to_date(
+    conn: sqlite3.Connection, start: date, end: date
+) -> dict[date, dict[str, int]]:
+    """Sessions per type from each day's Monday through that day."""
+    first_monday = _week_start(start)
+    rows = conn.execute(
+        """SELECT recorded_date, session_type, COUNT(*) AS count
            FROM exercise_sessions
            WHERE recorded_date BETWEEN ? AND ?
              AND deleted_at IS NULL
-           GROUP BY session_type""",
-        (week_start, target_str),
+           GROUP BY recorded_date, session_type""",
+        (first_monday.isoformat(), end.isoformat()),
     ).fetchall()
-    by_type = {row["session_type"]: int(row["count"]) for row in session_counts}
-    expected = _expected_sessions_to_date(target, scheduled_type)
-    completed = by_type.get(scheduled_type, 0)
-    missed_sessions = max(expected - completed, 0) if scheduled_type != "rest" else 0
-
-    suggestion, intensity = _build_suggestion(
-        scheduled_type=scheduled_type,
-        readiness_score=readiness_score,
-        hrv=hrv,
-        hrv_7day_avg=hrv_7day_avg,
-        missed_sessions=missed_sessions,
-    )
+    per_day: dict[str, dict[str, int]] = {}
+    for row in rows:
+        per_day.setdefault(row["recorded_date"], {})[row["session_type"]] = int(
+            row["count"]
+        )
+
+    running: dict[str, int] = {}
+    by_day: dict[date, dict[str, int]] = {}
+    day = first_monday
+    while day <= end:
+        if day.weekday() == 0:
+            running = {}
+        for session_type, count in per_day.get(day.isoformat(), {}).items():
+            running[session_type] = running.get(session_type, 0) + count
+        if day >= start:
+            by_day[day] = dict(running)
+        day += timedelta(days=1)
+    return by_day
+
 
-    conn.execute(
+def build_suggestions(
+    conn: sqlite3.Connection, *, start: date, end: date
+) -> list[tuple]:
+    """``daily_suggestions`` rows for every day in ``start..end``.
+
+    Inputs for the whole range are loaded up front and the rules run in
+    memory.
+    """
+    sleep = _sleep_by_day(conn, start, end)
+    hrv_means = _hrv_means_by_day(conn, start, end)
+    sessions = _sessions_week_to_date(conn, start, end)
+
+    rows = []
+    day = start
+    while day <= end:
+        target_str = day.isoformat()
+        scheduled_type = SCHEDULE_BY_WEEKDAY[day.weekday()]
+        sleep_row = sleep.get(target_str)
+        readiness_score = sleep_row["readiness_score"] if sleep_row else None
+        hrv = sleep_row["hrv"] if sleep_row else None
+        hrv_7day_avg = hrv_means.get(target_str)
+
+        expected = _expected_sessions_to_date(day, scheduled_type)
+        completed = sessions[day].get(scheduled_type, 0)
+        missed_sessions = (
+            max(expected - completed, 0) if scheduled_type != "rest" else 0
+        )
+
+        suggestion, intensity = _build_suggestion(
+            scheduled_type=scheduled_type,
+            readiness_score=readiness_score,
+            hrv=hrv,
+            hrv_7day_avg=hrv_7day_avg,
+            missed_sessions=missed_sessions,
+        )
+        rows.append(
+            (
+                target_str,
+                readiness_score,
+                hrv,
+                hrv_7day_avg,
+                scheduled_type,
+                suggestion,
+                intensity,
+            )
+        )
+        day += timedelta(days=1)
+    return rows
+
+
+def _persist_suggestions(conn: sqlite3.Connection, rows: list[tuple]) -> None:
+    conn.executemany(
         """INSERT INTO daily_suggestions
            (
              suggestion_date,
@@ -145,20 +232,57 @@ def generate_daily_suggestion(conn: sqlite3.Connection, *, target: date) -> dict
              scheduled_type=excluded.scheduled_type,
              suggestion=excluded.suggestion,
              intensity=excluded.intensity""",
-        (
-            target_str,
-            readiness_score,
-            hrv,
-            hrv_7day_avg,
-            scheduled_type,
-            suggestion,
-            intensity,
-        ),
+        rows,
     )
     conn.commit()
 
+
+def generate_daily_suggestion(conn: sqlite3.Connection, *, target: date) -> dict:
+    _persist_suggestions(conn, build_suggestions(conn, start=target, end=target))
     row = conn.execute(
         "SELECT * FROM daily_suggestions WHERE suggestion_date=?",
-        (target_str,),
+        (target.isoformat(),),
     ).fetchone()
     return dict(row)
+
+
+def backfill_suggestions(conn: sqlite3.Connection, *, start: date, end: date) -> dict:
+    """Regenerate suggestions for ``start..end`` in one transaction."""
+    backfill_days(start, end)
+    rows = build_suggestions(conn, start=start, end=end)
+    _persist_suggestions(conn, rows)
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "generated": len(rows),
+        "intensity": {
+            intensity: sum(1 for row in rows if row[6] == intensity)
+            for intensity in ("rest", "easy", "moderate", "full")
+        },
+    }
+
+
+def refresh_stored_suggestions(conn: sqlite3.Connection, days: Iterable[date]) -> int:
+    """Rebuild the suggestions already stored for any of ``days``.
+
+    Days without one are left to the scheduled job. Returns the rows rebuilt.
+    """
+    wanted = sorted({day.isoformat() for day in days})
+    if not wanted:
+        return 0
+    stored = [
+        date.fromisoformat(row["suggestion_date"])
+        for row in conn.execute(
+            f"""SELECT suggestion_date
+                FROM daily_suggestions
+                WHERE suggestion_date IN ({", ".join("?" for _ in wanted)})""",
+            wanted,
+        )
+    ]
+    rows = [
+        row
+        for start, end in date_runs(stored)
+        for row in build_suggestions(conn, start=start, end=end)
+    ]
+    _persist_suggestions(conn, rows)
+    return len(rows)
@@ -0,0 +1,224 @@
+"""Bucketed, multi-metric series over body_metrics.
+
+Rows are deduplicated per (metric, day) by source priority and aggregated
+into day/week/month buckets in a single SQL pass; gap filling, rolling means
+and EWMA trend lines are then computed on the dense bucket axis with NumPy.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from collections.abc import Sequence
+from datetime import date, timedelta
+from typing import Any, Literal, Optional
+
+import numpy as np
+
+
+Granularity = Literal["day", "week", "month"]
+
+# When several sources report a metric on the same day, only the
+# highest-priority source's readings are kept. Hand-entered values win over
+# device syncs.
+SOURCE_PRIORITY = ("manual", "apple_health", "oura", "fitbit")
+STATS = ("mean", "min", "max", "last", "count")
+MAX_BUCKETS = 5000
+
+# Weeks start on Monday, matching the weekly summaries.
+BUCKET_SQL = {
+    "day": "recorded_date",
+    "week": "date(recorded_date, '-6 days', 'weekday 1')",
+    "month": "strftime('%Y-%m-01', recorded_date)",
+}
+
+
+class SeriesRangeError(ValueError):
+    pass
+
+
+def bucket_start(day: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_axis(start: date, end: date, granularity: Granularity) -> list[date]:
+    axis = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        axis.append(current)
+        if len(axis) > MAX_BUCKETS:
+            raise SeriesRangeError(
+                f"Range spans more than {MAX_BUCKETS} {granularity} buckets"
+            )
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(days=7)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return axis
+
+
+def _priority_case(sources: Sequence[str]) -> str:
+    whens = " ".join(f"WHEN ? THEN {rank}" for rank in range(len(sources)))
+    return f"CASE source {whens} ELSE {len(sources)} END"
+
+
+def fetch_buckets(
+    conn: sqlite3.Connection,
+    *,
+    metrics: Sequence[str],
+    start: date,
+    end: date,
+    granularity: Granularity,
+    source_priority: Sequence[str] = SOURCE_PRIORITY,
+) -> list[sqlite3.Row]:
+    """One grouped query for every requested metric.
+
+    The window ranks sources per (metric, day) so lower-priority duplicates
+    are dropped before aggregation, and tags each bucket's latest reading so
+    ``last`` comes out of the same GROUP BY.
+    """
+    bucket = BUCKET_SQL[granularity]
+    metric_marks = ", ".join("?" for _ in metrics)
+    return conn.execute(
+        f"""WITH ranked AS (
+                SELECT
+                    metric,
+                    recorded_date,
+                    value,
+                    created_at,
+                    id,
+                    DENSE_RANK() OVER (
+                        PARTITION BY metric, recorded_date
+                        ORDER BY {_priority_case(source_priority)}
+                    ) AS source_rank
+                FROM body_metrics
+                WHERE metric IN ({metric_marks})
+                  AND recorded_date BETWEEN ? AND ?
+            ),
+            kept AS (
+                SELECT
+                    metric,
+                    {bucket} AS bucket,
+                    value,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY metric, {bucket}
+                        ORDER BY recorded_date DESC, created_at DESC, id DESC
+                    ) AS recency
+                FROM ranked
+                WHERE source_rank = 1
+            )
+            SELECT
+                metric,
+                bucket,
+                AVG(value) AS mean,
+                MIN(value) AS min,
+                MAX(value) AS max,
+                MAX(CASE WHEN recency = 1 THEN value END) AS last,
+                COUNT(*) AS count
+            FROM kept
+            GROUP BY metric, bucket
+            ORDER BY metric, bucket""",
+        [*source_priority, *metrics, str(start), str(end)],
+    ).fetchall()
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` buckets, ignoring gaps.
+
+    Buckets whose window holds no readings stay NaN.
+    """
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    window_counts = counts[upper] - counts[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums[upper] - sums[lower]) / window_counts
+    return np.where(window_counts > 0, means, np.nan)
+
+
+def ewma(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponentially weighted mean with ``alpha = 2 / (span + 1)``.
+
+    Gaps keep decaying the previous weight, so a reading after a long gap
+    pulls the trend further than one after a single missing bucket. This is
+    a recurrence, so it runs as a plain loop over the (small) bucket axis.
+    """
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    trend = np.full(len(values), np.nan)
+    weighted_sum = 0.0
+    weight = 0.0
+    for index, value in enumerate(values):
+        weighted_sum *= decay
+        weight *= decay
+        if not math.isnan(value):
+            weighted_sum += value
+            weight += 1.0
+        if weight > 0:
+            trend[index] = weighted_sum / weight
+    return trend
+
+
+def _column(values: np.ndarray, digits: int = 3) -> list[Optional[float]]:
+    return [None if math.isnan(value) else round(value, digits) for value in values]
+
+
+def metric_series(
+    conn: sqlite3.Connection,
+    *,
+    metrics: Sequence[str],
+    start: date,
+    end: date,
+    granularity: Granularity = "day",
+    rolling: Optional[int] = None,
+    ewma_span: Optional[int] = None,
+    source_priority: Sequence[str] = SOURCE_PRIORITY,
+) -> dict[str, Any]:
+    axis = bucket_axis(start, end, granularity)
+    positions = {str(bucket): index for index, bucket in enumerate(axis)}
+    columns = {
+        metric: {stat: np.full(len(axis), np.nan) for stat in STATS}
+        for metric in metrics
+    }
+    for row in fetch_buckets(
+        conn,
+        metrics=metrics,
+        start=start,
+        end=end,
+        granularity=granularity,
+        source_priority=source_priority,
+    ):
+        index = positions[row["bucket"]]
+        for stat in STATS:
+            columns[row["metric"]][stat][index] = row[stat]
+
+    series: dict[str, Any] = {}
+    for metric, stats in columns.items():
+        payload: dict[str, Any] = {
+            stat: _column(stats[stat]) for stat in STATS if stat != "count"
+        }
+        payload["count"] = [
+            0 if math.isnan(value) else int(value) for value in stats["count"]
+        ]
+        if rolling:
+            payload["rolling_mean"] = _column(rolling_mean(stats["mean"], rolling))
+        if ewma_span:
+            payload["ewma"] = _column(ewma(stats["mean"], ewma_span))
+        series[metric] = payload
+
+    return {
+        "from": str(start),
+        "to": str(end),
+        "granularity": granularity,
+        "source_priority": list(source_priority),
+        "buckets": [str(bucket) for bucket in axis],
+        "series": series,
+    }
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import sqlite3
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+
+def cache_ttl_seconds() -> int:
+    return int(os.getenv("FOOD_VISION_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+
+def cache_max_entries() -> int:
+    return int(os.getenv("FOOD_VISION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+
+def _photo_digest(photo_url: str) -> str:
+    # Inline photos are keyed by their bytes so the same image hashes the same
+    # regardless of how the data URL header was written.
+    if photo_url.startswith("data:") and "," in photo_url:
+        header, payload = photo_url.split(",", 1)
+        try:
+            raw = (
+                base64.b64decode(payload, validate=False)
+                if header.endswith(";base64")
+                else payload.encode()
+            )
+        except (binascii.Error, ValueError):
+            raw = photo_url.encode()
+        return "bytes:" + hashlib.sha256(raw).hexdigest()
+    return "url:" + photo_url
+
+
+def estimate_cache_key(
+    *, photo_url: str, description: str, servings: float, model: str
+) -> str:
+    material = json.dumps(
+        [_photo_digest(photo_url), description, round(float(servings), 4), model],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def get_cached_estimate(
+    conn: sqlite3.Connection, cache_key: str, *, ttl_seconds: int
+) -> Optional[dict[str, Any]]:
+    row = conn.execute(
+        """SELECT analysis
+           FROM vision_estimate_cache
+           WHERE cache_key = ?
+             AND created_at > datetime('now', ?)""",
+        (cache_key, f"-{int(ttl_seconds)} seconds"),
+    ).fetchone()
+    if row is None:
+        return None
+    conn.execute(
+        """UPDATE vision_estimate_cache
+           SET hit_count = hit_count + 1,
+               last_used_at = datetime('now')
+           WHERE cache_key = ?""",
+        (cache_key,),
+    )
+    conn.commit()
+    return json.loads(row["analysis"])
+
+
+def store_estimate(
+    conn: sqlite3.Connection,
+    cache_key: str,
+    *,
+    model: str,
+    analysis: dict[str, Any],
+    ttl_seconds: int,
+    max_entries: int,
+) -> None:
+    conn.execute(
+        """INSERT INTO vision_estimate_cache (cache_key, model, analysis)
+           VALUES (?, ?, ?)
+           ON CONFLICT(cache_key) DO UPDATE SET
+             model=excluded.model,
+             analysis=excluded.analysis,
+             created_at=datetime('now'),
+             last_used_at=datetime('now')""",
+        (cache_key, model, json.dumps(analysis)),
+    )
+    conn.execute(
+        "DELETE FROM vision_estimate_cache WHERE created_at <= datetime('now', ?)",
+        (f"-{int(ttl_seconds)} seconds",),
+    )
+    conn.execute(
+        """DELETE FROM vision_estimate_cache
+           WHERE cache_key IN (
+             SELECT cache_key
+             FROM vision_estimate_cache
+             ORDER BY last_used_at DESC, rowid DESC
+             LIMIT -1 OFFSET ?
+           )""",
+        (max(int(max_entries), 0),),
+    )
+    conn.commit()
+
+
+class RequestCoalescer:
+    """Share one in-flight call between tasks asking for the same key."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return ``(result, leader)``; ``leader`` is False for shared results.
+
+        If the leader is cancelled (say its client disconnected), followers
+        retry: the first to resume leads, the rest share its call.
+        """
+        while (future := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(future), False
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not future.cancelled() or (task and task.cancelling()):
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unshared failure isn't logged by asyncio.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            self._inflight.pop(key, None)
+
+
+vision_coalescer = RequestCoalescer()
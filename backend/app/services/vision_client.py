@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from collections.abc import Callable
+from typing import Any, Literal, Optional
+
+import httpx
+
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int,
+        cooldown_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> BreakerState:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Give up a claimed probe without judging the upstream."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+
+
+class VisionClient:
+    """Shared async HTTP client for the vision model upstream.
+
+    Connections are pooled across requests, concurrent upstream calls are
+    capped by a semaphore, and transient failures are retried with jittered
+    backoff. While the breaker is open, callers get ``None`` immediately and
+    fall back to the local heuristic.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.breaker = CircuitBreaker(failure_threshold=5, cooldown_seconds=30.0)
+        self.max_concurrency = 4
+
+    async def start(self) -> None:
+        await self.aclose()
+        self.breaker = CircuitBreaker(
+            failure_threshold=_env_int("FOOD_VISION_BREAKER_THRESHOLD", 5),
+            cooldown_seconds=_env_float("FOOD_VISION_BREAKER_COOLDOWN_SECONDS", 30.0),
+        )
+        self._open()
+
+    def _open(self) -> None:
+        self.max_concurrency = max(_env_int("FOOD_VISION_MAX_CONCURRENCY", 4), 1)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(_env_float("FOOD_VISION_TIMEOUT_SECONDS", 25.0)),
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=60.0,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+
+    async def post_json(
+        self, url: str, *, headers: dict[str, str], body: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        if not self.breaker.allow():
+            return None
+        if self._client is None or self._semaphore is None:
+            self._open()
+
+        max_retries = max(_env_int("FOOD_VISION_MAX_RETRIES", 2), 0)
+        backoff_base = _env_float("FOOD_VISION_RETRY_BASE_SECONDS", 0.5)
+        try:
+            async with self._semaphore:
+                for attempt in range(max_retries + 1):
+                    if attempt:
+                        await asyncio.sleep(
+                            random.uniform(0, backoff_base * 2**attempt)
+                        )
+                    try:
+                        response = await self._client.post(
+                            url, headers=headers, json=body
+                        )
+                        if response.status_code in RETRYABLE_STATUS_CODES:
+                            continue
+                        response.raise_for_status()
+                        payload = response.json()
+                    except httpx.TransportError:
+                        continue
+                    except (httpx.HTTPStatusError, ValueError):
+                        # The upstream answered, so it is healthy even though
+                        # this request was rejected or malformed; don't retry.
+                        self.breaker.record_success()
+                        return None
+                    self.breaker.record_success()
+                    return payload
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (e.g. the caller disconnected): that says nothing
+            # about the upstream, but a claimed probe must be handed back or
+            # the breaker would refuse every call from then on.
+            self.breaker.release_probe()
+            raise
+
+        self.breaker.record_failure()
+        return None
+
+
+vision_client = VisionClient()
@@ -114,6 +114,7 @@ CREATE TABLE IF NOT EXISTS body_metrics (
 );
 
 CREATE INDEX IF NOT EXISTS idx_metrics_date_metric ON body_metrics(recorded_date, metric);
+CREATE INDEX IF NOT EXISTS idx_metrics_metric_date ON body_metrics(metric, recorded_date);
 CREATE UNIQUE INDEX IF NOT EXISTS uq_body_metrics_recorded_metric_source
 ON body_metrics(recorded_date, metric, source)
 WHERE source = 'apple_health';
@@ -132,10 +133,20 @@ CREATE TABLE IF NOT EXISTS lab_results (
     reference_high  REAL,
     flag            TEXT,           -- "H", "L", "HH", "LL"
     notes           TEXT,
-    created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
+    created_at      DATETIME NOT NULL DEFAULT (datetime('now')),
+    -- Derived on write (services/labs.py): the marker's previous draw, the
+    -- change since it, and 'H'/'L' when outside the reference range.
+    previous_value  REAL,
+    delta           REAL,
+    range_flag      TEXT
 );
 
-CREATE INDEX IF NOT EXISTS idx_labs_marker ON lab_results(marker, drawn_date);
+CREATE INDEX IF NOT EXISTS idx_labs_drawn_date ON lab_results(drawn_date, id);
+-- Covers marker_trends, so trend reads never touch the table.
+CREATE INDEX IF NOT EXISTS idx_labs_marker_trend ON lab_results(
+    marker, drawn_date, id, value, unit, previous_value, delta, range_flag,
+    flag, panel, reference_low, reference_high
+);
 
 -- ─────────────────────────────────────────
 -- SUPPLEMENTS
@@ -152,6 +163,9 @@ CREATE TABLE IF NOT EXISTS supplements (
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
 
+CREATE INDEX IF NOT EXISTS idx_supplements_started
+    ON supplements(COALESCE(started_date, date(created_at)), id);
+
 CREATE TABLE IF NOT EXISTS supplement_logs (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     supplement_id   INTEGER NOT NULL REFERENCES supplements(id),
@@ -160,6 +174,63 @@ CREATE TABLE IF NOT EXISTS supplement_logs (
     notes           TEXT,
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
+-- One log per supplement per day: uq_supplement_logs_day, created in
+-- db.init_db after older duplicates are removed.
+
+-- Taken/logged day counts per supplement and month, kept by the triggers
+-- below so long-range adherence never rescans the logs.
+CREATE TABLE IF NOT EXISTS supplement_adherence_monthly (
+    supplement_id   INTEGER NOT NULL,
+    month           TEXT NOT NULL,  -- YYYY-MM
+    days_logged     INTEGER NOT NULL DEFAULT 0,
+    days_taken      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (supplement_id, month)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_supplement_logs_rollup_insert
+AFTER INSERT ON supplement_logs
+BEGIN
+    INSERT INTO supplement_adherence_monthly
+        (supplement_id, month, days_logged, days_taken)
+    VALUES (NEW.supplement_id, substr(NEW.recorded_date, 1, 7), 1, NEW.taken != 0)
+    ON CONFLICT(supplement_id, month) DO UPDATE SET
+        days_logged = days_logged + 1,
+        days_taken = days_taken + (NEW.taken != 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_supplement_logs_rollup_delete
+AFTER DELETE ON supplement_logs
+BEGIN
+    UPDATE supplement_adherence_monthly
+    SET days_logged = days_logged - 1,
+        days_taken = days_taken - (OLD.taken != 0)
+    WHERE supplement_id = OLD.supplement_id
+      AND month = substr(OLD.recorded_date, 1, 7);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_supplement_logs_rollup_update
+AFTER UPDATE OF supplement_id, recorded_date, taken ON supplement_logs
+BEGIN
+    UPDATE supplement_adherence_monthly
+    SET days_logged = days_logged - 1,
+        days_taken = days_taken - (OLD.taken != 0)
+    WHERE supplement_id = OLD.supplement_id
+      AND month = substr(OLD.recorded_date, 1, 7);
+    INSERT INTO supplement_adherence_monthly
+        (supplement_id, month, days_logged, days_taken)
+    VALUES (NEW.supplement_id, substr(NEW.recorded_date, 1, 7), 1, NEW.taken != 0)
+    ON CONFLICT(supplement_id, month) DO UPDATE SET
+        days_logged = days_logged + 1,
+        days_taken = days_taken + (NEW.taken != 0);
+END;
+
+-- Months logged before the rollup existed. Every month logged since has a
+-- row maintained by the triggers, so this only ever fills gaps.
+INSERT OR IGNORE INTO supplement_adherence_monthly
+    (supplement_id, month, days_logged, days_taken)
+SELECT supplement_id, substr(recorded_date, 1, 7), COUNT(*), SUM(taken != 0)
+FROM supplement_logs
+GROUP BY supplement_id, substr(recorded_date, 1, 7);
 
 -- ─────────────────────────────────────────
 -- MEDICATIONS
@@ -177,6 +248,9 @@ CREATE TABLE IF NOT EXISTS medications (
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
 
+CREATE INDEX IF NOT EXISTS idx_medications_started
+    ON medications(COALESCE(started_date, date(created_at)), id);
+
 -- ─────────────────────────────────────────
 -- MEDICAL HISTORY
 -- ─────────────────────────────────────────
@@ -191,6 +265,9 @@ CREATE TABLE IF NOT EXISTS medical_history (
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
 
+CREATE INDEX IF NOT EXISTS idx_medical_history_date
+    ON medical_history(COALESCE(date, date(created_at)), id);
+
 -- ─────────────────────────────────────────
 -- TRAINING INTELLIGENCE
 -- ─────────────────────────────────────────
@@ -234,6 +311,10 @@ CREATE TABLE IF NOT EXISTS targets (
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
 
+-- Covers the as-of service's load, which reads targets in this order.
+CREATE INDEX IF NOT EXISTS idx_targets_metric_effective
+    ON targets(metric, effective_date, id, value);
+
 -- ─────────────────────────────────────────
 -- GOALS
 -- ─────────────────────────────────────────
@@ -251,6 +332,8 @@ CREATE TABLE IF NOT EXISTS goals (
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
 
+CREATE INDEX IF NOT EXISTS idx_goals_start_date ON goals(start_date, id);
+
 CREATE TABLE IF NOT EXISTS goal_plans (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     goal_id         INTEGER NOT NULL REFERENCES goals(id),
@@ -259,6 +342,599 @@ CREATE TABLE IF NOT EXISTS goal_plans (
     created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
 );
 
+-- ─────────────────────────────────────────
+-- FOOD PHOTO ESTIMATE CACHE
+-- ─────────────────────────────────────────
+-- Vision model results keyed by a hash of (photo, description, servings, model).
+CREATE TABLE IF NOT EXISTS vision_estimate_cache (
+    cache_key       TEXT PRIMARY KEY,
+    model           TEXT NOT NULL,
+    analysis        TEXT NOT NULL,  -- JSON {"estimate", "method", "confidence"}
+    hit_count       INTEGER NOT NULL DEFAULT 0,
+    created_at      DATETIME NOT NULL DEFAULT (datetime('now')),
+    last_used_at    DATETIME NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_vision_cache_last_used
+ON vision_estimate_cache(last_used_at);
+
+-- ─────────────────────────────────────────
+-- FOOD CATALOG
+-- ─────────────────────────────────────────
+-- One row per distinct food name (lower/trimmed), summarising its most
+-- recent entry. Macros are per serving. The triggers below only queue the
+-- touched names; services/food_catalog.py folds the queue in before reads.
+CREATE TABLE IF NOT EXISTS food_catalog (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    normalized_name TEXT NOT NULL UNIQUE,
+    name            TEXT NOT NULL,
+    meal_type       TEXT NOT NULL,
+    calories        REAL,
+    protein_g       REAL,
+    carbs_g         REAL,
+    fat_g           REAL,
+    fiber_g         REAL,
+    sodium_mg       REAL,
+    alcohol_g       REAL,
+    alcohol_calories REAL,
+    alcohol_type    TEXT,
+    servings        REAL NOT NULL DEFAULT 1.0,  -- servings on the most recent entry
+    use_count       INTEGER NOT NULL DEFAULT 0,
+    last_used_date  DATE,
+    last_entry_id   INTEGER,
+    is_favorite     INTEGER NOT NULL DEFAULT 0,
+    created_at      DATETIME NOT NULL DEFAULT (datetime('now')),
+    updated_at      DATETIME NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_food_catalog_recent
+ON food_catalog(is_favorite DESC, last_used_date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_food_entries_normalized_name
+ON food_entries(lower(trim(name))) WHERE deleted_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS food_catalog_pending (
+    normalized_name TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS food_catalog_fts USING fts5(
+    name,
+    content='food_catalog',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_food_catalog_fts_insert
+AFTER INSERT ON food_catalog
+BEGIN
+    INSERT INTO food_catalog_fts(rowid, name) VALUES (NEW.id, NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_catalog_fts_update
+AFTER UPDATE OF name ON food_catalog
+BEGIN
+    INSERT INTO food_catalog_fts(food_catalog_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    INSERT INTO food_catalog_fts(rowid, name) VALUES (NEW.id, NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_catalog_fts_delete
+AFTER DELETE ON food_catalog
+BEGIN
+    INSERT INTO food_catalog_fts(food_catalog_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_catalog_insert
+AFTER INSERT ON food_entries
+BEGIN
+    INSERT OR IGNORE INTO food_catalog_pending VALUES (lower(trim(NEW.name)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_catalog_update
+AFTER UPDATE ON food_entries
+BEGIN
+    INSERT OR IGNORE INTO food_catalog_pending VALUES (lower(trim(OLD.name)));
+    INSERT OR IGNORE INTO food_catalog_pending VALUES (lower(trim(NEW.name)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_catalog_delete
+AFTER DELETE ON food_entries
+BEGIN
+    INSERT OR IGNORE INTO food_catalog_pending VALUES (lower(trim(OLD.name)));
+END;
+
+-- ─────────────────────────────────────────
+-- DERIVED DAILY FEATURES
+-- ─────────────────────────────────────────
+-- Per-day feature vectors consumed by the narrative insight rules.
+-- Rows are computed lazily and dropped by the triggers below whenever
+-- the source data for that day changes.
+CREATE TABLE IF NOT EXISTS daily_features (
+    feature_date    DATE NOT NULL,
+    feature         TEXT NOT NULL,
+    value           REAL,
+    computed_at     DATETIME NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (feature_date, feature)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_features_insert
+AFTER INSERT ON food_entries
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = NEW.recorded_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_features_update
+AFTER UPDATE ON food_entries
+BEGIN
+    DELETE FROM daily_features WHERE feature_date IN (OLD.recorded_date, NEW.recorded_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_features_delete
+AFTER DELETE ON food_entries
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = OLD.recorded_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_features_insert
+AFTER INSERT ON sleep_records
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = NEW.recorded_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_features_update
+AFTER UPDATE ON sleep_records
+BEGIN
+    DELETE FROM daily_features WHERE feature_date IN (OLD.recorded_date, NEW.recorded_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_features_delete
+AFTER DELETE ON sleep_records
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = OLD.recorded_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_sessions_features_insert
+AFTER INSERT ON exercise_sessions
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = NEW.recorded_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_sessions_features_update
+AFTER UPDATE ON exercise_sessions
+BEGIN
+    DELETE FROM daily_features WHERE feature_date IN (OLD.recorded_date, NEW.recorded_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_sessions_features_delete
+AFTER DELETE ON exercise_sessions
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = OLD.recorded_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_hr_zones_features_insert
+AFTER INSERT ON exercise_hr_zones
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = (
+        SELECT recorded_date FROM exercise_sessions WHERE id = NEW.session_id
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_hr_zones_features_delete
+AFTER DELETE ON exercise_hr_zones
+BEGIN
+    DELETE FROM daily_features WHERE feature_date = (
+        SELECT recorded_date FROM exercise_sessions WHERE id = OLD.session_id
+    );
+END;
+
+-- ─────────────────────────────────────────
+-- METRIC BASELINES
+-- ─────────────────────────────────────────
+-- Trailing 7/14/28-day statistics per (date, metric), windows ending on
+-- baseline_date inclusive. When a day's value changes, the (at most 28) rows
+-- whose windows cover it are recomputed from metric_daily_values.
+CREATE TABLE IF NOT EXISTS metric_baselines (
+    baseline_date   DATE NOT NULL,
+    metric          TEXT NOT NULL,
+    n_7             INTEGER NOT NULL DEFAULT 0,
+    mean_7          REAL,
+    sd_7            REAL,
+    n_14            INTEGER NOT NULL DEFAULT 0,
+    mean_14         REAL,
+    sd_14           REAL,
+    n_28            INTEGER NOT NULL DEFAULT 0,
+    mean_28         REAL,
+    sd_28           REAL,
+    updated_at      DATETIME NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (baseline_date, metric)
+) WITHOUT ROWID;
+
+-- Each metric's value per day as of the last refresh; baseline windows are
+-- recomputed from these.
+CREATE TABLE IF NOT EXISTS metric_daily_values (
+    metric          TEXT NOT NULL,
+    value_date      DATE NOT NULL,
+    value           REAL NOT NULL,
+    PRIMARY KEY (metric, value_date)
+) WITHOUT ROWID;
+
+-- Source days whose values may have changed since the last refresh. The
+-- triggers skip days already queued rather than relying on OR IGNORE, which
+-- an outer UPSERT would override.
+CREATE TABLE IF NOT EXISTS metric_baselines_pending (
+    source_table    TEXT NOT NULL,
+    value_date      DATE NOT NULL,
+    PRIMARY KEY (source_table, value_date)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_baselines_insert
+AFTER INSERT ON sleep_records
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'sleep_records', day FROM (SELECT NEW.recorded_date AS day)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'sleep_records'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_baselines_update
+AFTER UPDATE ON sleep_records
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'sleep_records', day FROM (SELECT OLD.recorded_date AS day UNION SELECT NEW.recorded_date)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'sleep_records'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_baselines_delete
+AFTER DELETE ON sleep_records
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'sleep_records', day FROM (SELECT OLD.recorded_date AS day)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'sleep_records'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_baselines_insert
+AFTER INSERT ON food_entries
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'food_entries', day FROM (SELECT NEW.recorded_date AS day)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'food_entries'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_baselines_update
+AFTER UPDATE ON food_entries
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'food_entries', day FROM (SELECT OLD.recorded_date AS day UNION SELECT NEW.recorded_date)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'food_entries'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_baselines_delete
+AFTER DELETE ON food_entries
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'food_entries', day FROM (SELECT OLD.recorded_date AS day)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'food_entries'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_body_metrics_baselines_insert
+AFTER INSERT ON body_metrics
+WHEN NEW.metric = 'weight_lbs'
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'body_metrics', day FROM (SELECT NEW.recorded_date AS day)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'body_metrics'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_body_metrics_baselines_update
+AFTER UPDATE ON body_metrics
+WHEN 'weight_lbs' IN (OLD.metric, NEW.metric)
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'body_metrics', day FROM (SELECT OLD.recorded_date AS day UNION SELECT NEW.recorded_date)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'body_metrics'
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_body_metrics_baselines_delete
+AFTER DELETE ON body_metrics
+WHEN OLD.metric = 'weight_lbs'
+BEGIN
+    INSERT INTO metric_baselines_pending (source_table, value_date)
+    SELECT 'body_metrics', day FROM (SELECT OLD.recorded_date AS day)
+    WHERE day NOT IN (
+        SELECT value_date FROM metric_baselines_pending WHERE source_table = 'body_metrics'
+    );
+END;
+
+-- ─────────────────────────────────────────
+-- ANOMALIES
+-- ─────────────────────────────────────────
+-- Days flagged by the online detectors that run after each ingest.
+CREATE TABLE IF NOT EXISTS anomalies (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    metric          TEXT NOT NULL,
+    recorded_date   DATE NOT NULL,
+    value           REAL NOT NULL,
+    expected        REAL NOT NULL,
+    z_score         REAL NOT NULL,
+    direction       TEXT NOT NULL CHECK(direction IN ('high','low')),
+    created_at      DATETIME NOT NULL DEFAULT (datetime('now')),
+    acknowledged_at DATETIME,
+    UNIQUE(metric, recorded_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_anomalies_date ON anomalies(recorded_date);
+
+-- Per-metric EWMA state. prev_* is the state before last_date was applied,
+-- so a re-synced latest day can be rescored without replaying history.
+CREATE TABLE IF NOT EXISTS anomaly_detector_state (
+    metric          TEXT PRIMARY KEY,
+    last_date       DATE NOT NULL,
+    last_value      REAL NOT NULL,
+    n               INTEGER NOT NULL,
+    mean            REAL NOT NULL,
+    var             REAL NOT NULL,
+    prev_n          INTEGER NOT NULL,
+    prev_mean       REAL NOT NULL,
+    prev_var        REAL NOT NULL,
+    updated_at      DATETIME NOT NULL DEFAULT (datetime('now'))
+);
+
+-- ─────────────────────────────────────────
+-- DATA GENERATIONS
+-- ─────────────────────────────────────────
+-- Per-table change counters, bumped by the triggers below. Derived results
+-- cached in memory record the generations they were computed from and are
+-- reused until any of them moves.
+CREATE TABLE IF NOT EXISTS data_generations (
+    source_table    TEXT PRIMARY KEY,
+    generation      INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO data_generations (source_table) VALUES
+    ('food_entries'),
+    ('sleep_records'),
+    ('exercise_sessions'),
+    ('exercise_hr_zones'),
+    ('body_metrics'),
+    ('lab_results'),
+    ('medications'),
+    ('supplements'),
+    ('targets'),
+    ('medical_history'),
+    ('goals');
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_generation_insert
+AFTER INSERT ON food_entries
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'food_entries';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_generation_update
+AFTER UPDATE ON food_entries
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'food_entries';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_food_entries_generation_delete
+AFTER DELETE ON food_entries
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'food_entries';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_generation_insert
+AFTER INSERT ON sleep_records
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'sleep_records';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_generation_update
+AFTER UPDATE ON sleep_records
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'sleep_records';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sleep_records_generation_delete
+AFTER DELETE ON sleep_records
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'sleep_records';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_sessions_generation_insert
+AFTER INSERT ON exercise_sessions
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'exercise_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_sessions_generation_update
+AFTER UPDATE ON exercise_sessions
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'exercise_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_sessions_generation_delete
+AFTER DELETE ON exercise_sessions
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'exercise_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_hr_zones_generation_insert
+AFTER INSERT ON exercise_hr_zones
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'exercise_hr_zones';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_hr_zones_generation_update
+AFTER UPDATE ON exercise_hr_zones
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'exercise_hr_zones';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_exercise_hr_zones_generation_delete
+AFTER DELETE ON exercise_hr_zones
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'exercise_hr_zones';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_body_metrics_generation_insert
+AFTER INSERT ON body_metrics
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'body_metrics';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_body_metrics_generation_update
+AFTER UPDATE ON body_metrics
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'body_metrics';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_body_metrics_generation_delete
+AFTER DELETE ON body_metrics
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'body_metrics';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lab_results_generation_insert
+AFTER INSERT ON lab_results
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'lab_results';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lab_results_generation_update
+AFTER UPDATE ON lab_results
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'lab_results';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_lab_results_generation_delete
+AFTER DELETE ON lab_results
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'lab_results';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medications_generation_insert
+AFTER INSERT ON medications
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'medications';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medications_generation_update
+AFTER UPDATE ON medications
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'medications';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medications_generation_delete
+AFTER DELETE ON medications
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'medications';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_supplements_generation_insert
+AFTER INSERT ON supplements
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'supplements';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_supplements_generation_update
+AFTER UPDATE ON supplements
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'supplements';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_supplements_generation_delete
+AFTER DELETE ON supplements
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'supplements';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_targets_generation_insert
+AFTER INSERT ON targets
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'targets';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_targets_generation_update
+AFTER UPDATE ON targets
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'targets';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_targets_generation_delete
+AFTER DELETE ON targets
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'targets';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medical_history_generation_insert
+AFTER INSERT ON medical_history
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'medical_history';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medical_history_generation_update
+AFTER UPDATE ON medical_history
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'medical_history';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medical_history_generation_delete
+AFTER DELETE ON medical_history
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'medical_history';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_goals_generation_insert
+AFTER INSERT ON goals
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'goals';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_goals_generation_update
+AFTER UPDATE ON goals
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'goals';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_goals_generation_delete
+AFTER DELETE ON goals
+BEGIN
+    UPDATE data_generations SET generation = generation + 1 WHERE source_table = 'goals';
+END;
+
+-- ─────────────────────────────────────────
+-- SCHEDULED JOBS
+-- ─────────────────────────────────────────
+-- One row per in-process scheduler job. A worker runs a due job only after
+-- claiming its lease, so several server processes can share the database.
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    name                TEXT PRIMARY KEY,
+    schedule            TEXT NOT NULL,
+    last_run_at         DATETIME,
+    last_status         TEXT CHECK(last_status IN ('ok', 'error')),
+    last_error          TEXT,
+    last_duration_ms    INTEGER,
+    next_run_at         DATETIME NOT NULL,
+    deferred_since      DATETIME,
+    lease_owner         TEXT,
+    lease_expires_at    DATETIME,
+    updated_at          DATETIME NOT NULL DEFAULT (datetime('now'))
+);
+
 -- Seed current targets
 INSERT OR IGNORE INTO targets (metric, value, effective_date, notes) VALUES
     ('calories',    2000, '2026-02-20', 'Daily calorie target'),
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare rows/sec for single-row and bulk write endpoints.
+
+Runs the API in-process against a throwaway database, so it never touches a
+real Driver instance:
+
+    python3 scripts/bench_bulk_writes.py --rows 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("TESTING", "1")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import db as db_module  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark single-row vs bulk write endpoints."
+    )
+    parser.add_argument("--rows", type=int, default=500, help="Rows per run.")
+    return parser.parse_args()
+
+
+def _food_items(count: int) -> list[dict]:
+    return [
+        {
+            "recorded_date": f"2026-01-{index % 28 + 1:02d}",
+            "meal_type": "lunch",
+            "name": f"Bench meal {index}",
+            "calories": 500,
+            "protein_g": 30,
+        }
+        for index in range(count)
+    ]
+
+
+def _metric_items(count: int) -> list[dict]:
+    return [
+        {
+            "recorded_date": f"2026-01-{index % 28 + 1:02d}",
+            "metric": "weight_lbs",
+            "value": 200 - index * 0.01,
+        }
+        for index in range(count)
+    ]
+
+
+def _set_items(count: int) -> list[dict]:
+    return [
+        {
+            "exercise_name": "Squat",
+            "set_number": index + 1,
+            "weight_lbs": 225,
+            "reps": 5,
+        }
+        for index in range(count)
+    ]
+
+
+def _rate(rows: int, seconds: float) -> float:
+    return rows / seconds if seconds else float("inf")
+
+
+def _time_single(client: TestClient, path: str, items: list[dict]) -> float:
+    started = time.perf_counter()
+    for item in items:
+        client.post(path, json=item).raise_for_status()
+    return time.perf_counter() - started
+
+
+def _time_bulk(client: TestClient, path: str, items: list[dict]) -> float:
+    started = time.perf_counter()
+    client.post(f"{path.rstrip('/')}/bulk", json={"items": items}).raise_for_status()
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_module.DATABASE_PATH = str(Path(tmp) / "bench.db")
+        from app.main import app
+
+        with TestClient(app) as client:
+            session = client.post(
+                "/api/v1/exercise/sessions",
+                json={"recorded_date": "2026-01-01", "session_type": "strength"},
+            ).json()
+            cases = [
+                ("food_entries", "/api/v1/food/", _food_items(args.rows)),
+                ("body_metrics", "/api/v1/metrics/", _metric_items(args.rows)),
+                (
+                    "exercise_sets",
+                    f"/api/v1/exercise/sessions/{session['id']}/sets",
+                    _set_items(args.rows),
+                ),
+            ]
+            print(
+                f"{'table':<15}{'single rows/s':>15}{'bulk rows/s':>15}{'speedup':>10}"
+            )
+            for table, path, items in cases:
+                single = _rate(args.rows, _time_single(client, path, items))
+                bulk = _rate(args.rows, _time_bulk(client, path, items))
+                print(
+                    f"{table:<15}{single:>15,.0f}{bulk:>15,.0f}{bulk / single:>9.1f}x"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
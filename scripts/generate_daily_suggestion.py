@@ -18,7 +18,18 @@ def parse_args() -> argparse.Namespace:
         description="Generate daily training suggestion in Driver."
     )
     parser.add_argument("--date", dest="target_date", help="Target date (YYYY-MM-DD).")
-    return parser.parse_args()
+    parser.add_argument(
+        "--from",
+        dest="date_from",
+        help="Regenerate every day from this date (YYYY-MM-DD); requires --to.",
+    )
+    parser.add_argument("--to", dest="date_to", help="Last day to regenerate.")
+    args = parser.parse_args()
+    if bool(args.date_from) != bool(args.date_to):
+        parser.error("--from and --to must be given together")
+    if args.date_from and args.target_date:
+        parser.error("use either --date or --from/--to")
+    return args
 
 
 def main() -> int:
@@ -27,11 +38,17 @@ def main() -> int:
     if DRIVER_API_TOKEN:
         headers["Authorization"] = f"Bearer {DRIVER_API_TOKEN}"
 
-    params = {"target_date": args.target_date} if args.target_date else None
+    if args.date_from:
+        # One request regenerates the whole range server-side.
+        path = "/api/v1/training/suggestions/backfill"
+        params = {"from": args.date_from, "to": args.date_to}
+    else:
+        path = "/api/v1/training/suggestions/generate"
+        params = {"target_date": args.target_date} if args.target_date else None
     try:
-        with httpx.Client(timeout=30.0) as client:
+        with httpx.Client(timeout=120.0) as client:
             response = client.post(
-                f"{DRIVER_API_BASE}/api/v1/training/suggestions/generate",
+                f"{DRIVER_API_BASE}{path}",
                 params=params,
                 headers=headers,
             )
@@ -39,7 +56,11 @@ def main() -> int:
             print(json.dumps(response.json(), indent=2))
         return 0
     except httpx.HTTPError as exc:
-        target = args.target_date or date.today().isoformat()
+        target = (
+            f"{args.date_from}..{args.date_to}"
+            if args.date_from
+            else args.target_date or date.today().isoformat()
+        )
         print(f"generate_daily_suggestion failed for {target}: {exc}")
         return 1
 
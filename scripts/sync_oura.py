@@ -5,12 +5,25 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import sys
 from dataclasses import dataclass
 from datetime import date, timedelta
+from pathlib import Path
 from typing import Any
 
 import httpx
 
+# Fetching and normalizing is shared with the in-process sync job.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.oura_client import (  # noqa: E402
+    build_ingest_payload,
+    fetch_collection,
+    normalize_readiness_entry,
+)
+
+__all__ = ["build_ingest_payload", "normalize_readiness_entry"]
+
 OURA_API_BASE = os.getenv("OURA_API_BASE", "https://api.ouraring.com")
 DRIVER_API_BASE = os.getenv("DRIVER_API_BASE", "http://localhost:8000")
 
@@ -83,63 +96,14 @@ def fetch_oura_collection(
     start_date: str,
     end_date: str,
 ) -> list[dict[str, Any]]:
-    records: list[dict[str, Any]] = []
-    next_token: str | None = None
-
-    while True:
-        params: dict[str, Any] = {"start_date": start_date, "end_date": end_date}
-        if next_token:
-            params["next_token"] = next_token
-        response = client.get(
-            f"{api_base}/v2/usercollection/{endpoint}",
-            params=params,
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        response.raise_for_status()
-        payload = response.json()
-        records.extend(payload.get("data") or [])
-        next_token = payload.get("next_token")
-        if not next_token:
-            break
-
-    return records
-
-
-def _nested_value(entry: dict[str, Any], *path: str) -> Any:
-    current: Any = entry
-    for key in path:
-        if not isinstance(current, dict):
-            return None
-        current = current.get(key)
-    return current
-
-
-def normalize_readiness_entry(entry: dict[str, Any]) -> dict[str, Any]:
-    return {
-        "day": entry.get("day") or entry.get("date"),
-        "score": entry.get("score"),
-        "average_hrv": (
-            entry.get("average_hrv")
-            or _nested_value(entry, "contributors", "hrv_balance", "value")
-            or _nested_value(entry, "contributors", "hrv", "value")
-        ),
-        "resting_heart_rate": (
-            entry.get("resting_heart_rate")
-            or _nested_value(entry, "contributors", "resting_heart_rate", "value")
-        ),
-    }
-
-
-def build_ingest_payload(
-    sleep: list[dict[str, Any]],
-    readiness: list[dict[str, Any]],
-    activity: list[dict[str, Any]],
-) -> dict[str, Any]:
-    return {
-        "sleep": sleep,
-        "readiness": [normalize_readiness_entry(entry) for entry in readiness],
-        "activity": activity,
-    }
+    return fetch_collection(
+        client,
+        token=token,
+        endpoint=endpoint,
+        start=date.fromisoformat(start_date),
+        end=date.fromisoformat(end_date),
+        api_base=api_base,
+    )
 
 
 def post_driver_ingest(
@@ -1,3 +1,7 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import pytest
@@ -19,3 +23,92 @@ def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
 @pytest.fixture
 def db_module_fixture():
     return db_module
+
+
+class VisionStandIn:
+    """Local chat-completions server that answers with a fixed estimate."""
+
+    def __init__(self):
+        self.delay_seconds = 0.0
+        self.status_code = 200
+        self.estimate = {
+            "name": "Grilled chicken bowl",
+            "calories": 610,
+            "protein_g": 48,
+            "carbs_g": 52,
+            "fat_g": 20,
+            "fiber_g": 7,
+            "sodium_mg": 820,
+            "alcohol_g": 0,
+            "alcohol_calories": 0,
+            "alcohol_type": None,
+            "confidence": 0.82,
+        }
+        self.fail_next = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests: list[dict] = []
+        # Cleared to hold requests in flight until the test sets it again.
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    @property
+    def call_count(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def begin(self, body: dict) -> int:
+        with self._lock:
+            self.requests.append(body)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return 503
+            return self.status_code
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def vision_server(monkeypatch: pytest.MonkeyPatch) -> VisionStandIn:
+    stand_in = VisionStandIn()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            status_code = stand_in.begin(json.loads(self.rfile.read(length) or b"{}"))
+            try:
+                stand_in.gate.wait(timeout=10)
+                if stand_in.delay_seconds:
+                    time.sleep(stand_in.delay_seconds)
+            finally:
+                stand_in.end()
+            body = json.dumps(
+                {"choices": [{"message": {"content": json.dumps(stand_in.estimate)}}]}
+            ).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    try:
+        yield stand_in
+    finally:
+        stand_in.gate.set()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,100 @@
+def _seed(client):
+    food = [
+        {
+            "recorded_date": day,
+            "meal_type": "lunch",
+            "name": "Bowl",
+            "calories": calories,
+            "protein_g": 40,
+        }
+        for day, calories in (
+            ("2026-03-02", 2000),
+            ("2026-03-02", 400),
+            ("2026-03-03", 1800),
+            ("2026-03-10", 2200),
+            ("2026-02-24", 2600),
+        )
+    ]
+    assert client.post("/api/v1/food/bulk", json={"items": food}).status_code == 201
+    for day, score in (("2026-03-02", 80), ("2026-03-04", 70), ("2026-02-23", 60)):
+        response = client.post(
+            "/api/v1/sleep/",
+            json={"recorded_date": day, "sleep_score": score, "source": "oura"},
+        )
+        assert response.status_code == 201
+    for day in ("2026-03-03", "2026-03-05", "2026-03-11"):
+        client.post(
+            "/api/v1/exercise/sessions",
+            json={"recorded_date": day, "session_type": "strength"},
+        )
+    metrics = [
+        {
+            "recorded_date": "2026-03-02",
+            "metric": "steps",
+            "value": 9000,
+            "source": "apple_health",
+        },
+        {"recorded_date": "2026-03-02", "metric": "steps", "value": 100},
+    ]
+    assert (
+        client.post("/api/v1/metrics/bulk", json={"items": metrics}).status_code == 201
+    )
+
+
+def test_aggregate_buckets_fields_across_tables(client):
+    _seed(client)
+
+    response = client.get(
+        "/api/v1/aggregate/",
+        params={
+            "fields": "calories,calories:sum,sleep_score,session_count,steps",
+            "from": "2026-03-02",
+            "to": "2026-03-15",
+            "granularity": "week",
+        },
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    (current,) = payload["periods"]
+    assert current["buckets"] == ["2026-03-02", "2026-03-09"]
+    values = current["values"]
+    assert values["calories"] == [2100.0, 2200.0]
+    assert values["calories:sum"] == [4200.0, 2200.0]
+    assert values["sleep_score"] == [75.0, None]
+    assert values["session_count"] == [2, 1]
+    # Apple Health outranks the manual step count for the same day.
+    assert values["steps"] == [9000.0, None]
+
+
+def test_aggregate_compares_periods_in_one_request(client):
+    _seed(client)
+
+    response = client.get(
+        "/api/v1/aggregate/",
+        params=[
+            ("fields", "calories,sleep_score"),
+            ("from", "2026-03-02"),
+            ("to", "2026-03-08"),
+            ("granularity", "total"),
+            ("compare", "previous"),
+            ("compare", "2026-03-09..2026-03-15"),
+        ],
+    )
+    assert response.status_code == 200
+    current, previous, custom = response.json()["periods"]
+    assert current["values"] == {"calories": [2100.0], "sleep_score": [75.0]}
+    assert (previous["from"], previous["to"]) == ("2026-02-23", "2026-03-01")
+    assert previous["values"] == {"calories": [2600.0], "sleep_score": [60.0]}
+    assert custom["label"] == "2026-03-09..2026-03-15"
+    assert custom["values"] == {"calories": [2200.0], "sleep_score": [None]}
+
+
+def test_aggregate_rejects_unknown_fields_and_reducers(client):
+    for fields in ("calories,unknown", "calories:median"):
+        response = client.get("/api/v1/aggregate/", params={"fields": fields})
+        assert response.status_code == 422
+
+    listing = client.get("/api/v1/aggregate/fields")
+    assert {"name": "steps", "source": "body_metrics", "reducer": "avg"} in (
+        listing.json()
+    )
@@ -107,3 +107,136 @@ def test_generate_weekly_digest_includes_week_range_summary(client):
     assert latest_response.status_code == 200
     latest_payload = latest_response.json()
     assert latest_payload["weekly"]["digest_date"] == "2026-02-27"
+
+
+def test_backfill_digests_matches_single_day_generation(client):
+    for recorded_date, calories in [
+        ("2026-02-20", 1800),
+        ("2026-02-23", 2300),
+        ("2026-02-26", 2050),
+    ]:
+        client.post(
+            "/api/v1/food/",
+            json={
+                "recorded_date": recorded_date,
+                "meal_type": "dinner",
+                "name": "Dinner",
+                "calories": calories,
+                "protein_g": 150,
+            },
+        )
+    client.post(
+        "/api/v1/sleep",
+        json={"recorded_date": "2026-02-24", "duration_min": 450, "sleep_score": 81},
+    )
+    client.post(
+        "/api/v1/exercise/sessions",
+        json={
+            "recorded_date": "2026-02-25",
+            "session_type": "strength",
+            "name": "Lift",
+            "duration_min": 50,
+            "source": "manual",
+        },
+    )
+
+    response = client.post(
+        "/api/v1/coaching/digests/backfill",
+        params={"from": "2026-02-20", "to": "2026-02-27"},
+    )
+    assert response.status_code == 200
+    assert response.json()["generated"] == {"daily": 8, "weekly": 8}
+
+    latest = client.get("/api/v1/coaching/digests/latest").json()
+    assert latest["weekly"]["digest_date"] == "2026-02-27"
+    backfilled = latest["weekly"]
+    single = client.post(
+        "/api/v1/coaching/digests/generate-weekly", params={"ending": "2026-02-27"}
+    ).json()
+    assert single["summary"] == backfilled["summary"]
+    assert single["highlights"] == backfilled["highlights"]
+    assert single["summary"] == (
+        "Weekly digest for 2026-02-21 to 2026-02-27: 1 workouts and 2175 avg kcal/day."
+    )
+
+    daily = client.post(
+        "/api/v1/coaching/digests/generate-daily", params={"target_date": "2026-02-24"}
+    ).json()
+    assert daily["summary"] == (
+        "Daily digest for 2026-02-24: 0 food entries, 0 workouts, sleep score 81."
+    )
+
+    only_daily = client.post(
+        "/api/v1/coaching/digests/backfill",
+        params={"from": "2026-01-01", "to": "2026-01-03", "types": "daily"},
+    )
+    assert only_daily.json()["generated"] == {"daily": 3}
+
+    assert (
+        client.post(
+            "/api/v1/coaching/digests/backfill",
+            params={"from": "2026-02-27", "to": "2026-02-20"},
+        ).status_code
+        == 422
+    )
+    assert (
+        client.post(
+            "/api/v1/coaching/digests/backfill",
+            params={"from": "2026-02-20", "to": "2026-02-27", "types": "monthly"},
+        ).status_code
+        == 422
+    )
+
+
+def test_digest_history_pages_one_type_by_date(client):
+    client.post(
+        "/api/v1/coaching/digests/backfill",
+        params={"from": "2026-03-01", "to": "2026-03-10"},
+    )
+
+    latest = client.get("/api/v1/coaching/digests/latest").json()
+    assert latest["daily"]["digest_date"] == "2026-03-10"
+    assert latest["weekly"]["digest_type"] == "weekly"
+
+    first = client.get(
+        "/api/v1/coaching/digests",
+        params={"type": "weekly", "from": "2026-03-03", "to": "2026-03-08", "limit": 4},
+    )
+    assert first.status_code == 200
+    assert [row["digest_date"] for row in first.json()] == [
+        "2026-03-08",
+        "2026-03-07",
+        "2026-03-06",
+        "2026-03-05",
+    ]
+    assert {row["digest_type"] for row in first.json()} == {"weekly"}
+    assert isinstance(first.json()[0]["highlights"], list)
+
+    second = client.get(
+        "/api/v1/coaching/digests",
+        params={
+            "type": "weekly",
+            "from": "2026-03-03",
+            "to": "2026-03-08",
+            "limit": 4,
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+    )
+    assert [row["digest_date"] for row in second.json()] == [
+        "2026-03-04",
+        "2026-03-03",
+    ]
+    assert "X-Next-Cursor" not in second.headers
+
+    daily = client.get("/api/v1/coaching/digests").json()
+    assert len(daily) == 10
+    assert daily[0]["digest_type"] == "daily"
+
+    assert (
+        client.get("/api/v1/coaching/digests", params={"cursor": "nope"}).status_code
+        == 400
+    )
+    assert (
+        client.get("/api/v1/coaching/digests", params={"type": "monthly"}).status_code
+        == 422
+    )
@@ -260,3 +260,63 @@ def test_dashboard_today_returns_hr_zone_narrative_insight(client, db_module_fix
         "target at least 50% for aerobic base/fat-burn work" in insight
         for insight in insights
     )
+
+
+def test_dashboard_insight_features_are_cached_and_invalidated_on_write(
+    client, db_module_fixture
+):
+    for recorded_date, sleep_score in [
+        ("2026-02-25", 80),
+        ("2026-02-26", 82),
+        ("2026-02-27", 81),
+    ]:
+        response = client.post(
+            "/api/v1/sleep",
+            json={
+                "recorded_date": recorded_date,
+                "sleep_score": sleep_score,
+                "source": "oura",
+            },
+        )
+        assert response.status_code == 201
+
+    first = client.get("/api/v1/dashboard/today", params={"target_date": "2026-02-27"})
+    assert first.status_code == 200
+    assert first.json()["insights"] == []
+
+    conn = db_module_fixture.get_db()
+    try:
+        cached_days = conn.execute(
+            "SELECT COUNT(DISTINCT feature_date) FROM daily_features"
+        ).fetchone()[0]
+        assert cached_days == 14
+        assert (
+            conn.execute(
+                """SELECT value FROM daily_features
+                   WHERE feature_date='2026-02-27' AND feature='sleep_score'"""
+            ).fetchone()[0]
+            == 81
+        )
+    finally:
+        conn.close()
+
+    update = client.post(
+        "/api/v1/sleep",
+        json={"recorded_date": "2026-02-27", "sleep_score": 70, "source": "oura"},
+    )
+    assert update.status_code == 201
+
+    conn = db_module_fixture.get_db()
+    try:
+        assert (
+            conn.execute(
+                "SELECT COUNT(*) FROM daily_features WHERE feature_date='2026-02-27'"
+            ).fetchone()[0]
+            == 0
+        )
+    finally:
+        conn.close()
+
+    second = client.get("/api/v1/dashboard/today", params={"target_date": "2026-02-27"})
+    assert second.status_code == 200
+    assert any("Sleep score is 70" in insight for insight in second.json()["insights"])
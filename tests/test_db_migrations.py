@@ -63,3 +63,159 @@ def test_init_db_migrates_food_entries_check_to_allow_meal(tmp_path: Path, monke
         assert count == 2
     finally:
         conn.close()
+
+
+def test_init_db_dedupes_labs_and_backfills_trend_columns(tmp_path: Path, monkeypatch):
+    db_path = tmp_path / "legacy_labs.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(
+            """
+            CREATE TABLE lab_results (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                drawn_date      DATE NOT NULL,
+                panel           TEXT NOT NULL,
+                marker          TEXT NOT NULL,
+                value           REAL NOT NULL,
+                unit            TEXT NOT NULL,
+                reference_low   REAL,
+                reference_high  REAL,
+                flag            TEXT,
+                notes           TEXT,
+                created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
+            );
+            CREATE INDEX idx_labs_marker ON lab_results(marker, drawn_date);
+            INSERT INTO lab_results (drawn_date, panel, marker, value, unit, reference_high)
+            VALUES ('2025-06-01', 'Lipid Panel', 'LDL', 120, 'mg/dL', 99),
+                   ('2026-01-01', 'Lipid Panel', 'LDL', 90, 'mg/dL', 99),
+                   ('2026-01-01', 'Lipid Panel', 'LDL', 95, 'mg/dL', 99);
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    monkeypatch.setattr(db_module, "DATABASE_PATH", str(db_path))
+    db_module.init_db()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            """SELECT previous_value, delta, range_flag
+               FROM lab_results ORDER BY drawn_date"""
+        ).fetchall()
+        assert rows == [(None, None, "H"), (120.0, -25.0, None)]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(lab_results)")}
+        assert "idx_labs_marker_trend" in indexes
+        assert "idx_labs_marker" not in indexes
+        assert "uq_lab_results_draw" in indexes
+    finally:
+        conn.close()
+
+
+def test_init_db_dedupes_supplement_logs_and_seeds_rollup(tmp_path: Path, monkeypatch):
+    db_path = tmp_path / "legacy_supplements.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(
+            """
+            CREATE TABLE supplements (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                name            TEXT NOT NULL,
+                dose            TEXT,
+                frequency       TEXT,
+                active          INTEGER NOT NULL DEFAULT 1,
+                started_date    DATE,
+                stopped_date    DATE,
+                notes           TEXT,
+                created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
+            );
+            CREATE TABLE supplement_logs (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplement_id   INTEGER NOT NULL REFERENCES supplements(id),
+                recorded_date   DATE NOT NULL,
+                taken           INTEGER NOT NULL DEFAULT 1,
+                notes           TEXT,
+                created_at      DATETIME NOT NULL DEFAULT (datetime('now'))
+            );
+            INSERT INTO supplements (name) VALUES ('Creatine');
+            INSERT INTO supplement_logs (supplement_id, recorded_date, taken)
+            VALUES (1, '2026-01-01', 1),
+                   (1, '2026-01-01', 0),
+                   (1, '2026-01-02', 1);
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    monkeypatch.setattr(db_module, "DATABASE_PATH", str(db_path))
+    db_module.init_db()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        logs = conn.execute(
+            "SELECT recorded_date, taken FROM supplement_logs ORDER BY recorded_date"
+        ).fetchall()
+        assert logs == [("2026-01-01", 0), ("2026-01-02", 1)]
+        rollup = conn.execute(
+            "SELECT month, days_logged, days_taken FROM supplement_adherence_monthly"
+        ).fetchall()
+        assert rollup == [("2026-01", 2, 1)]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(supplement_logs)")}
+        assert "uq_supplement_logs_day" in indexes
+    finally:
+        conn.close()
+
+
+def test_init_db_drops_running_sum_columns_from_metric_baselines(
+    tmp_path: Path, monkeypatch
+):
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(
+            """
+            CREATE TABLE metric_baselines (
+                baseline_date   DATE NOT NULL,
+                metric          TEXT NOT NULL,
+                n_7             INTEGER NOT NULL DEFAULT 0,
+                sum_7           REAL NOT NULL DEFAULT 0,
+                sumsq_7         REAL NOT NULL DEFAULT 0,
+                mean_7          REAL,
+                sd_7            REAL,
+                n_14            INTEGER NOT NULL DEFAULT 0,
+                sum_14          REAL NOT NULL DEFAULT 0,
+                sumsq_14        REAL NOT NULL DEFAULT 0,
+                mean_14         REAL,
+                sd_14           REAL,
+                n_28            INTEGER NOT NULL DEFAULT 0,
+                sum_28          REAL NOT NULL DEFAULT 0,
+                sumsq_28        REAL NOT NULL DEFAULT 0,
+                mean_28         REAL,
+                sd_28           REAL,
+                updated_at      DATETIME NOT NULL DEFAULT (datetime('now')),
+                PRIMARY KEY (baseline_date, metric)
+            ) WITHOUT ROWID;
+            INSERT INTO metric_baselines (baseline_date, metric, n_7, mean_7)
+            VALUES ('2026-02-20', 'weight_lbs', 1, 200.0);
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    monkeypatch.setattr(db_module, "DATABASE_PATH", str(db_path))
+    db_module.init_db()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = [
+            row[1] for row in conn.execute("PRAGMA table_info(metric_baselines)")
+        ]
+        assert not [column for column in columns if column.startswith("sum")]
+        assert conn.execute("SELECT mean_7 FROM metric_baselines").fetchone() == (
+            200.0,
+        )
+    finally:
+        conn.close()
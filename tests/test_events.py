@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+from app.routers import events as events_router
+from app.services.events import EventBroker, broker
+
+
+class _ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def test_broker_delivers_published_events_to_each_subscriber():
+    async def scenario():
+        local = EventBroker()
+        first = local.subscribe()
+        second = local.subscribe()
+        local.publish(
+            "data_changed",
+            source="test",
+            tables=["food_entries", "food_entries"],
+            dates=["2026-02-27", "2026-02-26"],
+        )
+        received = [
+            await asyncio.wait_for(first.get(), timeout=1),
+            await asyncio.wait_for(second.get(), timeout=1),
+        ]
+        first.close()
+        assert local.subscriber_count == 1
+        return received
+
+    first_event, second_event = asyncio.run(scenario())
+    assert first_event == second_event
+    assert first_event["tables"] == ["food_entries"]
+    assert first_event["dates"] == ["2026-02-26", "2026-02-27"]
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def scenario():
+        local = EventBroker(max_pending=2)
+        subscription = local.subscribe()
+        for index in range(4):
+            local.publish("data_changed", source=f"write-{index}")
+        await asyncio.sleep(0)
+        events = [await subscription.get(), await subscription.get()]
+        return subscription.dropped, [event["source"] for event in events]
+
+    assert asyncio.run(scenario()) == (2, ["write-2", "write-3"])
+
+
+def test_write_paths_publish_affected_tables_and_dates(client):
+    async def scenario():
+        subscription = broker.subscribe()
+        try:
+            response = await asyncio.to_thread(
+                client.post,
+                "/api/v1/food/",
+                json={
+                    "recorded_date": "2026-02-27",
+                    "meal_type": "lunch",
+                    "name": "Chicken bowl",
+                    "calories": 620,
+                },
+            )
+            assert response.status_code == 201
+            await asyncio.to_thread(
+                client.post,
+                "/api/v1/ingest/oura",
+                json={"sleep": [{"day": "2026-02-26", "score": 81}]},
+            )
+            return [
+                await asyncio.wait_for(subscription.get(), timeout=1),
+                await asyncio.wait_for(subscription.get(), timeout=1),
+            ]
+        finally:
+            subscription.close()
+
+    food_event, oura_event = asyncio.run(scenario())
+    assert food_event["source"] == "food.create"
+    assert food_event["tables"] == ["food_entries"]
+    assert food_event["dates"] == ["2026-02-27"]
+    assert oura_event["source"] == "ingest.oura"
+    assert oura_event["tables"] == ["sleep_records"]
+    assert oura_event["dates"] == ["2026-02-26"]
+
+
+def test_event_stream_formats_server_sent_events():
+    async def scenario():
+        local = EventBroker()
+        subscription = local.subscribe()
+        stream = events_router._stream(_ConnectedRequest(), subscription)
+        chunks = [await stream.__anext__()]
+        local.publish(
+            "data_changed",
+            source="coaching.daily_digest",
+            tables=["coaching_digests"],
+            dates=["2026-02-27"],
+        )
+        chunks.append(await stream.__anext__())
+        local.close()
+        remaining = [chunk async for chunk in stream]
+        return chunks, remaining, local.subscriber_count
+
+    chunks, remaining, subscriber_count = asyncio.run(scenario())
+    assert chunks[0] == "retry: 5000\n\n"
+    lines = chunks[1].strip().split("\n")
+    assert lines[0] == "id: 1"
+    assert lines[1] == "event: data_changed"
+    payload = json.loads(lines[2].removeprefix("data: "))
+    assert payload["source"] == "coaching.daily_digest"
+    assert payload["dates"] == ["2026-02-27"]
+    assert remaining == []
+    assert subscriber_count == 0
+
+
+def test_ingest_still_publishes_when_anomaly_detection_fails(
+    client, db_module_fixture, monkeypatch
+):
+    from app.routers import ingest
+
+    def broken_detectors(conn, *, tables, dates):
+        raise RuntimeError("detector bug")
+
+    monkeypatch.setattr(ingest, "run_detectors", broken_detectors)
+
+    async def scenario():
+        subscription = broker.subscribe()
+        try:
+            response = await asyncio.to_thread(
+                client.post,
+                "/api/v1/ingest/oura",
+                json={"sleep": [{"day": "2026-02-26", "score": 81}]},
+            )
+            return response, await asyncio.wait_for(subscription.get(), timeout=1)
+        finally:
+            subscription.close()
+
+    response, event = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert event["source"] == "ingest.oura"
+    assert event["dates"] == ["2026-02-26"]
+    conn = db_module_fixture.get_db()
+    try:
+        assert (
+            conn.execute(
+                "SELECT sleep_score FROM sleep_records WHERE recorded_date = '2026-02-26'"
+            ).fetchone()[0]
+            == 81
+        )
+    finally:
+        conn.close()
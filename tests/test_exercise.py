@@ -150,3 +150,35 @@ def test_exercise_sets_require_existing_session(client):
     )
     assert response.status_code == 404
     assert response.json() == {"detail": "Exercise session not found"}
+
+
+def test_exercise_sets_bulk_logs_a_whole_session(client):
+    session = client.post(
+        "/api/v1/exercise/sessions",
+        json={"recorded_date": "2026-02-27", "session_type": "strength"},
+    ).json()
+    sets = [
+        {
+            "exercise_name": name,
+            "set_number": number,
+            "weight_lbs": 135 + 10 * number,
+            "reps": 8,
+        }
+        for name in ("Bench press", "Squat", "Row", "Deadlift", "Press")
+        for number in range(1, 5)
+    ]
+    response = client.post(
+        f"/api/v1/exercise/sessions/{session['id']}/sets/bulk", json={"items": sets}
+    )
+    assert response.status_code == 201
+    created = response.json()["created"]
+    assert len(created) == 20
+    assert {row["session_id"] for row in created} == {session["id"]}
+
+    listed = client.get(f"/api/v1/exercise/sessions/{session['id']}/sets").json()
+    assert len(listed) == 20
+
+    missing = client.post(
+        "/api/v1/exercise/sessions/999/sets/bulk", json={"items": sets[:1]}
+    )
+    assert missing.status_code == 404
@@ -1,3 +1,29 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+import httpx
+import pytest
+from PIL import Image
+
+from app.services.nutrition import estimate_description
+from app.services.pagination import encode_cursor
+from app.services.vision_cache import RequestCoalescer
+from app.services.vision_client import CircuitBreaker, VisionClient, vision_client
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.01)
+
+
 def test_food_entry_lifecycle(client):
     response = client.post(
         "/api/v1/food/",
@@ -178,7 +204,7 @@ def test_food_from_photo_creates_estimated_entry_with_photo_url(client):
     assert payload["photo_url"] == "https://example.com/photo.jpg"
     assert payload["source"] == "agent"
     assert payload["protein_g"] >= 30
-    assert payload["analysis_method"] in {"heuristic", "vision"}
+    assert payload["analysis_method"] in {"local", "vision"}
     assert 0 <= payload["analysis_confidence"] <= 1
     assert "Estimated from photo input" in payload["notes"]
 
@@ -215,6 +241,679 @@ def test_photo_estimate_endpoint_returns_estimate_and_confidence(client):
     )
     assert response.status_code == 200
     payload = response.json()
-    assert payload["analysis_method"] == "heuristic"
+    assert payload["analysis_method"] == "local"
     assert 0 <= payload["analysis_confidence"] <= 1
     assert payload["estimate"]["name"] == "Salad with grilled chicken"
+    assert [item["name"] for item in payload["analysis_items"]] == ["Salad", "Chicken"]
+
+
+def test_photo_estimate_and_from_photo_share_one_cached_vision_call(
+    client, vision_server
+):
+    estimate_response = client.post(
+        "/api/v1/food/photo-estimate",
+        json={
+            "description": "Chicken bowl",
+            "photo_url": "https://example.com/bowl.jpg",
+            "servings": 1.0,
+        },
+    )
+    assert estimate_response.status_code == 200
+    estimate_payload = estimate_response.json()
+    assert estimate_payload["analysis_method"] == "vision"
+    assert estimate_payload["analysis_confidence"] == 0.82
+    assert estimate_payload["estimate"]["calories"] == 610
+
+    create_response = client.post(
+        "/api/v1/food/from-photo",
+        json={
+            "recorded_date": "2026-02-27",
+            "description": "Chicken bowl",
+            "photo_url": "https://example.com/bowl.jpg",
+            "servings": 1.0,
+            "calories": 550,
+        },
+    )
+    assert create_response.status_code == 201
+    created = create_response.json()
+    assert created["analysis_method"] == "vision_cached"
+    assert created["calories"] == 550
+    assert created["protein_g"] == 48
+    assert vision_server.call_count == 1
+
+    other_servings = client.post(
+        "/api/v1/food/photo-estimate",
+        json={
+            "description": "Chicken bowl",
+            "photo_url": "https://example.com/bowl.jpg",
+            "servings": 2.0,
+        },
+    )
+    assert other_servings.json()["analysis_method"] == "vision"
+    assert vision_server.call_count == 2
+
+
+def test_concurrent_identical_photo_estimates_are_coalesced(client, vision_server):
+    vision_server.delay_seconds = 0.3
+    payload = {
+        "description": "Salmon poke bibimbap",
+        "photo_url": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQ==",
+        "servings": 1.0,
+    }
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        responses = list(
+            pool.map(
+                lambda _: client.post("/api/v1/food/photo-estimate", json=payload),
+                range(3),
+            )
+        )
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    methods = sorted(response.json()["analysis_method"] for response in responses)
+    assert methods.count("vision") == 1
+    assert vision_server.call_count == 1
+
+
+def test_vision_cache_evicts_least_recently_used_entries(
+    client, vision_server, monkeypatch, db_module_fixture
+):
+    monkeypatch.setenv("FOOD_VISION_CACHE_MAX_ENTRIES", "2")
+    for index in range(3):
+        response = client.post(
+            "/api/v1/food/photo-estimate",
+            json={
+                "description": f"Meal {index}",
+                "photo_url": "https://example.com/meal.jpg",
+            },
+        )
+        assert response.status_code == 200
+
+    conn = db_module_fixture.get_db()
+    try:
+        assert (
+            conn.execute("SELECT COUNT(*) FROM vision_estimate_cache").fetchone()[0]
+            == 2
+        )
+    finally:
+        conn.close()
+
+
+def test_vision_cache_entries_expire_after_ttl(client, vision_server, monkeypatch):
+    monkeypatch.setenv("FOOD_VISION_CACHE_TTL_SECONDS", "0")
+    payload = {
+        "description": "Shakshuka",
+        "photo_url": "https://example.com/shakshuka.jpg",
+    }
+    first = client.post("/api/v1/food/photo-estimate", json=payload)
+    second = client.post("/api/v1/food/photo-estimate", json=payload)
+
+    assert first.json()["analysis_method"] == "vision"
+    assert second.json()["analysis_method"] == "vision"
+    assert vision_server.call_count == 2
+
+
+def test_photo_burst_is_bounded_upstream_and_leaves_threadpool_free(
+    client, vision_server, monkeypatch
+):
+    monkeypatch.setenv("FOOD_VISION_MAX_CONCURRENCY", "2")
+    client.portal.call(vision_client.start)
+    vision_server.gate.clear()
+
+    def borrowed_threads() -> float:
+        return anyio.to_thread.current_default_thread_limiter().borrowed_tokens
+
+    samples: list[float] = []
+    with ThreadPoolExecutor(max_workers=9) as pool:
+        futures = [
+            pool.submit(
+                client.post,
+                "/api/v1/food/photo-estimate",
+                json={
+                    "description": f"Burst meal {index}",
+                    "photo_url": "https://example.com/burst.jpg",
+                },
+            )
+            for index in range(8)
+        ]
+        _wait_until(lambda: vision_server.in_flight == 2)
+        # The upstream is holding every slot, yet other requests still run.
+        dashboard = pool.submit(client.get, "/api/v1/dashboard/today").result(timeout=5)
+        samples.append(client.portal.call(borrowed_threads))
+        assert not any(future.done() for future in futures)
+        vision_server.gate.set()
+        while not all(future.done() for future in futures):
+            samples.append(client.portal.call(borrowed_threads))
+            time.sleep(0.02)
+        responses = [future.result() for future in futures]
+
+    assert [response.json()["analysis_method"] for response in responses] == [
+        "vision"
+    ] * 8
+    assert dashboard.status_code == 200
+    assert vision_server.max_in_flight == 2
+    assert max(samples) <= 2
+
+
+def test_vision_retries_transient_upstream_errors(client, vision_server, monkeypatch):
+    monkeypatch.setenv("FOOD_VISION_RETRY_BASE_SECONDS", "0")
+    vision_server.fail_next = 2
+
+    response = client.post(
+        "/api/v1/food/photo-estimate",
+        json={
+            "description": "Moussaka",
+            "photo_url": "https://example.com/moussaka.jpg",
+        },
+    )
+
+    assert response.json()["analysis_method"] == "vision"
+    assert vision_server.call_count == 3
+
+
+def test_vision_circuit_breaker_falls_back_to_heuristic_while_open(
+    client, vision_server, monkeypatch
+):
+    monkeypatch.setenv("FOOD_VISION_MAX_RETRIES", "0")
+    monkeypatch.setenv("FOOD_VISION_BREAKER_THRESHOLD", "2")
+    client.portal.call(vision_client.start)
+    vision_server.status_code = 503
+
+    methods = []
+    for index in range(4):
+        response = client.post(
+            "/api/v1/food/photo-estimate",
+            json={
+                "description": f"Mystery dish {index}",
+                "photo_url": "https://example.com/mystery.jpg",
+            },
+        )
+        methods.append(response.json()["analysis_method"])
+
+    assert methods == ["heuristic"] * 4
+    assert vision_server.call_count == 2
+    assert vision_client.breaker.state == "open"
+
+
+def test_cancelled_half_open_probe_hands_back_the_breaker(vision_server, monkeypatch):
+    monkeypatch.setenv("FOOD_VISION_MAX_RETRIES", "0")
+    url = f"{os.environ['OPENAI_BASE_URL']}/chat/completions"
+    vision_server.gate.clear()
+
+    async def scenario():
+        client = VisionClient()
+        now = [0.0]
+        client.breaker = CircuitBreaker(
+            failure_threshold=1, cooldown_seconds=30.0, clock=lambda: now[0]
+        )
+        client.breaker.record_failure()
+        now[0] = 30.0
+        try:
+            probe = asyncio.create_task(client.post_json(url, headers={}, body={}))
+            while vision_server.in_flight == 0:
+                await asyncio.sleep(0.01)
+            assert client.breaker.allow() is False
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+            assert client.breaker.state == "half_open"
+
+            # An unexpected error on the probe counts as a failure.
+            with pytest.raises(httpx.InvalidURL):
+                await client.post_json("http://a:b:c/", headers={}, body={})
+            assert client.breaker.state == "open"
+            now[0] = 60.0
+            assert client.breaker.allow() is True
+        finally:
+            vision_server.gate.set()
+            await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_coalescer_followers_outlive_a_cancelled_leader():
+    async def scenario():
+        coalescer = RequestCoalescer()
+        calls = []
+        release = asyncio.Event()
+
+        async def estimate():
+            calls.append(len(calls))
+            await release.wait()
+            return "estimate"
+
+        leader = asyncio.create_task(coalescer.run("photo", estimate))
+        while not calls:
+            await asyncio.sleep(0)
+        followers = [
+            asyncio.create_task(coalescer.run("photo", estimate)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        followers[2].cancel()
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(asyncio.CancelledError):
+            await followers[2]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*followers[:2]), calls
+
+    results, calls = asyncio.run(scenario())
+    assert sorted(results) == [("estimate", False), ("estimate", True)]
+    assert calls == [0, 1]
+
+
+def _jpeg_bytes(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (180, 90, 40)).save(
+        buffer, format="JPEG", quality=95
+    )
+    return buffer.getvalue()
+
+
+def test_photo_upload_stores_original_and_serves_bounded_variants(client):
+    raw = _jpeg_bytes(3000, 2000)
+    response = client.post(
+        "/api/v1/food/photos",
+        files={"photo": ("meal.jpg", raw, "image/jpeg")},
+    )
+    assert response.status_code == 201
+    payload = response.json()
+    assert len(payload["id"]) == 64
+    assert payload["photo_url"] == f"/api/v1/food/photos/{payload['id']}"
+    assert (payload["width"], payload["height"]) == (3000, 2000)
+    assert payload["original_bytes"] == len(raw)
+    assert payload["model_bytes"] < payload["original_bytes"]
+
+    again = client.post(
+        "/api/v1/food/photos",
+        files={"photo": ("copy.jpg", raw, "image/jpeg")},
+    )
+    assert again.json()["id"] == payload["id"]
+
+    thumb = client.get(payload["thumbnail_url"])
+    assert thumb.status_code == 200
+    assert thumb.headers["content-type"] == "image/webp"
+    assert "immutable" in thumb.headers["cache-control"]
+    assert max(Image.open(io.BytesIO(thumb.content)).size) == 320
+
+    model = client.get(payload["photo_url"], params={"variant": "model"})
+    assert model.headers["content-type"] == "image/jpeg"
+    assert Image.open(io.BytesIO(model.content)).size == (1024, 683)
+
+    original = client.get(payload["photo_url"])
+    assert original.headers["content-type"] == "image/jpeg"
+    assert original.content == raw
+
+
+def test_photo_upload_rejects_non_images(client):
+    response = client.post(
+        "/api/v1/food/photos",
+        files={"photo": ("notes.txt", b"not an image", "text/plain")},
+    )
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/food/photos/{'0' * 64}").status_code == 404
+
+
+def test_vision_call_sends_model_variant_of_uploaded_photo(client, vision_server):
+    raw = _jpeg_bytes(2400, 2400)
+    uploaded = client.post(
+        "/api/v1/food/photos",
+        files={"photo": ("meal.jpg", raw, "image/jpeg")},
+    ).json()
+
+    response = client.post(
+        "/api/v1/food/from-photo",
+        json={
+            "recorded_date": "2026-02-27",
+            "description": "Chicken bowl",
+            "photo_url": uploaded["photo_url"],
+        },
+    )
+    assert response.status_code == 201
+    assert response.json()["photo_url"] == uploaded["photo_url"]
+
+    content = vision_server.requests[0]["messages"][0]["content"]
+    sent = content[1]["image_url"]["url"]
+    assert sent.startswith("data:image/jpeg;base64,")
+    sent_bytes = base64.b64decode(sent.split(",", 1)[1])
+    assert len(sent_bytes) == uploaded["model_bytes"]
+    assert Image.open(io.BytesIO(sent_bytes)).size == (1024, 1024)
+
+
+def test_photo_estimate_batch_streams_items_as_they_finish(client, vision_server):
+    client.post(
+        "/api/v1/food/photo-estimate",
+        json={
+            "description": "Shakshuka",
+            "photo_url": "https://example.com/shakshuka.jpg",
+        },
+    )
+    vision_server.gate.clear()
+    items = [
+        {"description": "Paella", "photo_url": "https://example.com/paella.jpg"},
+        {"description": "Bibimbap", "photo_url": "https://example.com/bibimbap.jpg"},
+        {"description": "Shakshuka", "photo_url": "https://example.com/shakshuka.jpg"},
+        {"description": "Moussaka", "photo_url": "https://example.com/moussaka.jpg"},
+        {
+            "description": "Side salad",
+            "photo_url": "https://example.com/salad.jpg",
+            "use_vision": False,
+        },
+    ]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(
+            client.post, "/api/v1/food/photo-estimate/batch", json=items
+        )
+        # All three uncached items reach the model before any of them returns.
+        _wait_until(lambda: vision_server.in_flight == 3)
+        vision_server.gate.set()
+        response = pending.result(timeout=5)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3, 4]
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[2]["analysis_method"] == "vision_cached"
+    assert by_index[4]["analysis_method"] == "local"
+    assert [by_index[i]["analysis_method"] for i in (0, 1, 3)] == ["vision"] * 3
+    # Instant results stream ahead of the items waiting on the model.
+    assert {lines[0]["index"], lines[1]["index"]} == {2, 4}
+    assert vision_server.call_count == 4
+    assert vision_server.max_in_flight == 3
+
+
+def test_photo_estimate_batch_reports_cancelled_items_individually(client, monkeypatch):
+    from app.routers import food
+
+    async def estimate(index, item):
+        if index == 1:
+            raise asyncio.CancelledError
+        return {"index": index, "estimate": {"calories": 100}}
+
+    monkeypatch.setattr(food, "_estimate_batch_item", estimate)
+    items = [
+        {"description": f"Meal {index}", "photo_url": "https://example.com/meal.jpg"}
+        for index in range(3)
+    ]
+
+    response = client.post("/api/v1/food/photo-estimate/batch", json=items)
+    assert response.status_code == 200
+    lines = sorted(
+        (json.loads(line) for line in response.text.splitlines()),
+        key=lambda line: line["index"],
+    )
+    assert lines == [
+        {"index": 0, "estimate": {"calories": 100}},
+        {"index": 1, "error": "Estimate failed"},
+        {"index": 2, "estimate": {"calories": 100}},
+    ]
+
+
+def test_photo_estimate_batch_validates_item_count(client):
+    assert client.post("/api/v1/food/photo-estimate/batch", json=[]).status_code == 422
+    too_many = [
+        {"description": "Snack", "photo_url": f"https://example.com/{index}.jpg"}
+        for index in range(26)
+    ]
+    response = client.post("/api/v1/food/photo-estimate/batch", json=too_many)
+    assert response.status_code == 422
+
+
+def test_local_nutrition_match_parses_items_and_quantities():
+    local = estimate_description("2 eggs, 8 oz steak and half a pizza")
+    assert [(item.food.name, round(item.quantity, 2)) for item in local.items] == [
+        ("Egg", 2.0),
+        ("Steak", 1.33),
+        ("Pizza", 0.5),
+    ]
+    assert local.confidence >= 0.75
+
+    drinks = estimate_description("two glasses of red wine").totals(servings=1)
+    assert drinks["calories"] == 250
+    assert drinks["alcohol_calories"] == 196
+    assert drinks["alcohol_type"] == "wine"
+
+    assert estimate_description("Grandma's casserole").items == []
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        estimate_description("1 1/2 cups of rice with grilled salmon and a side salad")
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+def test_confident_local_match_skips_vision(client, vision_server):
+    response = client.post(
+        "/api/v1/food/from-photo",
+        json={
+            "recorded_date": "2026-02-27",
+            "description": "2 eggs and toast with a latte",
+            "photo_url": "https://example.com/breakfast.jpg",
+        },
+    )
+    assert response.status_code == 201
+    payload = response.json()
+    assert payload["analysis_method"] == "local"
+    assert payload["calories"] == 414
+    assert [item["quantity"] for item in payload["analysis_items"]] == [2, 1, 1]
+    assert vision_server.call_count == 0
+
+    unclear = client.post(
+        "/api/v1/food/photo-estimate",
+        json={
+            "description": "Chicken with the chef's special sauce",
+            "photo_url": "https://example.com/special.jpg",
+        },
+    )
+    assert unclear.json()["analysis_method"] == "vision"
+    assert vision_server.call_count == 1
+
+
+def _log_food(client, recorded_date, name, calories, protein_g, servings=1.0):
+    response = client.post(
+        "/api/v1/food/",
+        json={
+            "recorded_date": recorded_date,
+            "meal_type": "lunch",
+            "name": name,
+            "calories": calories,
+            "protein_g": protein_g,
+            "servings": servings,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_food_catalog_tracks_recent_entries_by_normalized_name(client):
+    _log_food(client, "2026-02-24", "Chicken burrito bowl", 700, 45)
+    _log_food(client, "2026-02-26", "chicken burrito bowl ", 1300, 90, servings=2)
+    _log_food(client, "2026-02-25", "Greek yogurt parfait", 320, 24)
+    stale = _log_food(client, "2026-02-20", "Chili dog", 500, 18)
+
+    catalog = client.get("/api/v1/food/catalog").json()
+    assert [item["name"] for item in catalog] == [
+        "chicken burrito bowl",
+        "Greek yogurt parfait",
+        "Chili dog",
+    ]
+    bowl = catalog[0]
+    assert bowl["use_count"] == 2
+    assert bowl["last_used_date"] == "2026-02-26"
+    assert bowl["servings"] == 2
+    assert bowl["calories"] == 650
+
+    assert client.delete(f"/api/v1/food/{stale['id']}").status_code == 204
+    names = [item["name"] for item in client.get("/api/v1/food/catalog").json()]
+    assert "Chili dog" not in names
+
+
+def test_food_catalog_autocomplete_matches_prefix_and_words(client):
+    _log_food(client, "2026-02-24", "Chicken burrito bowl", 700, 45)
+    _log_food(client, "2026-02-25", "Chicken noodle soup", 300, 20)
+    _log_food(client, "2026-02-25", "Salmon poke bowl", 650, 38)
+
+    prefix = client.get("/api/v1/food/catalog", params={"q": "chicken b"}).json()
+    assert [item["name"] for item in prefix] == ["Chicken burrito bowl"]
+
+    word = client.get("/api/v1/food/catalog", params={"q": "bow"}).json()
+    assert {item["name"] for item in word} == {
+        "Chicken burrito bowl",
+        "Salmon poke bowl",
+    }
+
+    salmon = word[[item["name"] for item in word].index("Salmon poke bowl")]
+    favorite = client.patch(
+        f"/api/v1/food/catalog/{salmon['id']}", json={"is_favorite": True}
+    )
+    assert favorite.json()["is_favorite"] == 1
+    favorites = client.get("/api/v1/food/catalog", params={"favorites": True}).json()
+    assert [item["name"] for item in favorites] == ["Salmon poke bowl"]
+
+
+def test_food_catalog_prefix_uses_the_stored_name_key(client):
+    _log_food(client, "2026-02-24", "Chicken  Bowl", 600, 40)
+    for recorded_date in ("2026-02-25", "2026-02-26"):
+        _log_food(client, recorded_date, "Bowl of chicken soup", 300, 20)
+
+    # The two-space name is a whole-name prefix hit, so it outranks the more
+    # frequent word-level match.
+    hits = client.get("/api/v1/food/catalog", params={"q": "chicken  b"}).json()
+    assert [item["name"] for item in hits] == [
+        "Chicken  Bowl",
+        "Bowl of chicken soup",
+    ]
+
+
+def test_food_from_catalog_inserts_scaled_entry(client):
+    _log_food(client, "2026-02-24", "Protein oats", 900, 60, servings=2)
+    item = client.get("/api/v1/food/catalog", params={"q": "prot"}).json()[0]
+
+    response = client.post(
+        f"/api/v1/food/from-catalog/{item['id']}",
+        json={"recorded_date": "2026-02-27", "servings": 1.5, "meal_type": "breakfast"},
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert created["name"] == "Protein oats"
+    assert created["meal_type"] == "breakfast"
+    assert created["calories"] == 675
+    assert created["protein_g"] == 45
+    assert created["servings"] == 1.5
+    assert created["is_estimated"] == 0
+
+    refreshed = client.get("/api/v1/food/catalog").json()[0]
+    assert refreshed["use_count"] == 2
+    assert refreshed["last_used_date"] == "2026-02-27"
+
+    missing = client.post(
+        "/api/v1/food/from-catalog/999", json={"recorded_date": "2026-02-27"}
+    )
+    assert missing.status_code == 404
+
+
+def test_food_bulk_atomic_mode_writes_all_or_nothing(client):
+    items = [
+        {
+            "recorded_date": f"2026-02-2{day}",
+            "meal_type": "lunch",
+            "name": f"Meal {day}",
+            "calories": 500 + day,
+        }
+        for day in range(1, 6)
+    ]
+    response = client.post("/api/v1/food/bulk", json={"items": items})
+    assert response.status_code == 201
+    payload = response.json()
+    assert payload["created_count"] == 5
+    assert [row["calories"] for row in payload["created"]] == [501, 502, 503, 504, 505]
+    assert all(row["id"] for row in payload["created"])
+
+    rejected = client.post(
+        "/api/v1/food/bulk",
+        json={
+            "items": [
+                items[0],
+                {**items[1], "meal_type": "brunch"},
+                {"recorded_date": "2026-02-27", "meal_type": "lunch"},
+            ]
+        },
+    )
+    assert rejected.status_code == 422
+    assert [error["index"] for error in rejected.json()["detail"]] == [2]
+
+    constraint = client.post(
+        "/api/v1/food/bulk",
+        json={"items": [items[0], {**items[1], "meal_type": "brunch"}]},
+    )
+    assert constraint.status_code == 422
+    assert [error["index"] for error in constraint.json()["detail"]] == [1]
+    assert len(client.get("/api/v1/food/").json()) == 5
+
+
+def test_food_bulk_best_effort_mode_keeps_valid_items(client):
+    response = client.post(
+        "/api/v1/food/bulk",
+        json={
+            "mode": "best_effort",
+            "items": [
+                {"recorded_date": "2026-02-27", "meal_type": "lunch", "name": "Soup"},
+                {"recorded_date": "2026-02-27", "meal_type": "brunch", "name": "Eggs"},
+                {"recorded_date": "2026-02-27", "meal_type": "dinner"},
+                {"recorded_date": "2026-02-27", "meal_type": "snack", "name": "Apple"},
+            ],
+        },
+    )
+    assert response.status_code == 201
+    payload = response.json()
+    assert [row["name"] for row in payload["created"]] == ["Soup", "Apple"]
+    assert [error["index"] for error in payload["errors"]] == [1, 2]
+    names = {row["name"] for row in client.get("/api/v1/food/").json()}
+    assert names == {"Soup", "Apple"}
+
+
+def test_food_list_pages_by_keyset_cursor_within_date_range(client):
+    for day in range(1, 6):
+        for meal in ("breakfast", "dinner"):
+            client.post(
+                "/api/v1/food/",
+                json={
+                    "recorded_date": f"2026-03-0{day}",
+                    "meal_type": meal,
+                    "name": f"{meal} {day}",
+                    "calories": 400,
+                },
+            )
+
+    params = {"from": "2026-03-02", "to": "2026-03-04", "limit": 4}
+    first = client.get("/api/v1/food/", params=params)
+    assert first.status_code == 200
+    assert [row["recorded_date"] for row in first.json()] == [
+        "2026-03-04",
+        "2026-03-04",
+        "2026-03-03",
+        "2026-03-03",
+    ]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/api/v1/food/", params={**params, "cursor": cursor})
+    assert second.status_code == 200
+    assert [row["name"] for row in second.json()] == ["dinner 2", "breakfast 2"]
+    assert "X-Next-Cursor" not in second.headers
+
+    seen = [row["id"] for row in first.json() + second.json()]
+    assert len(set(seen)) == 6
+
+    invalid = client.get("/api/v1/food/", params={"cursor": "not-a-cursor"})
+    assert invalid.status_code == 400
+
+    # Well-formed JSON whose sort value can't be bound as a parameter.
+    for value in ([1, 2], {"a": 1}, True, None):
+        cursor = encode_cursor(value, 5)
+        for path in ("/api/v1/food/", "/api/v1/labs/", "/api/v1/coaching/digests"):
+            response = client.get(path, params={"cursor": cursor})
+            assert response.status_code == 400, (path, value)
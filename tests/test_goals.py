@@ -1,3 +1,6 @@
+from datetime import date, timedelta
+
+
 def test_goal_create_list_patch_and_generate_plan(client):
     create = client.post(
         "/api/v1/goals/",
@@ -62,3 +65,135 @@ def test_goal_validation_requires_target_value_or_direction(client):
         },
     )
     assert missing_direction.status_code == 422
+
+
+def test_goal_progress_evaluates_food_and_body_metric_goals(client):
+    today = date.today()
+
+    def day(offset):
+        return (today - timedelta(days=offset)).isoformat()
+
+    metrics = [
+        {"recorded_date": day(9 - i), "metric": "weight_lbs", "value": 200 - 0.5 * i}
+        for i in range(10)
+    ]
+    metrics.append({"recorded_date": day(2), "metric": "vo2max", "value": 40})
+    assert (
+        client.post("/api/v1/metrics/bulk", json={"items": metrics}).status_code == 201
+    )
+    food = [
+        {
+            "recorded_date": day(5 - i),
+            "meal_type": "dinner",
+            "name": "Dinner",
+            "calories": 700,
+            "sodium_mg": 2000,
+            "alcohol_calories": alcohol,
+        }
+        for i, alcohol in enumerate([300, 200, 100, None, None, None])
+    ]
+    assert client.post("/api/v1/food/bulk", json={"items": food}).status_code == 201
+
+    goals = [
+        {
+            "name": "Reach 190",
+            "metric": "weight_lbs",
+            "goal_type": "target",
+            "target_value": 190,
+            "start_date": day(9),
+            "target_date": (today + timedelta(days=60)).isoformat(),
+        },
+        {
+            "name": "Less alcohol",
+            "metric": "alcohol_calories",
+            "goal_type": "directional",
+            "direction": "down",
+            "start_date": day(5),
+        },
+        {
+            "name": "Sodium under 1500",
+            "metric": "sodium_mg",
+            "goal_type": "target",
+            "target_value": 1500,
+            "start_date": day(5),
+        },
+        {
+            "name": "Raise VO2max",
+            "metric": "vo2max",
+            "goal_type": "directional",
+            "direction": "up",
+            "start_date": day(5),
+        },
+    ]
+    ids = [client.post("/api/v1/goals/", json=goal).json()["id"] for goal in goals]
+
+    response = client.get("/api/v1/goals/progress")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["as_of"] == today.isoformat()
+    progress = {item["name"]: item for item in payload["goals"]}
+
+    weight = progress["Reach 190"]
+    assert weight["baseline"] == 200
+    assert weight["current"] == 197.0  # 7-day mean
+    assert weight["percent"] == 30.0
+    assert weight["slope_per_day"] == -0.5
+    assert weight["eta"] == (today + timedelta(days=14)).isoformat()
+    assert weight["on_track"] is True
+
+    # Food days without drinks count as zero rather than missing.
+    alcohol = progress["Less alcohol"]
+    assert alcohol["current"] == 100.0
+    assert alcohol["slope_per_day"] < 0
+    assert alcohol["on_track"] is True
+
+    sodium = progress["Sodium under 1500"]
+    assert sodium["baseline"] == 2000
+    assert sodium["percent"] == 0.0
+    assert sodium["eta"] is None
+    assert sodium["on_track"] is False
+
+    vo2max = progress["Raise VO2max"]
+    assert vo2max["current"] == 40
+    assert vo2max["last_recorded"] == day(2)
+    assert vo2max["slope_per_day"] is None
+    assert vo2max["on_track"] is None
+
+    # Cached until goals or their data change.
+    assert client.get("/api/v1/goals/progress").json() == payload
+    client.patch(f"/api/v1/goals/{ids[3]}", json={"active": 0})
+    names = [
+        item["name"] for item in client.get("/api/v1/goals/progress").json()["goals"]
+    ]
+    assert "Raise VO2max" not in names
+
+    plan = client.post(f"/api/v1/goals/{ids[2]}/plans/generate")
+    assert "Current baseline for `sodium_mg` is `2000.0`" in plan.json()["plan"]
+
+
+def test_goal_progress_and_plan_use_old_readings_of_sparse_metrics(client):
+    today = date.today()
+    weighed = (today - timedelta(days=45)).isoformat()
+    client.post(
+        "/api/v1/metrics/bulk",
+        json={
+            "items": [{"recorded_date": weighed, "metric": "weight_lbs", "value": 210}]
+        },
+    )
+    goal_id = client.post(
+        "/api/v1/goals/",
+        json={
+            "name": "Reach 190",
+            "metric": "weight_lbs",
+            "goal_type": "target",
+            "target_value": 190,
+            "start_date": today.isoformat(),
+        },
+    ).json()["id"]
+
+    (progress,) = client.get("/api/v1/goals/progress").json()["goals"]
+    assert progress["current"] == 210
+    assert progress["last_recorded"] == weighed
+
+    plan = client.post(f"/api/v1/goals/{goal_id}/plans/generate")
+    assert "Current baseline for `weight_lbs` is `210.0`" in plan.json()["plan"]
@@ -526,3 +526,82 @@ def test_oura_ingest_upserts_activity_metrics(client, db_module_fixture):
         ]
     finally:
         conn.close()
+
+
+def _readiness_payload(days_and_hrv):
+    return {
+        "readiness": [
+            {
+                "day": day,
+                "score": 75,
+                "average_hrv": hrv,
+                "resting_heart_rate": 52,
+            }
+            for day, hrv in days_and_hrv
+        ]
+    }
+
+
+def test_oura_ingest_flags_hrv_crash_as_anomaly(client, db_module_fixture):
+    history = [(f"2026-03-{day:02d}", 40 + (day % 3)) for day in range(1, 15)]
+    response = client.post("/api/v1/ingest/oura", json=_readiness_payload(history))
+    assert response.status_code == 200
+
+    anomalies = client.get(
+        "/api/v1/dashboard/anomalies", params={"ending": "2026-03-15"}
+    ).json()
+    assert anomalies == []
+
+    client.post("/api/v1/ingest/oura", json=_readiness_payload([("2026-03-15", 22)]))
+    today = client.get(
+        "/api/v1/dashboard/today", params={"target_date": "2026-03-15"}
+    ).json()
+    (anomaly,) = today["anomalies"]
+    assert anomaly["metric"] == "hrv"
+    assert anomaly["recorded_date"] == "2026-03-15"
+    assert anomaly["direction"] == "low"
+    assert anomaly["z_score"] <= -3
+    assert 40 <= anomaly["expected"] <= 42
+
+    # Re-syncing the same day with a normal value clears the flag without
+    # double-counting the day in the detector state.
+    client.post("/api/v1/ingest/oura", json=_readiness_payload([("2026-03-15", 41)]))
+    agent = client.get(
+        "/api/v1/agent/query",
+        params={"query_type": "anomalies", "target_date": "2026-03-15"},
+    ).json()
+    assert agent["anomalies"] == []
+
+    conn = db_module_fixture.get_db()
+    try:
+        state = conn.execute(
+            "SELECT n, last_date FROM anomaly_detector_state WHERE metric = 'hrv'"
+        ).fetchone()
+        assert tuple(state) == (15, "2026-03-15")
+    finally:
+        conn.close()
+
+
+def test_anomaly_acknowledge_hides_it_from_dashboard(client):
+    history = [(f"2026-03-{day:02d}", 45) for day in range(1, 12)]
+    client.post("/api/v1/ingest/oura", json=_readiness_payload(history))
+    client.post("/api/v1/ingest/oura", json=_readiness_payload([("2026-03-12", 30)]))
+
+    (anomaly,) = client.get(
+        "/api/v1/dashboard/anomalies", params={"ending": "2026-03-12"}
+    ).json()
+    acknowledged = client.post(
+        f"/api/v1/dashboard/anomalies/{anomaly['id']}/acknowledge"
+    )
+    assert acknowledged.status_code == 200
+    assert acknowledged.json()["acknowledged_at"] is not None
+
+    assert (
+        client.get(
+            "/api/v1/dashboard/anomalies", params={"ending": "2026-03-12"}
+        ).json()
+        == []
+    )
+    assert (
+        client.post("/api/v1/dashboard/anomalies/9999/acknowledge").status_code == 404
+    )
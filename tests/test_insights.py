@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+
+
+def _seed_alcohol_and_sleep(client, days=40):
+    start = date(2026, 1, 1)
+    food, drinking_days = [], set()
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        drinks = offset % 3 == 0
+        if drinks:
+            drinking_days.add(day)
+        food.append(
+            {
+                "recorded_date": str(day),
+                "meal_type": "dinner",
+                "name": "Dinner",
+                "calories": 1800 + (offset * 37) % 400,
+                "alcohol_calories": 300 if drinks else None,
+            }
+        )
+    assert client.post("/api/v1/food/bulk", json={"items": food}).status_code == 201
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        previous_night_drinks = day - timedelta(days=1) in drinking_days
+        response = client.post(
+            "/api/v1/sleep/",
+            json={
+                "recorded_date": str(day),
+                "sleep_score": (62 if previous_night_drinks else 84) + offset % 4,
+                "source": "oura",
+            },
+        )
+        assert response.status_code == 201
+    return start, start + timedelta(days=days - 1)
+
+
+def test_correlations_rank_lagged_cross_domain_effects(client):
+    start, end = _seed_alcohol_and_sleep(client)
+
+    response = client.get(
+        "/api/v1/insights/correlations",
+        params={"from": str(start), "to": str(end), "max_lag": 2},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["days"] == 40
+    assert payload["lags"] == [0, 1, 2]
+
+    top = payload["effects"][0]
+    assert (top["feature"], top["outcome"], top["lag_days"]) == (
+        "alcohol_calories",
+        "sleep_score",
+        1,
+    )
+    assert top["r"] < -0.9
+    assert top["ci_low"] <= top["r"] <= top["ci_high"] < 0
+    assert top["n"] == 39
+
+    features = payload["features"]
+    same_day = payload["matrices"][0]
+    alcohol, sleep = features.index("alcohol_calories"), features.index("sleep_score")
+    assert same_day[alcohol][alcohol] == 1.0
+    assert abs(same_day[alcohol][sleep]) < 0.6
+
+
+def test_correlations_are_cached_until_source_data_changes(client):
+    from app.services import correlations
+
+    correlations._cache.clear()
+    start, end = _seed_alcohol_and_sleep(client, days=20)
+    params = {"from": str(start), "to": str(end)}
+
+    first = client.get("/api/v1/insights/correlations", params=params).json()
+    second = client.get("/api/v1/insights/correlations", params=params).json()
+    assert first == second
+    assert (correlations._cache.hits, correlations._cache.misses) == (1, 1)
+
+    client.post(
+        "/api/v1/food/",
+        json={
+            "recorded_date": str(start),
+            "meal_type": "snack",
+            "name": "Late snack",
+            "calories": 900,
+        },
+    )
+    client.get("/api/v1/insights/correlations", params=params)
+    assert correlations._cache.misses == 2
+
+
+def test_in_effect_lists_target_changes_and_overlapping_regimens(
+    client, db_module_fixture
+):
+    conn = db_module_fixture.get_db()
+    conn.executemany(
+        "INSERT INTO targets (metric, value, effective_date) VALUES (?, ?, ?)",
+        [
+            ("calories", 1900, "2026-03-10"),
+            ("calories", 1850, "2026-03-10"),
+            ("sodium_mg", 2000, "2026-03-20"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    client.post(
+        "/api/v1/supplements/",
+        json={
+            "name": "Creatine",
+            "started_date": "2026-03-05",
+            "stopped_date": "2026-03-12",
+            "active": 0,
+        },
+    )
+    client.post(
+        "/api/v1/supplements/",
+        json={"name": "Fish oil", "started_date": "2026-03-15"},
+    )
+
+    response = client.get(
+        "/api/v1/insights/in-effect", params={"from": "2026-03-01", "to": "2026-03-14"}
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert [change["effective_from"] for change in payload["targets"]] == [
+        "2026-03-01",
+        "2026-03-10",
+    ]
+    assert payload["targets"][0]["targets"]["calories"] == 2000.0
+    # Same-day targets resolve to the latest row.
+    assert payload["targets"][1]["targets"]["calories"] == 1850.0
+    assert [row["name"] for row in payload["supplements"]] == ["Creatine"]
+    assert payload["supplements"][0]["effective_to"] == "2026-03-12"
+
+    on_day = client.get("/api/v1/insights/in-effect", params={"on": "2026-03-20"})
+    assert on_day.json()["targets"][0]["targets"]["sodium_mg"] == 2000.0
+    assert [row["name"] for row in on_day.json()["supplements"]] == ["Fish oil"]
+
+
+def test_targets_on_returns_values_as_stored(client, db_module_fixture):
+    from app.services.asof import targets_on
+
+    conn = db_module_fixture.get_db()
+    try:
+        conn.execute(
+            "INSERT INTO targets (metric, value, effective_date) VALUES (?, ?, ?)",
+            ("protein_g", 172.5, "2026-03-01"),
+        )
+        conn.commit()
+        stored = {
+            row["metric"]: row["value"]
+            for row in conn.execute(
+                """SELECT t1.metric, t1.value FROM targets t1
+                   WHERE t1.effective_date = (
+                       SELECT MAX(t2.effective_date) FROM targets t2
+                       WHERE t2.metric = t1.metric AND t2.effective_date <= ?
+                   )""",
+                ("2026-03-02",),
+            )
+        }
+        targets = targets_on(conn, "2026-03-02")
+    finally:
+        conn.close()
+
+    assert targets["protein_g"] == 172.5
+    assert {metric: (value, type(value)) for metric, value in targets.items()} == {
+        metric: (value, type(value)) for metric, value in stored.items()
+    }
+    today = client.get("/api/v1/dashboard/today", params={"target_date": "2026-03-02"})
+    assert today.json()["targets"] == stored
@@ -40,3 +40,259 @@ def test_labs_create_and_query_by_marker_and_date(client):
     list_response = client.get("/api/v1/labs/")
     assert list_response.status_code == 200
     assert len(list_response.json()) == 2
+
+
+def test_labs_list_pages_by_drawn_date_with_cursor(client):
+    for month in range(1, 6):
+        client.post(
+            "/api/v1/labs/",
+            json={
+                "drawn_date": f"2026-0{month}-01",
+                "panel": "CMP",
+                "marker": "Glucose",
+                "value": 90 + month,
+                "unit": "mg/dL",
+            },
+        )
+
+    first = client.get(
+        "/api/v1/labs/", params={"marker": "Glucose", "from": "2026-02-01", "limit": 2}
+    )
+    assert [row["drawn_date"] for row in first.json()] == ["2026-05-01", "2026-04-01"]
+
+    second = client.get(
+        "/api/v1/labs/",
+        params={
+            "marker": "Glucose",
+            "from": "2026-02-01",
+            "limit": 2,
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+    )
+    assert [row["drawn_date"] for row in second.json()] == ["2026-03-01", "2026-02-01"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_lab_trends_group_markers_with_latest_delta_and_range_flags(client):
+    draws = [
+        ("2026-03-01", "Glucose", 104, "2026-03-01 draw"),
+        ("2025-09-01", "Glucose", 96, None),
+        ("2025-09-01", "Triglycerides", 182, None),
+        ("2026-03-01", "Triglycerides", 140, None),
+    ]
+    for drawn_date, marker, value, notes in draws:
+        response = client.post(
+            "/api/v1/labs/",
+            json={
+                "drawn_date": drawn_date,
+                "panel": "CMP" if marker == "Glucose" else "Lipid Panel",
+                "marker": marker,
+                "value": value,
+                "unit": "mg/dL",
+                "reference_low": 70 if marker == "Glucose" else None,
+                "reference_high": 99 if marker == "Glucose" else 149,
+                "notes": notes,
+            },
+        )
+        assert response.status_code == 201
+
+    # The March glucose draw was written first; the older draw backfills its delta.
+    trends = client.get("/api/v1/labs/trends").json()["markers"]
+    assert [trend["marker"] for trend in trends] == ["Glucose", "Triglycerides"]
+    glucose, triglycerides = trends
+    assert glucose["dates"] == ["2025-09-01", "2026-03-01"]
+    assert glucose["values"] == [96.0, 104.0]
+    assert glucose["flags"] == [None, "H"]
+    assert glucose["latest"] == {
+        "drawn_date": "2026-03-01",
+        "value": 104.0,
+        "previous_value": 96.0,
+        "delta": 8.0,
+        "flag": "H",
+    }
+    assert glucose["out_of_range"] is True
+    assert triglycerides["flags"] == ["H", None]
+    assert triglycerides["latest"]["delta"] == -42.0
+    assert triglycerides["out_of_range"] is False
+
+    only_recent = client.get(
+        "/api/v1/labs/trends", params={"markers": "Glucose", "from": "2026-01-01"}
+    ).json()["markers"]
+    assert len(only_recent) == 1
+    assert only_recent[0]["dates"] == ["2026-03-01"]
+    assert only_recent[0]["latest"]["delta"] == 8.0
+
+
+def test_lab_update_recomputes_marker_history(client):
+    ids = []
+    for drawn_date, value in (("2026-01-01", 5.4), ("2026-04-01", 5.9)):
+        ids.append(
+            client.post(
+                "/api/v1/labs/",
+                json={
+                    "drawn_date": drawn_date,
+                    "panel": "A1C",
+                    "marker": "Hemoglobin A1c",
+                    "value": value,
+                    "unit": "%",
+                    "reference_high": 5.6,
+                },
+            ).json()["id"]
+        )
+
+    updated = client.patch(
+        f"/api/v1/labs/{ids[0]}",
+        json={
+            "drawn_date": "2026-01-01",
+            "panel": "A1C",
+            "marker": "Hemoglobin A1c",
+            "value": 6.1,
+            "unit": "%",
+            "reference_high": 5.6,
+        },
+    )
+    assert updated.json()["range_flag"] == "H"
+
+    (trend,) = client.get("/api/v1/labs/trends").json()["markers"]
+    assert trend["latest"]["previous_value"] == 6.1
+    assert trend["latest"]["delta"] == -0.2
+
+
+def _annual_panel(ldl_unit="mg/dL", ldl_value=131):
+    return {
+        "panels": [
+            {
+                "drawn_date": "2026-02-14",
+                "panel": "Lipid Panel",
+                "notes": "Annual physical",
+                "markers": [
+                    {
+                        "marker": "LDL",
+                        "value": ldl_value,
+                        "unit": ldl_unit,
+                        "reference_high": 99 if ldl_unit == "mg/dL" else 2.56,
+                    },
+                    {
+                        "marker": "HDL",
+                        "value": 39,
+                        "unit": "MG/DL",
+                        "reference_low": 40,
+                    },
+                ],
+            },
+            {
+                "drawn_date": "2026-02-14",
+                "panel": "CMP",
+                "markers": [
+                    {
+                        "marker": "Glucose",
+                        "value": 5.2,
+                        "unit": "mmol/l",
+                        "reference_low": 3.9,
+                        "reference_high": 5.5,
+                        "notes": "Fasting",
+                    },
+                    {"marker": "Sodium", "value": 139, "unit": "meq/L", "flag": "N"},
+                ],
+            },
+        ]
+    }
+
+
+def test_lab_panel_import_normalizes_units_flags_and_upserts(client):
+    first = client.post("/api/v1/labs/panels", json=_annual_panel())
+    assert first.status_code == 201
+    payload = first.json()
+    assert (payload["inserted"], payload["updated"]) == (4, 0)
+    results = {row["marker"]: row for row in payload["results"]}
+
+    assert results["LDL"]["flag"] == "H"
+    assert results["LDL"]["notes"] == "Annual physical"
+    assert (results["HDL"]["unit"], results["HDL"]["flag"]) == ("mg/dL", "L")
+    glucose = results["Glucose"]
+    assert (glucose["unit"], glucose["value"]) == ("mg/dL", 93.68)
+    assert (glucose["reference_low"], glucose["reference_high"]) == (70.26, 99.09)
+    assert glucose["flag"] is None
+    assert glucose["notes"] == "Fasting"
+    assert (results["Sodium"]["unit"], results["Sodium"]["flag"]) == ("mEq/L", "N")
+
+    # Re-running the same import (with a corrected LDL, in SI units) only updates.
+    again = client.post(
+        "/api/v1/labs/panels", json=_annual_panel(ldl_unit="mmol/L", ldl_value=3.1)
+    )
+    assert (again.json()["inserted"], again.json()["updated"]) == (0, 4)
+    rows = client.get("/api/v1/labs/", params={"drawn_date": "2026-02-14"}).json()
+    assert len(rows) == 4
+    ldl = next(row for row in rows if row["marker"] == "LDL")
+    assert (ldl["value"], ldl["unit"], ldl["flag"]) == (119.88, "mg/dL", "H")
+
+    duplicate = client.post(
+        "/api/v1/labs/",
+        json={
+            "drawn_date": "2026-02-14",
+            "panel": "CMP",
+            "marker": "Glucose",
+            "value": 95,
+            "unit": "mg/dL",
+        },
+    )
+    assert duplicate.status_code == 409
+
+    # Single creates normalize the same way, so one history stays in one unit.
+    single = client.post(
+        "/api/v1/labs/",
+        json={
+            "drawn_date": "2026-05-01",
+            "panel": "Lipid Panel",
+            "marker": "LDL",
+            "value": 2.5,
+            "unit": "mmol/l",
+            "reference_high": 2.56,
+        },
+    )
+    assert single.status_code == 201
+    assert (single.json()["value"], single.json()["unit"]) == (96.68, "mg/dL")
+    assert single.json()["reference_high"] == 99.0
+    assert single.json()["flag"] is None
+
+
+def test_lab_panel_csv_import_reports_bad_lines(client):
+    csv_text = (
+        "drawn_date,panel,marker,value,unit,reference_low,reference_high,flag,notes\n"
+        "2026-02-14,Lipid Panel,Triglycerides,2.76,mmol/L,,1.69,,\n"
+        "2026-02-14,CMP,Creatinine,88.4,umol/L,53,106,,\n"
+    )
+    response = client.post(
+        "/api/v1/labs/panels/csv",
+        files={"file": ("labs.csv", csv_text, "text/csv")},
+    )
+    assert response.status_code == 201
+    results = {row["marker"]: row for row in response.json()["results"]}
+    assert results["Triglycerides"]["value"] == 244.45
+    assert results["Triglycerides"]["flag"] == "H"
+    assert (results["Creatinine"]["value"], results["Creatinine"]["unit"]) == (
+        1.0,
+        "mg/dL",
+    )
+
+    bad = client.post(
+        "/api/v1/labs/panels/csv",
+        files={
+            "file": (
+                "labs.csv",
+                "drawn_date,panel,marker,value,unit\n"
+                "2026-03-01,CMP,Glucose,98,mg/dL\n"
+                "2026-03-01,CMP,Sodium,high,mEq/L\n",
+                "text/csv",
+            )
+        },
+    )
+    assert bad.status_code == 422
+    assert [error["line"] for error in bad.json()["detail"]] == [3]
+    assert len(client.get("/api/v1/labs/", params={"marker": "Glucose"}).json()) == 0
+
+    missing = client.post(
+        "/api/v1/labs/panels/csv",
+        files={"file": ("labs.csv", "marker,value\nLDL,100\n", "text/csv")},
+    )
+    assert missing.status_code == 400
@@ -28,3 +28,59 @@ def test_medications_create_list_and_patch(client):
     all_response = client.get("/api/v1/medications/", params={"active_only": 0})
     assert all_response.status_code == 200
     assert len(all_response.json()) == 1
+
+
+def test_medications_filter_by_start_date_and_page_on_request(client):
+    for name, started in (
+        ("Metformin", "2025-06-01"),
+        ("Lisinopril", "2026-01-15"),
+        ("Rosuvastatin", "2026-02-10"),
+    ):
+        client.post(
+            "/api/v1/medications/",
+            json={"name": name, "started_date": started, "active": 1},
+        )
+
+    recent = client.get("/api/v1/medications/", params={"from": "2026-01-01"})
+    assert [row["name"] for row in recent.json()] == ["Lisinopril", "Rosuvastatin"]
+    assert "X-Next-Cursor" not in recent.headers
+
+    first = client.get("/api/v1/medications/", params={"limit": 2})
+    assert [row["name"] for row in first.json()] == ["Rosuvastatin", "Lisinopril"]
+    second = client.get(
+        "/api/v1/medications/", params={"cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert [row["name"] for row in second.json()] == ["Metformin"]
+
+
+def test_medications_as_of_follow_started_and_stopped_dates(client):
+    for name, started, stopped, active in (
+        ("Metformin", "2025-06-01", "2026-01-31", 0),
+        ("Lisinopril", "2026-01-15", None, 1),
+        ("Ibuprofen", "2025-01-01", None, 0),  # inactive, stop unknown
+    ):
+        client.post(
+            "/api/v1/medications/",
+            json={
+                "name": name,
+                "started_date": started,
+                "stopped_date": stopped,
+                "active": active,
+            },
+        )
+
+    def names(day):
+        response = client.get("/api/v1/medications/", params={"as_of": day})
+        return [row["name"] for row in response.json()]
+
+    assert names("2026-01-20") == ["Metformin", "Lisinopril"]
+    assert names("2026-02-01") == ["Lisinopril"]
+    assert names("2025-05-31") == []
+
+    # The in-memory index is invalidated by writes.
+    lisinopril = client.get("/api/v1/medications/").json()[0]
+    client.patch(
+        f"/api/v1/medications/{lisinopril['id']}",
+        json={"stopped_date": "2026-01-31", "active": 0},
+    )
+    assert names("2026-02-01") == []
@@ -1,3 +1,6 @@
+import statistics
+
+
 def test_body_metrics_create_and_query_by_range(client):
     first_response = client.post(
         "/api/v1/metrics",
@@ -57,3 +60,199 @@ def test_body_metrics_create_and_query_by_range(client):
             "created_at": response.json()[1]["created_at"],
         },
     ]
+
+
+def test_body_metrics_bulk_inserts_in_one_request(client):
+    items = [
+        {"recorded_date": f"2026-02-{day:02d}", "metric": "weight_lbs", "value": v}
+        for day, v in ((20, 201.0), (21, 200.6), (22, 200.2))
+    ]
+    response = client.post("/api/v1/metrics/bulk", json={"items": items})
+    assert response.status_code == 201
+    assert response.json()["created_count"] == 3
+
+    best_effort = client.post(
+        "/api/v1/metrics/bulk",
+        json={
+            "mode": "best_effort",
+            "items": [
+                {"recorded_date": "2026-02-23", "metric": "weight_lbs", "value": 199.9},
+                {
+                    "recorded_date": "2026-02-23",
+                    "metric": "waist_in",
+                    "value": 39.0,
+                    "source": "scale",
+                },
+            ],
+        },
+    )
+    assert best_effort.json()["created_count"] == 1
+    assert best_effort.json()["errors"][0]["index"] == 1
+
+    listed = client.get(
+        "/api/v1/metrics",
+        params={"metric": "weight_lbs", "days": 7, "ending": "2026-02-23"},
+    ).json()
+    assert [row["value"] for row in listed] == [201.0, 200.6, 200.2, 199.9]
+
+
+def test_metric_series_buckets_dedupes_sources_and_fills_gaps(client):
+    items = [
+        {"recorded_date": "2026-03-02", "metric": "weight_lbs", "value": 200.0},
+        {
+            "recorded_date": "2026-03-02",
+            "metric": "weight_lbs",
+            "value": 205.0,
+            "source": "apple_health",
+        },
+        {"recorded_date": "2026-03-04", "metric": "weight_lbs", "value": 198.0},
+        {"recorded_date": "2026-03-17", "metric": "weight_lbs", "value": 196.0},
+        {"recorded_date": "2026-03-03", "metric": "waist_in", "value": 39.0},
+    ]
+    assert client.post("/api/v1/metrics/bulk", json={"items": items}).status_code == 201
+
+    response = client.get(
+        "/api/v1/metrics/series",
+        params={
+            "metrics": "weight_lbs,waist_in",
+            "from": "2026-03-02",
+            "to": "2026-03-22",
+            "granularity": "week",
+            "rolling": 2,
+            "ewma_span": 3,
+        },
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["buckets"] == ["2026-03-02", "2026-03-09", "2026-03-16"]
+
+    weight = payload["series"]["weight_lbs"]
+    # The apple_health duplicate on 03-02 loses to the manual reading.
+    assert weight["mean"] == [199.0, None, 196.0]
+    assert weight["min"] == [198.0, None, 196.0]
+    assert weight["last"] == [198.0, None, 196.0]
+    assert weight["count"] == [2, 0, 1]
+    assert weight["rolling_mean"] == [199.0, 199.0, 196.0]
+    assert weight["ewma"][1] == 199.0
+    assert 196.0 < weight["ewma"][2] < 199.0
+
+    assert payload["series"]["waist_in"]["mean"] == [39.0, None, None]
+
+
+def test_metric_series_rejects_bad_parameters(client):
+    assert (
+        client.get(
+            "/api/v1/metrics/series",
+            params={"metrics": "weight_lbs", "source_priority": "scale"},
+        ).status_code
+        == 422
+    )
+    assert (
+        client.get(
+            "/api/v1/metrics/series",
+            params={"metrics": "weight_lbs", "from": "2026-03-02", "to": "2026-03-01"},
+        ).status_code
+        == 422
+    )
+
+
+def test_metric_baselines_follow_edits_incrementally(client, db_module_fixture):
+    weights = [200.0, 201.0, 199.5, 198.0, 202.0, 200.5, 199.0, 197.5]
+    created = client.post(
+        "/api/v1/metrics/bulk",
+        json={
+            "items": [
+                {
+                    "recorded_date": f"2026-04-0{day + 1}",
+                    "metric": "weight_lbs",
+                    "value": value,
+                }
+                for day, value in enumerate(weights)
+            ]
+        },
+    ).json()["created"]
+
+    response = client.get(
+        "/api/v1/metrics/baselines",
+        params={"target_date": "2026-04-08", "metrics": "weight_lbs"},
+    )
+    assert response.status_code == 200
+    baseline = response.json()["baselines"]["weight_lbs"]
+    assert baseline["value"] == 197.5
+    assert baseline["n_7"] == 7
+    assert baseline["mean_7"] == round(statistics.mean(weights[1:]), 4)
+    assert baseline["sd_7"] == round(statistics.stdev(weights[1:]), 4)
+    assert baseline["n_28"] == 8
+    prior = weights[:7]
+    expected_z = (197.5 - statistics.mean(prior)) / statistics.stdev(prior)
+    assert baseline["z_28"] == round(expected_z, 2)
+
+    # A lower-priority duplicate doesn't move the baseline; deleting the
+    # manual reading for 04-08 lets it through.
+    client.post(
+        "/api/v1/metrics",
+        json={
+            "recorded_date": "2026-04-08",
+            "metric": "weight_lbs",
+            "value": 150.0,
+            "source": "apple_health",
+        },
+    )
+    conn = db_module_fixture.get_db()
+    conn.execute("DELETE FROM body_metrics WHERE id = ?", (created[-1]["id"],))
+    conn.execute(
+        "UPDATE body_metrics SET value = 210 WHERE id = ?", (created[0]["id"],)
+    )
+    conn.commit()
+    conn.close()
+
+    updated = client.get(
+        "/api/v1/metrics/baselines",
+        params={"target_date": "2026-04-08", "metrics": "weight_lbs"},
+    ).json()["baselines"]["weight_lbs"]
+    expected = [210.0, *weights[1:7], 150.0]
+    assert updated["value"] == 150.0
+    assert updated["mean_7"] == round(statistics.mean(expected[1:]), 4)
+    assert updated["mean_28"] == round(statistics.mean(expected), 4)
+    assert updated["sd_28"] == round(statistics.stdev(expected), 4)
+
+    # Days past the end of the 28-day window have no baseline.
+    later = client.get(
+        "/api/v1/metrics/baselines", params={"target_date": "2026-05-06"}
+    ).json()
+    assert later["baselines"] == {}
+
+
+def test_metric_baselines_stay_exact_after_repeated_edits(client, db_module_fixture):
+    created = client.post(
+        "/api/v1/metrics/bulk",
+        json={
+            "items": [
+                {
+                    "recorded_date": f"2026-04-0{day}",
+                    "metric": "weight_lbs",
+                    "value": 98765.4321,
+                }
+                for day in range(1, 8)
+            ]
+        },
+    ).json()["created"]
+
+    conn = db_module_fixture.get_db()
+    for value in (0.1, 123456789.123, 3.3, 98765.4321):
+        conn.execute(
+            "UPDATE body_metrics SET value = ? WHERE id = ?",
+            (value, created[3]["id"]),
+        )
+        conn.commit()
+        client.get("/api/v1/metrics/baselines", params={"target_date": "2026-04-07"})
+    conn.close()
+
+    baseline = client.get(
+        "/api/v1/metrics/baselines",
+        params={"target_date": "2026-04-07", "metrics": "weight_lbs"},
+    ).json()["baselines"]["weight_lbs"]
+    # A flat series has no spread, however often it was edited.
+    assert baseline["n_7"] == 7
+    assert baseline["mean_7"] == 98765.4321
+    assert baseline["sd_7"] == 0.0
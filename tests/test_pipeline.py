@@ -0,0 +1,110 @@
+import asyncio
+from datetime import date
+
+from app.services.events import EventBroker
+from app.services.pipeline import DERIVED_ARTIFACTS, DerivedDataPipeline
+
+
+def _pipeline(db_module, **kwargs):
+    return DerivedDataPipeline(DERIVED_ARTIFACTS, connect=db_module.get_db, **kwargs)
+
+
+def test_affected_artifacts_follow_the_dependency_graph(db_module_fixture):
+    pipeline = _pipeline(db_module_fixture)
+    assert [a.name for a in pipeline.affected(["body_metrics"])] == [
+        "baselines",
+        "daily_suggestion",
+    ]
+    assert [a.name for a in pipeline.affected(["exercise_hr_zones"])] == [
+        "daily_features"
+    ]
+    assert pipeline.affected(["coaching_digests", "lab_results"]) == []
+
+
+def test_run_rebuilds_only_stored_artifacts_for_touched_days(client, db_module_fixture):
+    for day in ("2026-03-02", "2026-03-03"):
+        client.post(
+            "/api/v1/sleep/",
+            json={
+                "recorded_date": day,
+                "readiness_score": 80,
+                "hrv": 45.0,
+                "source": "oura",
+            },
+        )
+        client.post(
+            "/api/v1/training/suggestions/generate", params={"target_date": day}
+        )
+    client.post(
+        "/api/v1/coaching/digests/generate-daily",
+        params={"target_date": "2026-03-02"},
+    )
+
+    # A late write that bypasses the API, so nothing has been refreshed yet.
+    conn = db_module_fixture.get_db()
+    conn.execute(
+        "UPDATE sleep_records SET readiness_score = 50 WHERE recorded_date = ?",
+        ("2026-03-02",),
+    )
+    conn.commit()
+    conn.close()
+
+    results = _pipeline(db_module_fixture).run(
+        ["sleep_records"], ["2026-03-02"], today=date(2026, 3, 5)
+    )
+    # 03-02's change reaches 03-03's suggestion through the 7-day HRV mean;
+    # no weekly digest or later suggestion was stored, so none is created.
+    assert results["daily_suggestion"] == 2
+    assert results["daily_digest"] == 1
+    assert results["weekly_digest"] == 0
+
+    conn = db_module_fixture.get_db()
+    suggestion = conn.execute(
+        "SELECT readiness_score, intensity FROM daily_suggestions "
+        "WHERE suggestion_date = '2026-03-02'"
+    ).fetchone()
+    stored = conn.execute("SELECT COUNT(*) FROM daily_suggestions").fetchone()[0]
+    conn.close()
+    assert suggestion["readiness_score"] == 50
+    assert suggestion["intensity"] == "easy"
+    assert stored == 2
+
+
+def test_rapid_changes_are_debounced_into_one_run(db_module_fixture):
+    broker = EventBroker()
+    pipeline = _pipeline(db_module_fixture, debounce_seconds=0.05)
+    runs = []
+    pipeline.run = lambda tables, dates: runs.append((set(tables), set(dates)))
+
+    async def scenario():
+        pipeline.start(broker)
+        for day in ("2026-03-01", "2026-03-02", "2026-03-02", "2026-03-03"):
+            broker.publish(
+                "data_changed", source="food.bulk", tables=["food_entries"], dates=[day]
+            )
+        broker.publish(
+            "data_changed",
+            source="pipeline",
+            tables=["sleep_records"],
+            dates=["2026-01-01"],
+        )
+        broker.publish(
+            "data_changed",
+            source="coaching.daily_digest",
+            tables=["coaching_digests"],
+            dates=["2026-01-02"],
+        )
+        await asyncio.sleep(0.3)
+        broker.publish(
+            "data_changed",
+            source="ingest.oura",
+            tables=["sleep_records"],
+            dates=["2026-03-04"],
+        )
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    assert runs == [
+        ({"food_entries"}, {"2026-03-01", "2026-03-02", "2026-03-03"}),
+        ({"sleep_records"}, {"2026-03-04"}),
+    ]
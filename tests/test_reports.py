@@ -115,3 +115,119 @@ def test_doctor_visit_report_includes_core_sections(client):
     assert payload["active_supplements"][0]["name"] == "Creatine"
     assert "Doctor Visit Report" in payload["report_markdown"]
     assert "Latest Labs" in payload["report_markdown"]
+
+
+def test_doctor_visit_report_is_cached_until_data_changes(client, monkeypatch):
+    from app.services import reports
+
+    builds = []
+    build = reports.build_doctor_visit_report
+
+    def counting_build(conn, end, days):
+        if days == 14:
+            builds.append(end)
+        return build(conn, end, days)
+
+    monkeypatch.setattr(reports, "build_doctor_visit_report", counting_build)
+
+    params = {"ending": "2026-02-27", "days": 14}
+    client.post(
+        "/api/v1/medical-history/",
+        json={"category": "condition", "title": "Sleep apnea", "active": 1},
+    )
+    first = client.get("/api/v1/reports/doctor-visit", params=params).json()
+    second = client.get("/api/v1/reports/doctor-visit", params=params).json()
+    assert second == first
+    assert len(builds) == 1
+
+    client.post(
+        "/api/v1/medical-history/",
+        json={"category": "condition", "title": "Hypertension", "active": 1},
+    )
+    third = client.get("/api/v1/reports/doctor-visit", params=params).json()
+    assert len(builds) == 2
+    assert {row["title"] for row in third["medical_history"]} == {
+        "Hypertension",
+        "Sleep apnea",
+    }
+
+
+def test_doctor_visit_report_renders_html_and_pdf(client):
+    client.post(
+        "/api/v1/labs/",
+        json={
+            "drawn_date": "2026-02-14",
+            "panel": "Lipid Panel",
+            "marker": "Triglycerides",
+            "value": 182,
+            "unit": "mg/dL",
+            "reference_high": 149,
+        },
+    )
+    params = {"ending": "2026-02-27", "days": 30}
+
+    page = client.get(
+        "/api/v1/reports/doctor-visit", params={**params, "format": "html"}
+    )
+    assert page.status_code == 200
+    assert page.headers["content-type"].startswith("text/html")
+    assert "<h1>Doctor Visit Report (2026-01-29 to 2026-02-27)</h1>" in page.text
+    assert "<li>Lipid Panel: Triglycerides 182.0 mg/dL (H)</li>" in page.text
+
+    pdf = client.get("/api/v1/reports/doctor-visit", params={**params, "format": "pdf"})
+    assert pdf.status_code == 200
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.content.startswith(b"%PDF-1.4")
+    assert pdf.content.rstrip().endswith(b"%%EOF")
+    assert b"(Doctor Visit Report \\(2026-01-29 to 2026-02-27\\)) Tj" in pdf.content
+
+    again = client.get(
+        "/api/v1/reports/doctor-visit", params={**params, "format": "pdf"}
+    )
+    assert again.content == pdf.content
+
+    assert (
+        client.get(
+            "/api/v1/reports/doctor-visit", params={**params, "format": "docx"}
+        ).status_code
+        == 422
+    )
+
+
+def test_doctor_visit_report_precomputes_only_after_a_rebuild(client, monkeypatch):
+    from app.services.reports import report_workers
+
+    queued = []
+    monkeypatch.setattr(
+        report_workers, "precompute", lambda end, connect: queued.append(end)
+    )
+    params = {"ending": "2026-02-27", "days": 30}
+
+    for _ in range(3):
+        assert (
+            client.get("/api/v1/reports/doctor-visit", params=params).status_code == 200
+        )
+    html = client.get(
+        "/api/v1/reports/doctor-visit", params={**params, "format": "html"}
+    )
+    assert html.status_code == 200
+    assert len(queued) == 1
+
+    client.post(
+        "/api/v1/sleep",
+        json={"recorded_date": "2026-02-27", "duration_min": 400, "source": "manual"},
+    )
+    assert client.get("/api/v1/reports/doctor-visit", params=params).status_code == 200
+    assert [str(end) for end in queued] == ["2026-02-27", "2026-02-27"]
+
+
+def test_render_pdf_paginates_long_reports():
+    from app.services.reports import render_pdf
+
+    markdown = "\n".join(
+        ["# Doctor Visit Report (2025-01-01 to 2025-12-31)", "## Notes"]
+        + [f"- item {index} (µ)" for index in range(200)]
+    )
+    pdf = render_pdf({"report_markdown": markdown})
+    assert b"/Count 5" in pdf
+    assert b"(\x95 item 199 \\(\xb5\\)) Tj" in pdf
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.scheduler import CronError, CronSchedule, Job, LoadMonitor, Scheduler
+
+
+def test_cron_schedule_next_after():
+    daily = CronSchedule.parse("30 6 * * *")
+    assert daily.next_after(datetime(2026, 3, 2, 6, 29)) == datetime(2026, 3, 2, 6, 30)
+    assert daily.next_after(datetime(2026, 3, 2, 6, 30)) == datetime(2026, 3, 3, 6, 30)
+
+    # 2026-03-02 is a Monday; both 0 and 7 mean Sunday.
+    sunday = CronSchedule.parse("0 20 * * 7")
+    assert sunday.next_after(datetime(2026, 3, 2, 12, 0)) == datetime(2026, 3, 8, 20, 0)
+
+    stepped = CronSchedule.parse("*/20 9-10 * * 1-5")
+    assert stepped.next_after(datetime(2026, 3, 6, 10, 45)) == datetime(
+        2026, 3, 9, 9, 0
+    )
+
+    # Restricting both day fields matches either one.
+    either = CronSchedule.parse("0 0 1 * 1")
+    assert either.next_after(datetime(2026, 3, 3, 0, 0)) == datetime(2026, 3, 9, 0, 0)
+
+    for spec in ("* * *", "61 * * * *", "*/0 * * * *", "a * * * *"):
+        with pytest.raises(CronError):
+            CronSchedule.parse(spec)
+
+
+def _scheduler(db_module, jobs, monitor=None):
+    return Scheduler(jobs, connect=db_module.get_db, monitor=monitor)
+
+
+def _row(db_module, name):
+    conn = db_module.get_db()
+    try:
+        return dict(
+            conn.execute(
+                "SELECT * FROM scheduled_jobs WHERE name = ?", (name,)
+            ).fetchone()
+        )
+    finally:
+        conn.close()
+
+
+def test_due_job_runs_and_persists_next_run(client, db_module_fixture):
+    runs = []
+    job = Job("nightly", "0 3 * * *", runs.append, jitter_seconds=60)
+    scheduler = _scheduler(db_module_fixture, [job])
+
+    assert scheduler.run_due(datetime(2026, 3, 2, 2, 0)) == []
+    first = _row(db_module_fixture, "nightly")
+    assert "2026-03-02 03:00:00" <= first["next_run_at"] <= "2026-03-02 03:01:00"
+
+    assert scheduler.run_due(datetime(2026, 3, 2, 3, 5)) == ["nightly"]
+    assert len(runs) == 1
+    row = _row(db_module_fixture, "nightly")
+    assert row["last_run_at"] == "2026-03-02 03:05:00"
+    assert row["last_status"] == "ok"
+    assert row["lease_owner"] is None
+    assert row["next_run_at"] >= "2026-03-03 03:00:00"
+
+    assert scheduler.run_due(datetime(2026, 3, 2, 3, 6)) == []
+    assert len(runs) == 1
+
+
+def test_lease_keeps_second_worker_out(client, db_module_fixture):
+    runs = []
+    job = Job("nightly", "0 3 * * *", runs.append, jitter_seconds=0)
+    first = _scheduler(db_module_fixture, [job])
+    second = _scheduler(db_module_fixture, [job])
+    first.run_due(datetime(2026, 3, 2, 2, 0))
+
+    conn = db_module_fixture.get_db()
+    try:
+        assert first._acquire(
+            conn, job, datetime(2026, 3, 2, 3, 0), due_by=datetime(2026, 3, 2, 3, 0)
+        )
+    finally:
+        conn.close()
+    assert second.run_due(datetime(2026, 3, 2, 3, 1)) == []
+    assert runs == []
+
+    # An expired lease (a worker that died mid-run) can be taken over.
+    assert second.run_due(datetime(2026, 3, 2, 3, 20)) == ["nightly"]
+    assert len(runs) == 1
+
+
+def test_heavy_job_deferred_while_busy(client, db_module_fixture, monkeypatch):
+    monkeypatch.setenv("SCHEDULER_BUSY_IN_FLIGHT", "1")
+    runs = []
+    monitor = LoadMonitor()
+    job = Job("maintenance", "0 3 * * *", runs.append, heavy=True, jitter_seconds=0)
+    scheduler = _scheduler(db_module_fixture, [job], monitor)
+    scheduler.run_due(datetime(2026, 3, 2, 2, 0))
+
+    monitor.begin()
+    assert scheduler.run_due(datetime(2026, 3, 2, 3, 0)) == []
+    row = _row(db_module_fixture, "maintenance")
+    assert row["next_run_at"] == "2026-03-02 03:05:00"
+    assert row["deferred_since"] == "2026-03-02 03:00:00"
+
+    # Still busy, but the job has waited as long as it's allowed to.
+    assert scheduler.run_due(datetime(2026, 3, 2, 4, 0)) == ["maintenance"]
+    monitor.end()
+    assert len(runs) == 1
+    assert _row(db_module_fixture, "maintenance")["deferred_since"] is None
+
+
+def test_failed_job_records_error(client, db_module_fixture):
+    def explode(conn):
+        raise RuntimeError("upstream unavailable")
+
+    scheduler = _scheduler(
+        db_module_fixture, [Job("flaky", "0 * * * *", explode, jitter_seconds=0)]
+    )
+    scheduler.run_due(datetime(2026, 3, 2, 2, 30))
+    assert scheduler.run_due(datetime(2026, 3, 2, 3, 0)) == ["flaky"]
+    row = _row(db_module_fixture, "flaky")
+    assert row["last_status"] == "error"
+    assert "upstream unavailable" in row["last_error"]
+    assert row["next_run_at"] == "2026-03-02 04:00:00"
+
+
+def test_scheduler_api_lists_and_runs_jobs(client, monkeypatch):
+    monkeypatch.delenv("OURA_API_TOKEN", raising=False)
+    jobs = client.get("/api/v1/scheduler/jobs").json()
+    by_name = {job["name"]: job for job in jobs}
+    assert set(by_name) == {
+        "oura_sync",
+        "daily_suggestion",
+        "daily_digest",
+        "weekly_digest",
+        "db_maintenance",
+    }
+    assert by_name["oura_sync"]["enabled"] is False
+    assert by_name["db_maintenance"]["heavy"] is True
+
+    response = client.post("/api/v1/scheduler/jobs/db_maintenance/run")
+    assert response.status_code == 200
+    assert response.json()["last_status"] == "ok"
+
+    assert client.post("/api/v1/scheduler/jobs/oura_sync/run").status_code == 409
+    assert client.post("/api/v1/scheduler/jobs/nope/run").status_code == 404
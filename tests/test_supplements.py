@@ -1,3 +1,6 @@
+from datetime import date, timedelta
+
+
 def test_supplements_create_list_and_patch_active_status(client):
     create = client.post(
         "/api/v1/supplements/",
@@ -31,3 +34,167 @@ def test_supplements_create_list_and_patch_active_status(client):
     all_response = client.get("/api/v1/supplements/", params={"active_only": 0})
     assert all_response.status_code == 200
     assert len(all_response.json()) == 1
+
+
+def _create_supplement(client, **fields):
+    response = client.post("/api/v1/supplements/", json={"dose": "5g", **fields})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_supplement_logs_bulk_upserts_one_log_per_day(client, db_module_fixture):
+    supplement_id = _create_supplement(
+        client, name="Creatine", started_date="2026-03-01"
+    )
+    items = [
+        {"supplement_id": supplement_id, "recorded_date": f"2026-03-0{day}"}
+        for day in (1, 2, 3)
+    ]
+    first = client.post("/api/v1/supplements/logs/bulk", json={"items": items})
+    assert first.status_code == 201
+    assert first.json()["created_count"] == 3
+
+    # Re-checking a day updates it rather than adding a second log.
+    again = client.post(
+        "/api/v1/supplements/logs/bulk",
+        json={
+            "items": [
+                {
+                    "supplement_id": supplement_id,
+                    "recorded_date": "2026-03-02",
+                    "taken": 0,
+                    "notes": "forgot",
+                }
+            ]
+        },
+    )
+    assert again.status_code == 201
+    assert again.json()["created_count"] == 0
+    assert again.json()["updated_count"] == 1
+    assert again.json()["updated"][0]["taken"] == 0
+
+    # A key repeated within one batch is written once, last item winning.
+    repeated = client.post(
+        "/api/v1/supplements/logs/bulk",
+        json={
+            "items": [
+                {"supplement_id": supplement_id, "recorded_date": "2026-03-04"},
+                {"supplement_id": supplement_id, "recorded_date": "2026-03-03"},
+                {
+                    "supplement_id": supplement_id,
+                    "recorded_date": "2026-03-04",
+                    "taken": 0,
+                },
+            ]
+        },
+    ).json()
+    assert repeated["created_count"] == 1
+    assert [row["taken"] for row in repeated["created"]] == [0]
+    assert repeated["updated_count"] == 1
+
+    conn = db_module_fixture.get_db()
+    logs = conn.execute("SELECT COUNT(*) FROM supplement_logs").fetchone()[0]
+    rollup = conn.execute(
+        "SELECT month, days_logged, days_taken FROM supplement_adherence_monthly"
+    ).fetchall()
+    conn.close()
+    assert logs == 4
+    assert [tuple(row) for row in rollup] == [("2026-03", 4, 2)]
+
+
+def test_supplement_logs_bulk_reports_unknown_supplements(client):
+    supplement_id = _create_supplement(client, name="Magnesium")
+    items = [
+        {"supplement_id": supplement_id, "recorded_date": "2026-03-01"},
+        {"supplement_id": 999, "recorded_date": "2026-03-01"},
+        {"supplement_id": supplement_id, "recorded_date": "not-a-date"},
+    ]
+
+    atomic = client.post("/api/v1/supplements/logs/bulk", json={"items": items})
+    assert atomic.status_code == 422
+
+    best_effort = client.post(
+        "/api/v1/supplements/logs/bulk",
+        json={"mode": "best_effort", "items": items},
+    )
+    assert best_effort.status_code == 201
+    payload = best_effort.json()
+    assert payload["created_count"] == 1
+    assert sorted(error["index"] for error in payload["errors"]) == [1, 2]
+
+
+def test_supplement_adherence_matrix_and_monthly_rollup(client):
+    creatine = _create_supplement(
+        client, name="Creatine", started_date="2026-02-27", stopped_date="2026-03-03"
+    )
+    fish_oil = _create_supplement(client, name="Fish oil", active=0)
+    client.post(
+        "/api/v1/supplements/logs/bulk",
+        json={
+            "items": [
+                {"supplement_id": creatine, "recorded_date": "2026-02-27"},
+                {"supplement_id": creatine, "recorded_date": "2026-02-28"},
+                {"supplement_id": creatine, "recorded_date": "2026-03-01"},
+                {"supplement_id": creatine, "recorded_date": "2026-03-02", "taken": 0},
+                {"supplement_id": fish_oil, "recorded_date": "2026-03-02"},
+            ]
+        },
+    )
+
+    response = client.get(
+        "/api/v1/supplements/adherence",
+        params={"from": "2026-02-28", "to": "2026-03-04"},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["days"] == 5
+    rows = {row["name"]: row for row in payload["supplements"]}
+    # 03-03 was in effect but not logged; 03-04 is after the stop date.
+    assert rows["Creatine"]["days"] == "110.-"
+    assert rows["Creatine"]["taken"] == 2
+    assert rows["Creatine"]["scheduled"] == 4
+    assert rows["Creatine"]["adherence_pct"] == 50.0
+    assert rows["Creatine"]["monthly"] == [
+        {"month": "2026-02", "taken": 2, "scheduled": 2, "adherence_pct": 100.0},
+        {"month": "2026-03", "taken": 1, "scheduled": 3, "adherence_pct": 33.3},
+    ]
+    # Inactive with no stop date: only the logged day counts.
+    assert rows["Fish oil"]["days"] == "--1--"
+    assert rows["Fish oil"]["adherence_pct"] == 100.0
+
+    invalid = client.get(
+        "/api/v1/supplements/adherence",
+        params={"from": "2026-03-04", "to": "2026-03-01"},
+    )
+    assert invalid.status_code == 422
+
+
+def test_supplement_adherence_ignores_future_dated_logs(client):
+    today = date.today()
+    supplement_id = _create_supplement(
+        client, name="Vitamin D", started_date=today.isoformat()
+    )
+    client.post(
+        "/api/v1/supplements/logs/bulk",
+        json={
+            "items": [
+                {
+                    "supplement_id": supplement_id,
+                    "recorded_date": (today + timedelta(days=offset)).isoformat(),
+                }
+                for offset in range(3)
+            ]
+        },
+    )
+
+    response = client.get(
+        "/api/v1/supplements/adherence",
+        params={
+            "from": today.isoformat(),
+            "to": (today + timedelta(days=2)).isoformat(),
+        },
+    )
+    assert response.status_code == 200
+    (row,) = response.json()["supplements"]
+    assert row["days"] == "111"
+    assert (row["taken"], row["scheduled"], row["adherence_pct"]) == (1, 1, 100.0)
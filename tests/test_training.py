@@ -71,3 +71,85 @@ def test_generate_training_suggestion_low_readiness_returns_easy_intensity(clien
     assert payload["scheduled_type"] == "cardio"
     assert payload["intensity"] == "easy"
     assert "easy" in payload["suggestion"].lower()
+
+
+def test_backfill_suggestions_counts_missed_sessions_week_to_date(client):
+    for offset, (readiness, hrv) in enumerate([(80, 45.0), (82, 46.0), (55, 30.0)]):
+        client.post(
+            "/api/v1/sleep",
+            json={
+                "recorded_date": f"2026-03-0{2 + offset}",
+                "hrv": hrv,
+                "readiness_score": readiness,
+                "source": "oura",
+            },
+        )
+    # Monday's strength session is skipped; Wednesday's is done.
+    for recorded_date, session_type in (
+        ("2026-03-03", "cardio"),
+        ("2026-03-04", "strength"),
+    ):
+        client.post(
+            "/api/v1/exercise/sessions",
+            json={
+                "recorded_date": recorded_date,
+                "session_type": session_type,
+                "name": session_type.title(),
+                "duration_min": 30,
+                "source": "manual",
+            },
+        )
+
+    response = client.post(
+        "/api/v1/training/suggestions/backfill",
+        params={"from": "2026-03-02", "to": "2026-03-08"},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["generated"] == 7
+    assert payload["intensity"]["rest"] == 2
+
+    # Single-day generation goes through the same range path.
+    generated = {
+        day: client.post(
+            "/api/v1/training/suggestions/generate", params={"target_date": day}
+        ).json()
+        for day in ("2026-03-02", "2026-03-04", "2026-03-06")
+    }
+    assert generated["2026-03-02"]["hrv_7day_avg"] == 45.0
+    assert generated["2026-03-04"]["intensity"] == "easy"
+    # Friday: Monday, Wednesday and Friday are strength days, one was done.
+    assert "missed 2 scheduled session" in generated["2026-03-06"]["suggestion"]
+
+
+def test_suggestion_hrv_average_matches_raw_seven_day_mean(client, db_module_fixture):
+    for recorded_date, hrv in (
+        ("2026-03-01", 40.0),
+        ("2026-03-02", 41.0),
+        ("2026-03-04", 44.0),
+    ):
+        client.post(
+            "/api/v1/sleep",
+            json={"recorded_date": recorded_date, "hrv": hrv, "source": "oura"},
+        )
+
+    response = client.post(
+        "/api/v1/training/suggestions/backfill",
+        params={"from": "2026-03-03", "to": "2026-03-10"},
+    )
+    assert response.status_code == 200
+    conn = db_module_fixture.get_db()
+    try:
+        averages = dict(
+            conn.execute(
+                "SELECT suggestion_date, hrv_7day_avg FROM daily_suggestions"
+            ).fetchall()
+        )
+    finally:
+        conn.close()
+    # Every reading in date-6..date, unrounded, even on days without a record.
+    assert averages["2026-03-03"] == 40.5
+    assert averages["2026-03-05"] == (40.0 + 41.0 + 44.0) / 3
+    assert averages["2026-03-08"] == 42.5
+    assert averages["2026-03-10"] == 44.0
+    assert "2026-03-11" not in averages